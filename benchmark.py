@@ -0,0 +1,176 @@
+import argparse
+import copy
+import glob
+import json
+import math
+import time
+import numpy as np
+import src.instrumentation as instrumentation
+import src.steiner as steiner
+
+
+def random_instance(size, seed, max_iteration=50, swarm_amount=12, population_size=80):
+    """
+    Function that generates a problem instance with points chosen uniformly in the square [0, 100] x [0, 100]
+    Parameters
+    ----------
+    size: int
+        Number of points of the instance
+    seed: int
+        Seed used to choose the points
+    max_iteration: int
+        Maximum number of iterations for each swarm
+    swarm_amount: int
+        Swarm amount that will be initialized one by one
+    population_size: int
+        Population size for the swarms
+    Returns
+    -------
+    dict
+        Instance with the same keys as the files in `Examples`
+    """
+    points = np.random.default_rng(seed).uniform(0, 100, (size, 2))
+    return {'original_points': points.tolist(),
+            'max_iteration': max_iteration,
+            'swarm_amount': swarm_amount,
+            'population_size': population_size}
+
+
+def load_instances(pattern, sizes, seed):
+    """
+    Function that loads the instance files that match a pattern and generates the random instances
+    Parameters
+    ----------
+    pattern: str
+        Glob pattern of the instance files
+    sizes: list
+        Number of points of every random instance
+    seed: int
+        Seed used to generate the random instances
+    Returns
+    -------
+    list
+        List of pairs with the name and the data of every instance
+    """
+    instances = []
+    for file_name in sorted(glob.glob(pattern)):
+        if file_name.endswith('_results.json'):
+            continue
+        with open(file_name) as file:
+            instances.append((file_name, json.load(file)))
+    for size in sizes:
+        instances.append(('random-' + str(size), random_instance(size, seed + size)))
+    return instances
+
+
+def benchmark_instance(name, data, repetitions, seed=None, vectorized=True, seeding='uniform'):
+    """
+    Function that runs the Steiner particle optimization on an instance several times and measures every run
+    Parameters
+    ----------
+    name: str
+        Name of the instance
+    data: dict
+        Instance with the same keys as the files in `Examples`
+    repetitions: int
+        Number of runs
+    seed: int
+        Seed used to derive an independent seed for every run, if None the runs are not repeatable
+    vectorized: bool
+        If True, the swarms are `swarm.ArraySwarm`
+    seeding: str
+        Seeding strategy of the swarms
+    Returns
+    -------
+    list
+        Dictionary with the measures of every run
+    """
+    original_points = data['original_points']
+    max_points = len(data['found_points']) if 'found_points' in data else math.inf
+    known_weight = data.get('steiner_weight')
+    run_seeds = np.random.SeedSequence(seed).spawn(repetitions)
+    results = []
+    for repetition in range(repetitions):
+        st = steiner.Steiner(copy.deepcopy(original_points), instrumentation=instrumentation.Instrumentation(),
+                             rng=run_seeds[repetition])
+        st.calculate_minimum_euclidean_tree()
+        emst_time = st.instrumentation.timers['emst']
+        st.calculate_total_tree_weight()
+        original_weight = st.weight
+        start = time.perf_counter()
+        st.steiner_particle_optimization(data['max_iteration'], data['swarm_amount'], data['population_size'],
+                                         max_points, vectorized=vectorized, seeding=seeding)
+        wall_time = time.perf_counter() - start
+        measures = st.instrumentation.export()
+        evaluations = measures['counters'].get('fitness_evaluations', 0)
+        results.append({'instance': name,
+                        'points': len(original_points),
+                        'repetition': repetition,
+                        'seed': seed,
+                        'wall_time': wall_time,
+                        'emst_time': emst_time,
+                        'evaluations': evaluations,
+                        'evaluations_per_second': evaluations / wall_time if wall_time > 0 else None,
+                        'original_weight': original_weight,
+                        'weight': st.weight,
+                        'steiner_weight': known_weight,
+                        'gap_percentage': None if known_weight is None else
+                        100 * (st.weight - known_weight) / known_weight,
+                        'steiner_points': len(st.points) - len(original_points),
+                        'instrumentation': measures})
+    return results
+
+
+def run_benchmark(pattern='Examples/*.json', sizes=(50, 100, 200, 400), repetitions=3, seed=None, vectorized=True,
+                  seeding='uniform', output='benchmark_results.json'):
+    """
+    Function that benchmarks every instance and writes the measures to a JSON file
+    Parameters
+    ----------
+    pattern: str
+        Glob pattern of the instance files
+    sizes: list
+        Number of points of every random instance
+    repetitions: int
+        Number of runs of every instance
+    seed: int
+        Seed of the random instances and the runs, if None the benchmark is not repeatable
+    vectorized: bool
+        If True, the swarms are `swarm.ArraySwarm`
+    seeding: str
+        Seeding strategy of the swarms
+    output: str
+        Path of the JSON file with the results
+    Returns
+    -------
+    list
+        Dictionary with the measures of every run
+    """
+    results = []
+    instances_seed = 0 if seed is None else seed
+    for name, data in load_instances(pattern, sizes, instances_seed):
+        instance_results = benchmark_instance(name, data, repetitions, seed, vectorized, seeding)
+        results += instance_results
+        mean_time = sum(result['wall_time'] for result in instance_results) / len(instance_results)
+        best_weight = min(result['weight'] for result in instance_results)
+        print(name, "mean time ", mean_time, " best weight ", best_weight)
+    settings = {'pattern': pattern, 'sizes': list(sizes), 'repetitions': repetitions, 'seed': seed,
+                'vectorized': vectorized, 'seeding': seeding}
+    with open(output, 'w') as outfile:
+        outfile.write(json.dumps({'settings': settings, 'results': results}, indent=2))
+    return results
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark of the Steiner particle optimization')
+    parser.add_argument('--pattern', default='Examples/*.json', help='glob pattern of the instance files')
+    parser.add_argument('--sizes', type=int, nargs='*', default=[50, 100, 200, 400],
+                        help='number of points of the random instances')
+    parser.add_argument('--repetitions', type=int, default=3, help='runs of every instance')
+    parser.add_argument('--seed', type=int, default=None, help='seed for repeatable runs')
+    parser.add_argument('--scalar', action='store_true', help='use the particle by particle swarm')
+    parser.add_argument('--seeding', default='uniform', choices=['uniform', 'emst'], help='seeding of the swarms')
+    parser.add_argument('--output', default='benchmark_results.json', help='JSON file with the results')
+    arguments = parser.parse_args()
+    run_benchmark(arguments.pattern, arguments.sizes, arguments.repetitions, arguments.seed, not arguments.scalar,
+                  arguments.seeding, arguments.output)
@@ -1,11 +1,20 @@
+import argparse
 import copy
+import os
+import functools
 import json
-import matplotlib.pyplot as plt
-import networkx as nx
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import src.checkpoint as checkpoint
+import src.events as events
+import src.instance_cache as instance_cache
 import src.steiner as steiner
+from src.batch import run_batch, run_execution
 
 
 def execute_pso_and_graph(max_iteration, swarm_amount, population_size, initial_points):
+    import matplotlib.pyplot as plt
+    import networkx as nx
     font = 'caladea'
     font_size = 10
     plt.rcParams["font.family"] = "caladea"
@@ -53,6 +62,8 @@ def execute_pso_and_graph(max_iteration, swarm_amount, population_size, initial_
 
 
 def original_points_with_steiner_points_graph(original_points, steiner_points, title):
+    import matplotlib.pyplot as plt
+    import networkx as nx
     font_size = 10
     plt.rcParams["font.family"] = "caladea"
     edges_color = "#49817A"
@@ -78,32 +89,108 @@ def original_points_with_steiner_points_graph(original_points, steiner_points, t
     plt.show()
 
 
-def execute_pso_from_file(file_name):
-    file = open(file_name)
-    data = json.load(file)
+def execute_pso_from_file(file_name, workers=1, seed=None, refine=False, time_limit=None, max_evaluations=None,
+                          use_target=False, checkpoint_every=1, resume=False, cache_directory=None, listener=None):
+    """
+    Function that runs the executions of an instance file and writes the best result to `<file_name>_results.json`
+    Parameters
+    ----------
+    file_name: str
+        Path of the instance file
+    workers: int
+        Number of processes used to run the executions, with 1 they run one after another in this process
+    seed: int
+        Seed of the `np.random.SeedSequence` that spawns an independent seed for every execution, if None the seeds
+        are random
+    refine: bool
+        If True, the Steiner points of every execution are refined with `Steiner.refine_steiner_points`
+    time_limit: float
+        Maximum number of seconds of every execution, None for no limit
+    max_evaluations: int
+        Maximum number of fitness evaluations of every execution, None for no limit
+    use_target: bool
+        If True and the file has `steiner_weight`, the executions stop as soon as one of them reaches that weight
+    checkpoint_every: int
+        The state of the run is saved to `<file_name>_checkpoint.json` every time this number of executions finish,
+        0 to turn checkpoints off. The checkpoint is removed when the results are written
+    resume: bool
+        If True and there is a checkpoint of the same instance, the run goes on from it with the seeds it saved
+        instead of `seed`, so the results are the same as if it had not stopped
+    cache_directory: str
+        If it is set, the instance is loaded from this `instance_cache` directory, where it is stored the first time,
+        and the executions load its points and tree memory-mapped instead of parsing the file and building the tree
+    listener: function
+        Function that receives the events of the run and of every execution, see `events.EventEmitter`, by default
+        `events.print_event`. With more than one worker it must be picklable
+    """
+    if listener is None:
+        emitter = events.EventEmitter(events.print_event, kinds=events.PRINTED_KINDS)
+    else:
+        emitter = events.EventEmitter(listener)
+    cache_path = None
+    if cache_directory is None:
+        file = open(file_name)
+        data = json.load(file)
+    else:
+        instance = instance_cache.load_instance(file_name, cache_directory)
+        cache_path = instance.path
+        data = dict(instance.data, original_points=instance.point_list())
     max_iteration = data['max_iteration']
     swarm_amount = data['swarm_amount']
     population_size = data['population_size']
     executions = data["executions"]
     found_points_json = data['found_points']
     original_points = data['original_points']
-    s_original = steiner.Steiner(copy.copy(original_points))
-    s_original.calculate_minimum_euclidean_tree()
+    if cache_path is None:
+        s_original = steiner.Steiner(copy.copy(original_points))
+        s_original.calculate_minimum_euclidean_tree()
+    else:
+        s_original = steiner.Steiner(instance.points)
+        s_original.use_tree(instance.edges, instance.weight)
     s_original.calculate_total_tree_weight()
     minimum_weight = s_original.weight
-    steiner_points = copy.copy(s_original.points)
-    st = steiner.Steiner(original_points.copy())
-    for i in range(executions):
-        st.set_steiner(original_points.copy())
-        st.calculate_minimum_euclidean_tree()
-        st.calculate_total_tree_weight()
-        st.steiner_particle_optimization(max_iteration, swarm_amount, population_size, len(found_points_json))
-        if st.weight < minimum_weight:
-            minimum_weight = copy.copy(st.weight)
-            steiner_points = st.points.copy()
-            print("Improves minimum weight ", steiner_points, minimum_weight)
-        st.delete_steiner()
+    steiner_points = copy.copy(original_points)
     file_name_without_ext = file_name[0:file_name.rindex('.')]
+    checkpoint_file = file_name_without_ext + "_checkpoint.json"
+    entropy = np.random.SeedSequence(seed).entropy
+    completed = 0
+    state = checkpoint.load_checkpoint(checkpoint_file) if resume else None
+    if state is not None and state['executions'] == executions:
+        entropy = state['entropy']
+        completed = state['completed']
+        minimum_weight = state['minimum_weight']
+        steiner_points = state['found_points']
+        emitter.emit('resume', completed=completed, minimum_weight=minimum_weight)
+    seeds = np.random.SeedSequence(entropy).spawn(executions)[completed:]
+    target_weight = data.get('steiner_weight') if use_target else None
+    execution = functools.partial(run_execution, original_points if cache_path is None else None, max_iteration,
+                                  swarm_amount, population_size, len(found_points_json), refine,
+                                  time_limit=time_limit, max_evaluations=max_evaluations,
+                                  target_weight=target_weight, cache_path=cache_path, events=emitter)
+    executor = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+    results = executor.map(execution, seeds) if executor is not None else map(execution, seeds)
+    try:
+        for weight, points in results:
+            if cache_path is not None:
+                points = original_points + points
+            if weight < minimum_weight:
+                minimum_weight = copy.copy(weight)
+                steiner_points = points.copy()
+                emitter.emit('improvement', improved_weight=minimum_weight, found_points=steiner_points,
+                             executions=completed + 1)
+            completed += 1
+            if checkpoint_every > 0 and completed % checkpoint_every == 0:
+                checkpoint.save_checkpoint(checkpoint_file, {'executions': executions,
+                                                             'entropy': entropy,
+                                                             'completed': completed,
+                                                             'minimum_weight': minimum_weight,
+                                                             'found_points': steiner_points})
+            if target_weight is not None and minimum_weight <= target_weight:
+                emitter.emit('target', target_weight=target_weight)
+                break
+    finally:
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
     new_file = file_name_without_ext + "_results.json"
     new_data = {'original_weight': s_original.weight,
                 'improved_weight': minimum_weight,
@@ -111,35 +198,33 @@ def execute_pso_from_file(file_name):
                 'found_points': steiner_points}
     with open(new_file, 'w') as outfile:
         outfile.write(json.dumps(new_data, indent=2))
+    checkpoint.remove_checkpoint(checkpoint_file)
 
 
 if __name__ == '__main__':
-    # filename = input()
-    file = open('Examples/decroos-example.json')
-    data = json.load(file)
-    # execute_pso_and_graph(30, 10, 15, [(-4, 0), (0, 6), (4, 0)])
-    max_iteration = data['max_iteration']
-    swarm_amount = data['swarm_amount']
-    population_size = data['population_size']
-    executions = data["executions"]
-    found_points_json = data['found_points']
-    original_points = data['original_points']
-
-    s_original = steiner.Steiner(copy.copy(original_points))
-    s_original.calculate_minimum_euclidean_tree()
-    s_original.calculate_total_tree_weight()
-    minimum_weight = s_original.weight
-    steiner_points = copy.copy(s_original.points)
-    # st = steiner.Steiner(original_points.copy())
-
-    # steiner_points = [[20307.81814400283, 3804.0630296756885]]
-
-    # results_bib = "Steiner tree in bibliography"
-    # obt_tree = "Obtained tree"
-    # or_tree = "Original tree"
-    # original_points_with_steiner_points_graph(original_points, steiner_points, obt_tree)    # For plotting
-    execute_pso_from_file("Examples/example-1.json")
-    # s = steiner.Steiner(steiner_points + data["found_points"])
-    # s.calculate_minimum_euclidean_tree()
-    # s.calculate_total_tree_weight()
-    # print("Beginning ------> Original weight ", s.weight, " points ", s.points) # For plotting original tree
+    parser = argparse.ArgumentParser(description='Steiner tree particle swarm optimization')
+    parser.add_argument('source', nargs='?', default='Examples/example-1.json',
+                        help="instance file, directory of instance files, JSON-lines file or '-' for JSON lines "
+                             "from the standard input")
+    parser.add_argument('--output', default=None,
+                        help='JSON-lines file with the results of a batch, the standard output by default')
+    parser.add_argument('--workers', type=int, default=1, help='number of processes')
+    parser.add_argument('--seed', type=int, default=None, help='seed for repeatable runs')
+    parser.add_argument('--refine', action='store_true', help='refine the Steiner points found')
+    parser.add_argument('--time-limit', type=float, default=None, help='maximum seconds of every execution')
+    parser.add_argument('--max-evaluations', type=int, default=None,
+                        help='maximum fitness evaluations of every execution of an instance file')
+    parser.add_argument('--use-target', action='store_true',
+                        help='stop an instance file when its steiner_weight is reached')
+    parser.add_argument('--resume', action='store_true', help='resume an instance file from its checkpoint')
+    parser.add_argument('--vectorized', action='store_true', help='use the vectorized swarms in a batch')
+    parser.add_argument('--cache-directory', default=None,
+                        help='directory of the binary cache of the points and trees of instance files')
+    arguments = parser.parse_args()
+    if arguments.source == '-' or os.path.isdir(arguments.source) or arguments.source.endswith('.jsonl'):
+        run_batch(arguments.source, arguments.output, arguments.workers, arguments.seed, arguments.refine,
+                  arguments.time_limit, arguments.vectorized)
+    else:
+        execute_pso_from_file(arguments.source, arguments.workers, arguments.seed, arguments.refine,
+                              arguments.time_limit, arguments.max_evaluations, arguments.use_target,
+                              resume=arguments.resume, cache_directory=arguments.cache_directory)
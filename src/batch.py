@@ -0,0 +1,268 @@
+import copy
+import glob
+import json
+import math
+import os
+import sys
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+import numpy as np
+import src.budget as budget
+import src.instance_cache as instance_cache
+import src.steiner as steiner
+
+DEFAULT_PARAMETERS = {'max_iteration': 50, 'swarm_amount': 12, 'population_size': 80, 'executions': 1}
+
+
+def run_execution(original_points, max_iteration, swarm_amount, population_size, max_points, refine=False,
+                  seed=None, time_limit=None, max_evaluations=None, target_weight=None, vectorized=False,
+                  cache_path=None, events=None, deadline=None, cancel_event=None):
+    """
+    Function that runs one execution of the Steiner particle optimization from the original points
+    Parameters
+    ----------
+    original_points: list
+        Points of the problem instance
+    max_iteration: int
+        Maximum number of iterations for each swarm
+    swarm_amount: int
+        Swarm amount that will be initialized one by one
+    population_size: int
+        Population size for the swarms
+    max_points: int
+        Maximum number of points added to the original tree
+    refine: bool
+        If True, the Steiner points found are moved to their Fermat points with `Steiner.refine_steiner_points`
+    seed: int, np.random.SeedSequence or np.random.Generator
+        Seed of the random number generator used by the execution, see `util.make_rng`
+    time_limit: float
+        Maximum number of seconds of the optimization, None for no limit
+    max_evaluations: int
+        Maximum number of fitness evaluations of the optimization, None for no limit
+    target_weight: float
+        The optimization stops when the weight is less or equal than this value, None for no target
+    vectorized: bool
+        If True, the swarms are `swarm.ArraySwarm`
+    cache_path: str
+        Directory of the instance in `instance_cache`, if it is set the points and their tree are loaded from it
+        memory-mapped, `original_points` is not used and only the Steiner points are returned
+    events: events.EventEmitter
+        Optional emitter of the progress of the optimization, with worker processes it must be picklable
+    deadline: float
+        Value of `time.time` when the optimization has to stop, it holds even if the execution waited in a pool
+    cancel_event: threading.Event
+        Optional event that stops the optimization when it is set, see `budget.Budget`
+    Returns
+    -------
+    tuple
+        Final weight of the tree and its points, see `cache_path`
+    """
+    if cache_path is None:
+        st = steiner.Steiner(copy.copy(original_points), rng=seed, events=events)
+        st.calculate_minimum_euclidean_tree()
+    else:
+        instance = instance_cache.CachedInstance(cache_path)
+        st = steiner.Steiner(instance.points, rng=seed, events=events)
+        st.use_tree(instance.edges, instance.weight)
+    st.calculate_total_tree_weight()
+    limits = None
+    if any(limit is not None for limit in (time_limit, max_evaluations, target_weight, deadline, cancel_event)):
+        limits = budget.Budget(time_limit, max_evaluations, target_weight, deadline, cancel_event)
+    st.steiner_particle_optimization(max_iteration, swarm_amount, population_size, max_points, vectorized=vectorized,
+                                     budget=limits)
+    if refine:
+        st.refine_steiner_points()
+    return st.weight, st.points
+
+
+def iter_instances(source):
+    """
+    Function that loads the instances of a source one at a time
+    Parameters
+    ----------
+    source: str
+        Directory with one JSON instance per file, JSON-lines file with one instance per line or '-' to read JSON
+        lines from the standard input. The instances have the keys of the files in `Examples`, the parameters that
+        are missing take the values of `DEFAULT_PARAMETERS`
+    Returns
+    -------
+    generator
+        Pairs with the name and the data of every instance. The data of a file or line that cannot be read or parsed
+        is the exception instead, so one bad instance does not stop the others
+    """
+    if os.path.isdir(source):
+        for file_name in sorted(glob.glob(os.path.join(source, '*.json'))):
+            if file_name.endswith('_results.json') or file_name.endswith('_checkpoint.json'):
+                continue
+            try:
+                with open(file_name) as file:
+                    data = json.load(file)
+            except (OSError, ValueError) as error:
+                data = error
+            yield file_name, data
+        return
+    lines = sys.stdin if source == '-' else open(source)
+    try:
+        for line_number, line in enumerate(lines, 1):
+            if line.strip():
+                name = source + ':' + str(line_number)
+                try:
+                    data = json.loads(line)
+                except ValueError as error:
+                    yield name, error
+                    continue
+                yield (data.get('name', name), data) if isinstance(data, dict) else (name, data)
+    finally:
+        if lines is not sys.stdin:
+            lines.close()
+
+
+def solve_instance(name, data, seed=None, refine=False, time_limit=None, vectorized=False):
+    """
+    Function that runs every execution of an instance and keeps the best tree
+    Parameters
+    ----------
+    name: str
+        Name of the instance
+    data: dict
+        Instance with the keys of the files in `Examples`
+    seed: int or np.random.SeedSequence
+        Seed that spawns an independent seed for every execution, if None the seeds are random
+    refine: bool
+        If True, the Steiner points of every execution are refined with `Steiner.refine_steiner_points`
+    time_limit: float
+        Maximum number of seconds of every execution, None for no limit
+    vectorized: bool
+        If True, the swarms are `swarm.ArraySwarm`
+    Returns
+    -------
+    dict
+        Result with the name of the instance and the keys of the `_results.json` files
+    """
+    parameters = dict(DEFAULT_PARAMETERS, **data)
+    if not isinstance(seed, np.random.SeedSequence):
+        seed = np.random.SeedSequence(seed)
+    original_points = parameters['original_points']
+    max_points = len(parameters['found_points']) if 'found_points' in parameters else math.inf
+    s_original = steiner.Steiner(copy.copy(original_points))
+    s_original.calculate_minimum_euclidean_tree()
+    s_original.calculate_total_tree_weight()
+    minimum_weight = s_original.weight
+    steiner_points = copy.copy(s_original.points)
+    for execution_seed in seed.spawn(parameters['executions']):
+        weight, points = run_execution(original_points, parameters['max_iteration'], parameters['swarm_amount'],
+                                       parameters['population_size'], max_points, refine, execution_seed,
+                                       time_limit, vectorized=vectorized)
+        if weight < minimum_weight:
+            minimum_weight = weight
+            steiner_points = points.copy()
+    return {'name': name,
+            'original_weight': s_original.weight,
+            'improved_weight': minimum_weight,
+            'improvement_percentage': 100 - (minimum_weight * 100 / s_original.weight),
+            'found_points': steiner_points}
+
+
+def write_result(output, result):
+    """
+    Function that writes a result as a JSON line and flushes it, so every result is on disk as soon as it finishes
+    Parameters
+    ----------
+    output: file
+        Open text file
+    result: dict
+        Result of an instance
+    """
+    output.write(json.dumps(result) + '\n')
+    output.flush()
+
+
+def run_batch(source, output=None, workers=1, seed=None, refine=False, time_limit=None, vectorized=False):
+    """
+    Function that solves the instances of a source and writes every result as a JSON line as soon as it finishes.
+    The instances are loaded lazily and at most two per worker are waiting in the pool, so a source with thousands
+    of instances uses little memory and the worker processes are reused between instances
+    Parameters
+    ----------
+    source: str
+        Directory, JSON-lines file or '-', see `iter_instances`
+    output: str
+        Path of the JSON-lines file with the results, if None they are written to the standard output
+    workers: int
+        Number of processes, with 1 the instances are solved one after another in this process
+    seed: int
+        Seed of the `np.random.SeedSequence` that spawns an independent seed for every instance, if None the seeds
+        are random
+    refine: bool
+        If True, the Steiner points are refined with `Steiner.refine_steiner_points`
+    time_limit: float
+        Maximum number of seconds of every execution, None for no limit
+    vectorized: bool
+        If True, the swarms are `swarm.ArraySwarm`
+    Returns
+    -------
+    int
+        Number of instances solved, the instances that fail are written with an `error` key instead
+    """
+    root_seed = np.random.SeedSequence(seed)
+    instances = ((name, data, root_seed.spawn(1)[0]) for name, data in iter_instances(source))
+    outfile = sys.stdout if output is None else open(output, 'w')
+    solved = 0
+    try:
+        if workers <= 1:
+            for name, data, instance_seed in instances:
+                try:
+                    if isinstance(data, Exception):
+                        raise data
+                    write_result(outfile, solve_instance(name, data, instance_seed, refine, time_limit, vectorized))
+                    solved += 1
+                except Exception as error:
+                    write_result(outfile, {'name': name, 'error': repr(error)})
+            return solved
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            pending = {}
+            try:
+                for name, data, instance_seed in instances:
+                    if isinstance(data, Exception):
+                        write_result(outfile, {'name': name, 'error': repr(data)})
+                        continue
+                    future = executor.submit(solve_instance, name, data, instance_seed, refine, time_limit,
+                                             vectorized)
+                    pending[future] = name
+                    if len(pending) >= 2 * workers:
+                        done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                        solved += write_finished(outfile, done, pending)
+            finally:
+                while pending:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    solved += write_finished(outfile, done, pending)
+        return solved
+    finally:
+        if outfile is not sys.stdout:
+            outfile.close()
+
+
+def write_finished(output, done, pending):
+    """
+    Function that writes the results of the finished futures and removes them from the pending ones
+    Parameters
+    ----------
+    output: file
+        Open text file
+    done: set
+        Finished futures
+    pending: dict
+        Name of the instance of every pending future
+    Returns
+    -------
+    int
+        Number of futures that finished without error
+    """
+    solved = 0
+    for future in done:
+        name = pending.pop(future)
+        try:
+            write_result(output, future.result())
+            solved += 1
+        except Exception as error:
+            write_result(output, {'name': name, 'error': repr(error)})
+    return solved
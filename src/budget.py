@@ -0,0 +1,150 @@
+import time
+
+CANCEL_CHECK_INTERVAL = 0.1
+
+
+class Budget:
+    """
+    Class that models the limits of an anytime optimization: it can stop after some time, at a deadline, after some
+    fitness evaluations, when a target weight is reached or when it is cancelled from another process, keeping the
+    best tree found so far
+
+    Attributes
+    ----------
+    time_limit: float
+        Maximum number of seconds, None for no limit
+    max_evaluations: int
+        Maximum number of fitness evaluations, None for no limit
+    target_weight: float
+        The optimization stops as soon as the weight is less or equal than this value, None for no target
+    deadline: float
+        Value of `time.time` when the optimization has to stop, None for no deadline. Unlike `time_limit` it does not
+        depend on when the budget starts, so a job that waited in a pool does not run past it
+    cancel_event: threading.Event
+        Optional event, usually a `multiprocessing.Manager().Event` shared with worker processes, that stops the
+        optimization when it is set. It is checked at most every `CANCEL_CHECK_INTERVAL` seconds
+    start_time: float
+        Value of `time.perf_counter` when the budget started
+    evaluations: int
+        Fitness evaluations done since the budget started
+    """
+
+    def __init__(self, time_limit=None, max_evaluations=None, target_weight=None, deadline=None, cancel_event=None):
+        """
+        Budget class constructor
+        Parameters
+        ----------
+        time_limit: float
+            Maximum number of seconds
+        max_evaluations: int
+            Maximum number of fitness evaluations
+        target_weight: float
+            Weight that is good enough to stop
+        deadline: float
+            Value of `time.time` when the optimization has to stop
+        cancel_event: threading.Event
+            Event that cancels the optimization
+        """
+        self.time_limit = time_limit
+        self.max_evaluations = max_evaluations
+        self.target_weight = target_weight
+        self.deadline = deadline
+        self.cancel_event = cancel_event
+        self.start_time = None
+        self.evaluations = 0
+        self.last_cancel_check = -float('inf')
+        self.cancel_seen = False
+
+    def start(self):
+        """
+        Function that starts counting the time, it does nothing if the budget already started so a budget can be
+        shared by several calls
+        """
+        if self.start_time is None:
+            self.start_time = time.perf_counter()
+
+    def elapsed(self):
+        """
+        Function that calculates the seconds since the budget started
+        Returns
+        -------
+        float
+            Seconds since `start`, 0 if it did not start
+        """
+        if self.start_time is None:
+            return 0.0
+        return time.perf_counter() - self.start_time
+
+    def record(self, evaluations):
+        """
+        Function that counts fitness evaluations
+        Parameters
+        ----------
+        evaluations: int
+            Number of evaluations done
+        """
+        self.evaluations += evaluations
+
+    def exhausted(self):
+        """
+        Function that checks if the time or the evaluations ran out, or if the optimization was cancelled
+        Returns
+        -------
+        bool
+            True if the optimization should stop
+        """
+        if self.max_evaluations is not None and self.evaluations >= self.max_evaluations:
+            return True
+        if self.time_limit is not None and self.elapsed() >= self.time_limit:
+            return True
+        if self.deadline is not None and time.time() >= self.deadline:
+            return True
+        return self.cancelled()
+
+    def cancelled(self):
+        """
+        Function that checks `cancel_event`, asking for it at most every `CANCEL_CHECK_INTERVAL` seconds because with
+        a manager every check is a message to another process. If the manager is gone the optimization is cancelled
+        Returns
+        -------
+        bool
+            True if the event was set
+        """
+        if self.cancel_event is None or self.cancel_seen:
+            return self.cancel_seen
+        now = time.perf_counter()
+        if now - self.last_cancel_check >= CANCEL_CHECK_INTERVAL:
+            self.last_cancel_check = now
+            try:
+                self.cancel_seen = self.cancel_event.is_set()
+            except (OSError, EOFError):
+                self.cancel_seen = True
+        return self.cancel_seen
+
+    def reached(self, weight):
+        """
+        Function that checks if a weight reaches the target weight
+        Parameters
+        ----------
+        weight: float
+            Weight of the tree
+        Returns
+        -------
+        bool
+            True if there is a target weight and the weight is less or equal than it
+        """
+        return self.target_weight is not None and weight <= self.target_weight
+
+    def should_stop(self, weight):
+        """
+        Function that checks if the optimization should stop with the best weight found so far
+        Parameters
+        ----------
+        weight: float
+            Best weight found so far
+        Returns
+        -------
+        bool
+            True if the budget is exhausted or the weight reaches the target
+        """
+        return self.exhausted() or self.reached(weight)
@@ -0,0 +1,94 @@
+from collections import OrderedDict
+import numpy as np
+
+
+class FitnessCache:
+    """
+    Class that models a bounded least recently used (LRU) cache of fitness values. Points are quantized to a
+    tolerance, so points closer than the tolerance share the same entry.
+
+    Attributes
+    ----------
+    max_size: int
+        Maximum number of values kept, the least recently used value is evicted first
+    tolerance: float
+        Size of the cells used to quantize the points
+    entries: OrderedDict
+        Cached values by quantized point, ordered from the least to the most recently used
+    hits: int
+        Number of lookups that found a value
+    misses: int
+        Number of lookups that did not find a value
+    """
+
+    def __init__(self, max_size=4096, tolerance=1e-6):
+        """
+        FitnessCache class constructor
+        Parameters
+        ----------
+        max_size: int
+            Maximum number of values kept
+        tolerance: float
+            Size of the cells used to quantize the points
+        """
+        self.max_size = max_size
+        self.tolerance = tolerance
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def keys(self, points):
+        """
+        Function that quantizes points to the keys of the cache
+        Parameters
+        ----------
+        points: np.ndarray
+            Array with one point per row
+        Returns
+        -------
+        list
+            Key of every point
+        """
+        cells = np.round(np.asarray(points, dtype=float) / self.tolerance).astype(np.int64)
+        return list(map(tuple, cells.tolist()))
+
+    def get(self, key):
+        """
+        Function that looks up a value and marks it as the most recently used
+        Parameters
+        ----------
+        key: tuple
+            Key returned by `keys`
+        Returns
+        -------
+        float
+            Cached value, or None if the key is not in the cache
+        """
+        value = self.entries.get(key)
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+            self.entries.move_to_end(key)
+        return value
+
+    def put(self, key, value):
+        """
+        Function that stores a value, evicting the least recently used one if the cache is full
+        Parameters
+        ----------
+        key: tuple
+            Key returned by `keys`
+        value: float
+            Value to store
+        """
+        self.entries[key] = value
+        self.entries.move_to_end(key)
+        if len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+
+    def clear(self):
+        """
+        Function that removes every value, the hit and miss counters are kept
+        """
+        self.entries.clear()
@@ -0,0 +1,59 @@
+import json
+import os
+import tempfile
+
+
+def save_checkpoint(file_name, state):
+    """
+    Function that writes the state of a run to a JSON file atomically: the state is written to a temporary file in
+    the same directory that then replaces the checkpoint, so a process killed while saving never leaves a broken
+    checkpoint
+    Parameters
+    ----------
+    file_name: str
+        Path of the checkpoint file
+    state: dict
+        State of the run, it must be serializable as JSON
+    """
+    directory = os.path.dirname(os.path.abspath(file_name))
+    descriptor, temporary_name = tempfile.mkstemp(dir=directory, prefix='.checkpoint-', suffix='.tmp')
+    try:
+        with os.fdopen(descriptor, 'w') as outfile:
+            outfile.write(json.dumps(state, indent=2))
+            outfile.flush()
+            os.fsync(outfile.fileno())
+        os.replace(temporary_name, file_name)
+    except BaseException:
+        if os.path.exists(temporary_name):
+            os.remove(temporary_name)
+        raise
+
+
+def load_checkpoint(file_name):
+    """
+    Function that reads the state of a run saved with `save_checkpoint`
+    Parameters
+    ----------
+    file_name: str
+        Path of the checkpoint file
+    Returns
+    -------
+    dict
+        State of the run, None if there is no checkpoint
+    """
+    if not os.path.exists(file_name):
+        return None
+    with open(file_name) as file:
+        return json.load(file)
+
+
+def remove_checkpoint(file_name):
+    """
+    Function that removes the checkpoint of a finished run
+    Parameters
+    ----------
+    file_name: str
+        Path of the checkpoint file
+    """
+    if os.path.exists(file_name):
+        os.remove(file_name)
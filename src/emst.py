@@ -0,0 +1,607 @@
+import heapq
+import numpy as np
+from src.metric import get_metric
+
+DELAUNAY_THRESHOLD = 500
+
+
+def as_point_array(points):
+    """Function that converts a points set to a contiguous float64 array with one row per point."""
+    return np.ascontiguousarray(points, dtype=np.float64)
+
+
+def edge_lengths(points, edges, metric=None):
+    """Function that calculates the length with a metric, Euclidean by default, of every edge given as a pair of
+    indices of `points`."""
+    if len(edges) == 0:
+        return np.zeros(0)
+    return get_metric(metric).distances(points[edges[:, 0]], points[edges[:, 1]])
+
+
+def prim_tree(points, metric=None):
+    """
+    Function that calculates the minimum spanning tree with the dense version of Prim's algorithm, the distances
+    from the last added vertex are calculated at once for every vertex outside the tree.
+    Parameters
+    ----------
+    points: np.ndarray
+        Array with one row per point
+    metric: metric.Metric
+        Metric of the distances, Euclidean if None
+    Returns
+    -------
+    tuple
+        Array with the pair of vertex indices of every edge and the total weight of the tree
+    """
+    n = len(points)
+    edges = np.empty((max(n - 1, 0), 2), dtype=np.intp)
+    if n < 2:
+        return edges, 0.0
+    metric = get_metric(metric)
+    in_tree = np.zeros(n, dtype=bool)
+    closest = np.zeros(n, dtype=np.intp)
+    distance = np.full(n, np.inf)
+    vertex = 0
+    total_weight = 0.0
+    for i in range(n - 1):
+        in_tree[vertex] = True
+        new_distance = metric.distances(points, points[vertex])
+        closer = new_distance < distance
+        distance[closer] = new_distance[closer]
+        closest[closer] = vertex
+        distance[in_tree] = np.inf
+        vertex = int(np.argmin(distance))
+        edges[i] = (closest[vertex], vertex)
+        total_weight += distance[vertex]
+    return edges, float(total_weight)
+
+
+def batch_prim_weight(points, metric=None):
+    """
+    Function that calculates the weight of the minimum spanning tree of several points sets of the same size at
+    once, with the dense version of Prim's algorithm advancing all the sets together
+    Parameters
+    ----------
+    points: np.ndarray
+        Array with shape (sets, points, dimension)
+    metric: metric.Metric
+        Metric of the distances, Euclidean if None
+    Returns
+    -------
+    np.ndarray
+        Weight of the tree of every set
+    """
+    sets_amount, n = points.shape[:2]
+    metric = get_metric(metric)
+    rows = np.arange(sets_amount)
+    in_tree = np.zeros((sets_amount, n), dtype=bool)
+    distance = np.full((sets_amount, n), np.inf)
+    vertex = np.zeros(sets_amount, dtype=np.intp)
+    total_weight = np.zeros(sets_amount)
+    for i in range(n - 1):
+        in_tree[rows, vertex] = True
+        new_distance = metric.distances(points, points[rows, vertex][:, np.newaxis, :])
+        np.minimum(distance, new_distance, out=distance)
+        distance[in_tree] = np.inf
+        vertex = distance.argmin(axis=1)
+        total_weight += distance[rows, vertex]
+    return total_weight
+
+
+def kruskal_tree(n, candidate_edges, weights):
+    """
+    Function that calculates the minimum spanning tree of a sparse graph with Kruskal's algorithm
+    Parameters
+    ----------
+    n: int
+        Number of vertices
+    candidate_edges: np.ndarray
+        Array with the pair of vertex indices of every edge of the graph
+    weights: np.ndarray
+        Weight of every edge of the graph
+    Returns
+    -------
+    tuple
+        Array with the pair of vertex indices of every edge of the tree and the total weight of the tree. If the
+        graph is not connected the array has less than n - 1 edges.
+    """
+    parent = list(range(n))
+
+    def find(vertex):
+        while parent[vertex] != vertex:
+            parent[vertex] = parent[parent[vertex]]
+            vertex = parent[vertex]
+        return vertex
+
+    order = np.argsort(weights, kind='stable')
+    tree_edges = []
+    total_weight = 0.0
+    for (u, v), weight in zip(candidate_edges[order].tolist(), weights[order].tolist()):
+        root_u = find(u)
+        root_v = find(v)
+        if root_u != root_v:
+            parent[root_u] = root_v
+            tree_edges.append((u, v))
+            total_weight += weight
+            if len(tree_edges) == n - 1:
+                break
+    return np.array(tree_edges, dtype=np.intp).reshape(-1, 2), total_weight
+
+
+def delaunay_tree(points, metric=None):
+    """
+    Function that calculates the Euclidean minimum spanning tree using the edges of the Delaunay triangulation,
+    which always contains the tree. Degenerate sets (too few, collinear or repeated points) fall back to `prim_tree`.
+    The weighted metric is triangulated after `Metric.transform`, the rectilinear one has no such property and
+    falls back to the exact `neighbor_tree`.
+    Parameters
+    ----------
+    points: np.ndarray
+        Array with one row per point
+    metric: metric.Metric
+        Metric of the distances, Euclidean if None
+    Returns
+    -------
+    tuple
+        Array with the pair of vertex indices of every edge and the total weight of the tree
+    """
+    from scipy.spatial import Delaunay, QhullError
+    metric = get_metric(metric)
+    if metric.p != 2:
+        return neighbor_tree(points, metric=metric)
+    n = len(points)
+    if n <= points.shape[1] + 1:
+        return prim_tree(points, metric)
+    try:
+        triangulation = Delaunay(metric.transform(points))
+    except QhullError:
+        return prim_tree(points, metric)
+    simplices = triangulation.simplices
+    vertices_per_simplex = simplices.shape[1]
+    candidate_edges = np.concatenate([simplices[:, [i, j]] for i in range(vertices_per_simplex)
+                                      for j in range(i + 1, vertices_per_simplex)])
+    edges, total_weight = kruskal_tree(n, candidate_edges, edge_lengths(points, candidate_edges, metric))
+    if len(edges) < n - 1:
+        return prim_tree(points, metric)
+    return edges, total_weight
+
+
+def neighbor_tree(points, neighbors=8, metric=None):
+    """
+    Function that calculates the minimum spanning tree with Borůvka's algorithm: every round joins each component
+    with its nearest point outside of it, found with a KD-tree. Every point asks for its nearest neighbors, doubling
+    their number while all of them are in its own component and the farthest one is closer than the best edge found
+    for the component, so the result is exact and the memory used grows with n instead of n². It works in any
+    dimension and metric.
+    Parameters
+    ----------
+    points: np.ndarray
+        Array with one row per point
+    neighbors: int
+        Initial number of neighbors asked by every point
+    metric: metric.Metric
+        Metric of the distances, Euclidean if None
+    Returns
+    -------
+    tuple
+        Array with the pair of vertex indices of every edge and the total weight of the tree
+    """
+    from scipy.spatial import cKDTree
+    metric = get_metric(metric)
+    n = len(points)
+    if n <= neighbors + 1:
+        return prim_tree(points, metric)
+    transformed_points = metric.transform(points)
+    index = cKDTree(transformed_points)
+    component = np.arange(n)
+    tree_edges = []
+    total_weight = 0.0
+    while len(tree_edges) < n - 1:
+        while (component[component] != component).any():
+            component = component[component]
+        best = np.full(n, np.inf)
+        best_edge = np.zeros((n, 2), dtype=np.intp)
+        pending = np.arange(n)
+        k = neighbors
+        while len(pending):
+            distances, nearest = index.query(transformed_points[pending], k=k + 1, p=metric.p)
+            outside = component[nearest] != component[pending][:, np.newaxis]
+            found = np.flatnonzero(outside.any(axis=1))
+            first = outside[found].argmax(axis=1)
+            found_distances = distances[found, first]
+            found_components = component[pending[found]]
+            np.minimum.at(best, found_components, found_distances)
+            best_rows = found_distances == best[found_components]
+            best_edge[found_components[best_rows]] = np.column_stack([pending[found[best_rows]],
+                                                                      nearest[found[best_rows], first[best_rows]]])
+            if k == n - 1:
+                break
+            pending = pending[~outside.any(axis=1) & (distances[:, -1] < best[component[pending]])]
+            k = min(2 * k, n - 1)
+        roots = np.flatnonzero(np.isfinite(best))
+        for root in roots[np.argsort(best[roots], kind='stable')].tolist():
+            u, v = best_edge[root].tolist()
+            root_u, root_v = component[u], component[v]
+            while component[root_u] != root_u:
+                root_u = component[root_u]
+            while component[root_v] != root_v:
+                root_v = component[root_v]
+            if root_u != root_v:
+                component[root_u] = root_v
+                tree_edges.append((u, v))
+                total_weight += best[root]
+    return np.array(tree_edges, dtype=np.intp).reshape(-1, 2), float(total_weight)
+
+
+BACKENDS = {'prim': prim_tree, 'delaunay': delaunay_tree, 'kdtree': neighbor_tree}
+
+
+def minimum_spanning_tree(points, backend='auto', metric=None):
+    """
+    Function that calculates the minimum spanning tree of a points set
+    Parameters
+    ----------
+    points: list
+        Points set, it is converted with `as_point_array`
+    backend: str or function
+        Name of a function in `BACKENDS`, 'auto' to choose by the size of the set and the metric, or a function
+        that receives the points array and a `metric` keyword argument and returns the edges array and the total
+        weight
+    metric: metric.Metric
+        Metric of the distances, Euclidean if None
+    Returns
+    -------
+    tuple
+        Array with the pair of vertex indices of every edge and the total weight of the tree
+    """
+    points = as_point_array(points)
+    metric = get_metric(metric)
+    if backend == 'auto':
+        if len(points) <= DELAUNAY_THRESHOLD:
+            backend = 'prim'
+        else:
+            backend = 'delaunay' if metric.p == 2 else 'kdtree'
+    if not callable(backend):
+        backend = BACKENDS[backend]
+    return backend(points, metric=metric)
+
+
+def tree_graph(points, edges, metric=None):
+    """
+    Function that builds the NetworkX graph of a tree, the vertices are the points as tuples and every edge has its
+    length as `weight` attribute
+    Parameters
+    ----------
+    points: list
+        Points set
+    edges: np.ndarray
+        Array with the pair of vertex indices of every edge
+    metric: metric.Metric
+        Metric of the lengths, Euclidean if None
+    Returns
+    -------
+    nx.Graph
+        Graph of the tree
+    """
+    import networkx as nx
+    points_array = as_point_array(points)
+    graph = nx.Graph()
+    nodes = [tuple(point) for point in points]
+    graph.add_nodes_from(nodes)
+    for (u, v), weight in zip(edges.tolist(), edge_lengths(points_array, edges, metric).tolist()):
+        if nodes[u] != nodes[v]:
+            graph.add_edge(nodes[u], nodes[v], weight=weight)
+    return graph
+
+
+def insertion_order(edges, root=0):
+    """
+    Function that orders the edges of a tree so that every edge appears after all the edges below it
+    Parameters
+    ----------
+    edges: list
+        List of pairs with the indices of the vertices joined by each edge of the tree
+    root: int
+        Index of the vertex used as the root of the tree
+    Returns
+    -------
+    tuple
+        Lists with the child vertex and the parent vertex of each edge, ordered from the leaves to the root
+    """
+    adjacency = {root: []}
+    for u, v in edges:
+        adjacency.setdefault(u, []).append(v)
+        adjacency.setdefault(v, []).append(u)
+    children = []
+    parents = []
+    visited = {root}
+    queue = [root]
+    for vertex in queue:
+        for neighbor in adjacency[vertex]:
+            if neighbor not in visited:
+                visited.add(neighbor)
+                queue.append(neighbor)
+                children.append(neighbor)
+                parents.append(vertex)
+    children.reverse()
+    parents.reverse()
+    return children, parents
+
+
+def insertion_weight(distances, children, parents, edge_weights, root=0):
+    """
+    Function that calculates the weight of the minimum spanning tree obtained by adding a new vertex to a minimum
+    spanning tree (Chin and Houck insertion). The new tree only uses edges of the original tree and edges incident
+    to the new vertex, so it is enough to walk the original tree once from the leaves to the root, keeping for every
+    subtree the cheapest edge that connects it to the new vertex.
+    Parameters
+    ----------
+    distances: list
+        Distance from every vertex of the tree to the new vertex
+    children: list
+        Child vertex of every edge, ordered as returned by `insertion_order`
+    parents: list
+        Parent vertex of every edge, ordered as returned by `insertion_order`
+    edge_weights: list
+        Weight of every edge, in the same order as `children`
+    root: int
+        Index of the root vertex used to order the edges
+    Returns
+    -------
+    float
+        Weight of the minimum spanning tree with the new vertex
+    """
+    link = list(distances)
+    total_weight = 0
+    for child, parent, edge_weight in zip(children, parents, edge_weights):
+        child_link = link[child]
+        if child_link < edge_weight:
+            total_weight += child_link
+            heavier = edge_weight
+        else:
+            total_weight += edge_weight
+            heavier = child_link
+        if heavier < link[parent]:
+            link[parent] = heavier
+    return total_weight + link[root]
+
+
+def batch_insertion_weight(distances, children, parents, edge_weights, root=0):
+    """
+    Function that calculates, like `insertion_weight`, the weight of the minimum spanning tree obtained by adding a
+    new vertex, for several new vertices at once. The tree is walked once and every step updates all the new
+    vertices together.
+    Parameters
+    ----------
+    distances: np.ndarray
+        Array with one row per vertex of the tree and one column per new vertex with the distance between them
+    children: list
+        Child vertex of every edge, ordered as returned by `insertion_order`
+    parents: list
+        Parent vertex of every edge, ordered as returned by `insertion_order`
+    edge_weights: list
+        Weight of every edge, in the same order as `children`
+    root: int
+        Index of the root vertex used to order the edges
+    Returns
+    -------
+    np.ndarray
+        Weight of the minimum spanning tree with every new vertex
+    """
+    link = np.array(distances, dtype=np.float64)
+    total_weight = np.zeros(link.shape[1])
+    for child, parent, edge_weight in zip(children, parents, edge_weights):
+        child_link = link[child]
+        total_weight += np.minimum(child_link, edge_weight)
+        np.minimum(link[parent], np.maximum(child_link, edge_weight), out=link[parent])
+    return total_weight + link[root]
+
+
+def insertion_tree(distances, children, parents, edge_weights, root=0):
+    """
+    Function that calculates, like `insertion_weight`, the minimum spanning tree obtained by adding a new vertex,
+    keeping also the edge behind every link so the edges of the new tree are returned with its weight
+    Parameters
+    ----------
+    distances: list
+        Distance from every vertex of the tree to the new vertex, whose index is `len(distances)`
+    children: list
+        Child vertex of every edge, ordered as returned by `insertion_order`
+    parents: list
+        Parent vertex of every edge, ordered as returned by `insertion_order`
+    edge_weights: list
+        Weight of every edge, in the same order as `children`
+    root: int
+        Index of the root vertex used to order the edges
+    Returns
+    -------
+    tuple
+        Weight of the minimum spanning tree with the new vertex and list with the pair of vertices of every edge
+    """
+    new_vertex = len(distances)
+    link = list(distances)
+    link_edges = [(vertex, new_vertex) for vertex in range(new_vertex)]
+    edges = []
+    total_weight = 0
+    for child, parent, edge_weight in zip(children, parents, edge_weights):
+        child_link = link[child]
+        if child_link < edge_weight:
+            total_weight += child_link
+            edges.append(link_edges[child])
+            heavier, heavier_edge = edge_weight, (child, parent)
+        else:
+            total_weight += edge_weight
+            edges.append((child, parent))
+            heavier, heavier_edge = child_link, link_edges[child]
+        if heavier < link[parent]:
+            link[parent] = heavier
+            link_edges[parent] = heavier_edge
+    edges.append(link_edges[root])
+    return total_weight + link[root], edges
+
+
+def tree_component(edges, vertex, n):
+    """
+    Function that finds the vertices connected to a vertex in a forest
+    Parameters
+    ----------
+    edges: np.ndarray
+        Array with the pair of vertex indices of every edge
+    vertex: int
+        Index of the vertex
+    n: int
+        Number of vertices
+    Returns
+    -------
+    np.ndarray
+        Boolean array that is True for the vertices of the component of `vertex`
+    """
+    adjacency = [[] for _ in range(n)]
+    for u, v in edges.tolist():
+        adjacency[u].append(v)
+        adjacency[v].append(u)
+    reached = np.zeros(n, dtype=bool)
+    reached[vertex] = True
+    queue = [vertex]
+    for u in queue:
+        for v in adjacency[u]:
+            if not reached[v]:
+                reached[v] = True
+                queue.append(v)
+    return reached
+
+
+def closest_pair(points, first, second, metric=None):
+    """
+    Function that finds the shortest edge between two groups of points, the smaller group is compared with all the
+    points of the larger one, or searched in a KD-tree of it when it is large
+    Parameters
+    ----------
+    points: np.ndarray
+        Array with one row per point
+    first: np.ndarray
+        Indices of the points of the first group
+    second: np.ndarray
+        Indices of the points of the second group
+    metric: metric.Metric
+        Metric of the distances, Euclidean if None
+    Returns
+    -------
+    tuple
+        Index of the point of the first group, index of the point of the second group and their distance
+    """
+    metric = get_metric(metric)
+    swapped = len(first) > len(second)
+    if swapped:
+        first, second = second, first
+    if len(second) > DELAUNAY_THRESHOLD:
+        from scipy.spatial import cKDTree
+        distances, nearest = cKDTree(metric.transform(points[second])).query(metric.transform(points[first]),
+                                                                            p=metric.p)
+        i = int(np.argmin(distances))
+        j = int(nearest[i])
+        distance = float(metric.distances(points[first[i]], points[second[j]]))
+    else:
+        distances = metric.distances(points[first][:, np.newaxis, :], points[second][np.newaxis, :, :])
+        i, j = np.unravel_index(int(np.argmin(distances)), distances.shape)
+        distance = float(distances[i, j])
+    pair = (int(first[i]), int(second[j]))
+    if swapped:
+        pair = pair[::-1]
+    return pair[0], pair[1], distance
+
+
+def edge_pairs(edges, n):
+    """
+    Function that lists every pair of edges of a graph that meet at a vertex
+    Parameters
+    ----------
+    edges: np.ndarray
+        Array with the pair of vertex indices of every edge
+    n: int
+        Number of vertices
+    Returns
+    -------
+    np.ndarray
+        Array with one row per pair of edges: the vertex where they meet and the other vertex of each edge
+    """
+    ends = np.concatenate([edges, edges[:, ::-1]]).reshape(-1, 2)
+    ends = ends[np.argsort(ends[:, 0], kind='stable')]
+    group_ends = np.cumsum(np.bincount(ends[:, 0], minlength=n))[ends[:, 0]]
+    counts = group_ends - np.arange(len(ends)) - 1
+    first = np.repeat(np.arange(len(ends)), counts)
+    second = first + 1 + np.arange(len(first)) - np.repeat(np.cumsum(counts) - counts, counts)
+    return np.column_stack([ends[first, 0], ends[first, 1], ends[second, 1]])
+
+
+def tree_parents(children, parents, n):
+    """
+    Function that calculates the parent and the depth of every vertex of a rooted tree
+    Parameters
+    ----------
+    children: list
+        Child vertex of every edge, ordered as returned by `insertion_order`
+    parents: list
+        Parent vertex of every edge, ordered as returned by `insertion_order`
+    n: int
+        Number of vertices
+    Returns
+    -------
+    tuple
+        Lists with the parent of every vertex (-1 for the root) and the depth of every vertex
+    """
+    parent = [-1] * n
+    depth = [0] * n
+    for child, child_parent in zip(reversed(children), reversed(parents)):
+        parent[child] = child_parent
+        depth[child] = depth[child_parent] + 1
+    return parent, depth
+
+
+def local_insertion_weight(tree_weight, neighbors, distances, parent, depth, parent_weights):
+    """
+    Function that calculates, like `insertion_weight`, the weight of the minimum spanning tree obtained by adding a
+    new vertex, but only allowing edges from the new vertex to some nearby vertices. Only the smallest subtree that
+    joins those vertices can change, so the insertion walks that subtree instead of the whole tree.
+    Parameters
+    ----------
+    tree_weight: float
+        Weight of the tree
+    neighbors: list
+        Vertices that can be joined to the new vertex
+    distances: list
+        Distance from every vertex in `neighbors` to the new vertex
+    parent: list
+        Parent of every vertex, as returned by `tree_parents`
+    depth: list
+        Depth of every vertex, as returned by `tree_parents`
+    parent_weights: list
+        Weight of the edge between every vertex and its parent
+    Returns
+    -------
+    float
+        Weight of the minimum spanning tree with the new vertex
+    """
+    link = dict(zip(neighbors, distances))
+    frontier = [(-depth[vertex], vertex) for vertex in link]
+    heapq.heapify(frontier)
+    local_weight = 0
+    subtree_weight = 0
+    while len(frontier) > 1:
+        child = heapq.heappop(frontier)[1]
+        child_parent = parent[child]
+        edge_weight = parent_weights[child]
+        subtree_weight += edge_weight
+        child_link = link[child]
+        if child_link < edge_weight:
+            local_weight += child_link
+            heavier = edge_weight
+        else:
+            local_weight += edge_weight
+            heavier = child_link
+        if child_parent not in link:
+            link[child_parent] = heavier
+            heapq.heappush(frontier, (-depth[child_parent], child_parent))
+        elif heavier < link[child_parent]:
+            link[child_parent] = heavier
+    return tree_weight - subtree_weight + local_weight + link[frontier[0][1]]
@@ -0,0 +1,143 @@
+import time
+
+THROTTLED_KINDS = ('iteration',)
+PRINTED_KINDS = ('start', 'finish', 'refined', 'improvement', 'resume', 'target')
+
+
+class EventEmitter:
+    """
+    Class that sends the events of the optimization to listeners. Objects that receive an emitter only send events
+    if it is not None, so there is no cost when nobody listens. Every event is a dict with its kind in `type`:
+
+    * 'start': `original_weight` of the tree before the optimization
+    * 'iteration': `iteration`, `best_fitness` and `best_position` of the running swarm, or of the islands after
+      every epoch
+    * 'swarm': `swarm` number, `fitness` and `position` of its best particle and if it was `accepted`
+    * 'steiner_point': `point` added to the tree and the new `weight`
+    * 'pruned': Steiner `point` removed from the tree because its degree became 1 or 2, and the new `weight`
+    * 'finish': final `weight`, `points` of the tree and `steiner_points` found
+    * 'refined': `weight` and `points` after `Steiner.refine_steiner_points`
+    * 'improvement', 'resume' and 'target': progress of the executions of `main.execute_pso_from_file`
+
+    Attributes
+    ----------
+    listeners: list
+        Functions that receive every event sent
+    max_rate: float
+        Maximum number of events per second of every throttled kind, the rest are dropped. None for no limit
+    throttled: tuple
+        Kinds of the events that are throttled, by default the frequent ones
+    kinds: tuple
+        Kinds of the events that are sent, the rest are never built. None for all of them
+    last: dict
+        Time of the last event sent, by throttled kind
+    stopped: bool
+        True if a listener asked the optimization to stop, the swarms check it every iteration
+    """
+
+    def __init__(self, listener=None, max_rate=None, throttled=THROTTLED_KINDS, kinds=None):
+        """
+        EventEmitter class constructor
+        Parameters
+        ----------
+        listener: function
+            Optional first listener
+        max_rate: float
+            Maximum events per second of every throttled kind
+        throttled: tuple
+            Kinds of the throttled events
+        kinds: tuple
+            Kinds of the events sent, None for all
+        """
+        self.listeners = [] if listener is None else [listener]
+        self.max_rate = max_rate
+        self.throttled = throttled
+        self.kinds = kinds
+        self.last = {}
+        self.stopped = False
+
+    def subscribe(self, listener):
+        """
+        Function that adds a listener
+        Parameters
+        ----------
+        listener: function
+            Function that receives the events
+        """
+        self.listeners.append(listener)
+
+    def unsubscribe(self, listener):
+        """
+        Function that removes a listener
+        Parameters
+        ----------
+        listener: function
+            Function added before
+        """
+        self.listeners.remove(listener)
+
+    def stop(self):
+        """
+        Function that asks the optimization to stop, the best tree found so far is returned
+        """
+        self.stopped = True
+
+    def wants(self, kind):
+        """
+        Function that checks if an event would be sent now, so the data of a dropped event is not built
+        Parameters
+        ----------
+        kind: str
+            Kind of the event
+        Returns
+        -------
+        bool
+            True if there are listeners and the event is not filtered or throttled
+        """
+        if not self.listeners or (self.kinds is not None and kind not in self.kinds):
+            return False
+        if self.max_rate is None or kind not in self.throttled:
+            return True
+        return time.monotonic() - self.last.get(kind, -float('inf')) >= 1 / self.max_rate
+
+    def emit(self, kind, **data):
+        """
+        Function that sends an event to the listeners, unless it is throttled
+        Parameters
+        ----------
+        kind: str
+            Kind of the event
+        data: dict
+            Data of the event
+        """
+        if not self.wants(kind):
+            return
+        if self.max_rate is not None and kind in self.throttled:
+            self.last[kind] = time.monotonic()
+        event = dict(data, type=kind)
+        for listener in self.listeners:
+            listener(event)
+
+
+def print_event(event):
+    """
+    Listener that prints the progress of a run, only the kinds in `PRINTED_KINDS` are printed, so an emitter that
+    uses it should filter them with its `kinds`
+    Parameters
+    ----------
+    event: dict
+        Event of the optimization
+    """
+    kind = event['type']
+    if kind == 'start':
+        print("Original weight ", str(event['original_weight']))
+    elif kind == 'finish':
+        print("Final weight ", event['weight'], " with the points ", event['points'])
+    elif kind == 'refined':
+        print("Refined weight ", event['weight'], " with the points ", event['points'])
+    elif kind == 'improvement':
+        print("Improves minimum weight ", event['found_points'], event['improved_weight'])
+    elif kind == 'resume':
+        print("Resuming after ", event['completed'], " executions with minimum weight ", event['minimum_weight'])
+    elif kind == 'target':
+        print("Target weight reached ", event['target_weight'])
@@ -0,0 +1,145 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import numpy as np
+from src.emst import as_point_array, minimum_spanning_tree
+from src.metric import get_metric
+
+CACHE_VERSION = 2
+
+
+class CachedInstance:
+    """
+    Class that models a problem instance loaded from the cache, the arrays are memory-mapped so every process that
+    loads the same instance shares the pages of the files instead of copying them. `steiner.Steiner` takes `points`
+    as its terminals without copying them
+
+    Attributes
+    ----------
+    path: str
+        Directory of the instance in the cache
+    points: np.ndarray
+        Terminals of the instance, one row per point
+    edges: np.ndarray
+        Pair of indices of `points` joined by every edge of the minimum spanning tree
+    weight: float
+        Weight of the minimum spanning tree
+    integer_points: bool
+        True if every coordinate of the instance file is an integer
+    data: dict
+        Parameters of the instance file, without `original_points`
+    """
+
+    def __init__(self, path):
+        """
+        CachedInstance class constructor
+        Parameters
+        ----------
+        path: str
+            Directory of the instance in the cache
+        """
+        with open(os.path.join(path, 'meta.json')) as file:
+            meta = json.load(file)
+        self.path = path
+        self.points = np.load(os.path.join(path, 'points.npy'), mmap_mode='r')
+        self.edges = np.load(os.path.join(path, 'edges.npy'), mmap_mode='r')
+        self.weight = meta['weight']
+        self.integer_points = meta['integer_points']
+        self.data = meta['data']
+
+    def point_list(self):
+        """
+        Function that gives the terminals as a list, with integer coordinates if they were integers in the file
+        Returns
+        -------
+        list
+            List with the coordinates of every terminal
+        """
+        if self.integer_points:
+            return self.points.astype(np.int64).tolist()
+        return self.points.tolist()
+
+
+def instance_key(file_name, metric=None):
+    """
+    Function that calculates the key of an instance in the cache, the SHA-256 hash of the file and of the metric,
+    so editing the file or changing the metric gives a new entry
+    Parameters
+    ----------
+    file_name: str
+        Path of the instance file
+    metric: str or metric.Metric
+        Metric of the tree, Euclidean if None
+    Returns
+    -------
+    str
+        Hexadecimal key
+    """
+    metric = get_metric(metric)
+    file_hash = hashlib.sha256()
+    with open(file_name, 'rb') as file:
+        for block in iter(lambda: file.read(1 << 20), b''):
+            file_hash.update(block)
+    weights = None if metric.weights is None else metric.weights.tolist()
+    file_hash.update(json.dumps([CACHE_VERSION, metric.kind, weights]).encode())
+    return file_hash.hexdigest()
+
+
+def build_cache(file_name, path, metric=None):
+    """
+    Function that parses an instance file, calculates its minimum spanning tree and writes them to a directory of
+    the cache. The files are written to a temporary directory that is renamed at the end, so a process that loads
+    the instance never sees it half written
+    Parameters
+    ----------
+    file_name: str
+        Path of the instance file
+    path: str
+        Directory of the instance in the cache
+    metric: str or metric.Metric
+        Metric of the tree, Euclidean if None
+    """
+    metric = get_metric(metric)
+    with open(file_name) as file:
+        data = json.load(file)
+    original_points = data.pop('original_points')
+    integer_points = all(type(coordinate) is int for point in original_points for coordinate in point)
+    points = as_point_array(original_points)
+    edges, weight = minimum_spanning_tree(points, metric=metric)
+    temporary_path = tempfile.mkdtemp(dir=os.path.dirname(path), prefix='.building-')
+    try:
+        np.save(os.path.join(temporary_path, 'points.npy'), points)
+        np.save(os.path.join(temporary_path, 'edges.npy'), edges)
+        with open(os.path.join(temporary_path, 'meta.json'), 'w') as outfile:
+            outfile.write(json.dumps({'weight': weight, 'integer_points': integer_points, 'data': data,
+                                      'source': os.path.abspath(file_name)}, indent=2))
+        os.rename(temporary_path, path)
+    except OSError:
+        shutil.rmtree(temporary_path, ignore_errors=True)
+        if not os.path.isdir(path):
+            raise
+
+
+def load_instance(file_name, cache_directory='.instance_cache', metric=None):
+    """
+    Function that loads an instance from the cache, building its entry the first time
+    Parameters
+    ----------
+    file_name: str
+        Path of the instance file
+    cache_directory: str
+        Directory of the cache
+    metric: str or metric.Metric
+        Metric of the tree, Euclidean if None
+    Returns
+    -------
+    CachedInstance
+        The instance with memory-mapped arrays
+    """
+    os.makedirs(cache_directory, exist_ok=True)
+    path = os.path.join(cache_directory, instance_key(file_name, metric))
+    if not os.path.isdir(path):
+        build_cache(file_name, path, metric)
+    return CachedInstance(path)
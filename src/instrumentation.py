@@ -0,0 +1,113 @@
+import json
+import time
+from contextlib import contextmanager
+
+
+class Instrumentation:
+    """
+    Class that collects counters and timers of the optimization. Objects that receive an instrumentation only
+    record data if it is not None, so there is no cost when it is turned off.
+
+    Attributes
+    ----------
+    counters: dict
+        Number of times every event happened, by event name
+    timers: dict
+        Total seconds spent in every phase, by phase name
+    calls: dict
+        Number of times every phase was timed, by phase name
+    callback: function
+        Function that receives the data returned by `export` every time it is called
+    """
+
+    def __init__(self, callback=None):
+        """
+        Instrumentation class constructor
+        Parameters
+        ----------
+        callback: function
+            Function that receives the exported data
+        """
+        self.counters = {}
+        self.timers = {}
+        self.calls = {}
+        self.callback = callback
+
+    def count(self, name, amount=1):
+        """
+        Function that adds to a counter
+        Parameters
+        ----------
+        name: str
+            Name of the event
+        amount: int
+            Number of times the event happened
+        """
+        self.counters[name] = self.counters.get(name, 0) + int(amount)
+
+    def add_time(self, name, seconds):
+        """
+        Function that adds time to a phase
+        Parameters
+        ----------
+        name: str
+            Name of the phase
+        seconds: float
+            Seconds spent in the phase
+        """
+        self.timers[name] = self.timers.get(name, 0.0) + float(seconds)
+        self.calls[name] = self.calls.get(name, 0) + 1
+
+    @contextmanager
+    def timer(self, name):
+        """
+        Function that times the code inside a `with` block as a phase
+        Parameters
+        ----------
+        name: str
+            Name of the phase
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(name, time.perf_counter() - start)
+
+    def reset(self):
+        """
+        Function that sets every counter and timer back to zero
+        """
+        self.counters = {}
+        self.timers = {}
+        self.calls = {}
+
+    def export(self):
+        """
+        Function that exports the collected data and passes it to `callback` if it is set
+        Returns
+        -------
+        dict
+            Dictionary with the counters, the timers and the number of calls of every timer
+        """
+        data = {'counters': dict(self.counters), 'timers': dict(self.timers), 'calls': dict(self.calls)}
+        if self.callback is not None:
+            self.callback(data)
+        return data
+
+    def to_json(self, file_name=None):
+        """
+        Function that exports the collected data as JSON
+        Parameters
+        ----------
+        file_name: str
+            If it is set, the JSON is also written to this file
+        Returns
+        -------
+        str
+            JSON with the data returned by `export`
+        """
+        data = json.dumps(self.export(), indent=2)
+        if file_name is not None:
+            with open(file_name, 'w') as outfile:
+                outfile.write(data)
+        return data
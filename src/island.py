@@ -0,0 +1,169 @@
+import time
+import src.swarm as swarm
+from src.parameters import DEFAULT_PARAMETERS
+from src.util import make_rng
+
+
+def run_island(island, lower_limit, upper_limit, iterations, budget=None, schedule_iterations=None):
+    """
+    Function that runs an island for some iterations, it is a module function so worker processes can run it
+    Parameters
+    ----------
+    island: swarm.ArraySwarm
+        Swarm of the island
+    lower_limit: list
+        Lower limit of the search space
+    upper_limit: list
+        Upper limit of the search space
+    iterations: int
+        Number of iterations to run
+    budget: budget.Budget
+        Optional limits of the optimization
+    schedule_iterations: int
+        Length of the inertia schedule of the whole optimization
+    Returns
+    -------
+    swarm.ArraySwarm
+        The island after the iterations
+    """
+    island.particle_swarm_optimization(lower_limit, upper_limit, iterations, budget, schedule_iterations)
+    return island
+
+
+class IslandModel:
+    """
+    Class that models several `swarm.ArraySwarm` that search at the same time and every some iterations send their
+    best position to the next island of a ring, which replaces its worst particle with it
+
+    Attributes
+    ----------
+    islands: list
+        Swarm of every island
+    migration_interval: int
+        Iterations every island runs between two migrations
+    executor: concurrent.futures.Executor
+        Optional pool of worker processes that runs the islands of an epoch in parallel, if None they run one after
+        another in this process
+    instrumentation: instrumentation.Instrumentation
+        Optional collector of counters and timers
+    rng: np.random.Generator
+        Random number generator that spawns the generator of every island
+    parameters: parameters.PSOParameters
+        Control parameters of the islands
+    events: events.EventEmitter
+        Optional emitter of the best fitness after every epoch, the islands do not send events
+    """
+
+    def __init__(self, islands_amount, population_size, initial_position, fitness_function, migration_interval=10,
+                 topology='global', instrumentation=None, rng=None, executor=None, parameters=None, events=None):
+        """
+        IslandModel class constructor
+        Parameters
+        ----------
+        islands_amount: int
+            Number of islands
+        population_size: int
+            Number of particles of every island
+        initial_position: list
+            Initial position where the particles will be initialized
+        fitness_function: function
+            Function that evaluates the fitness of an array of positions, one position per row. With an executor it
+            is sent to the workers, so it must be picklable
+        migration_interval: int
+            Iterations between two migrations
+        topology: str
+            Topology of every island, see `swarm.topology_neighbors`
+        instrumentation: instrumentation.Instrumentation
+            Optional collector of counters and timers, with an executor only the islands created in this process
+            record into it
+        rng: int, np.random.SeedSequence or np.random.Generator
+            Random number generator or its seed, see `util.make_rng`
+        executor: concurrent.futures.Executor
+            Optional pool of worker processes
+        parameters: parameters.PSOParameters
+            Control parameters of the islands, if None the default ones
+        events: events.EventEmitter
+            Optional emitter of the progress
+        """
+        self.migration_interval = migration_interval
+        self.executor = executor
+        self.instrumentation = instrumentation
+        self.events = events
+        self.rng = make_rng(rng)
+        self.parameters = DEFAULT_PARAMETERS if parameters is None else parameters
+        island_instrumentation = instrumentation if executor is None else None
+        self.islands = [swarm.ArraySwarm(population_size, initial_position, fitness_function, island_instrumentation,
+                                         island_rng, topology, self.parameters)
+                        for island_rng in self.rng.spawn(islands_amount)]
+
+    @property
+    def best_global(self):
+        """`particle.ParticleView` with the best position and fitness found in all the islands"""
+        return min((island.best_global for island in self.islands), key=lambda best: best.fitness)
+
+    def migrate(self):
+        """
+        Function that sends the best position of every island to the next one of the ring
+        """
+        migrants = [(island.best_positions[island.best_global_index].copy(),
+                     island.best_fitness[island.best_global_index]) for island in self.islands]
+        for i, (position, fitness) in enumerate(migrants):
+            self.islands[(i + 1) % len(self.islands)].immigrate(position, fitness)
+        if self.instrumentation is not None:
+            self.instrumentation.count('migrations')
+
+    def particle_swarm_optimization(self, lower_limit, upper_limit, max_iterations, budget=None):
+        """
+        Function that runs the islands by epochs of `migration_interval` iterations with a migration after every
+        epoch, it stops after `max_iterations` iterations or when the best fitness did not improve for the stagnation
+        iterations of `parameters`
+        Parameters
+        ----------
+        lower_limit: list
+            Lower limit of the search space
+        upper_limit: list
+            Upper limit of the search space
+        max_iterations: int
+            Maximum number of iterations of every island
+        budget: budget.Budget
+            Optional limits, the islands stop when they run out or the best fitness reaches the target weight. With
+            an executor the evaluations done in the workers are counted here as population times iterations
+        Returns
+        -------
+        particle.ParticleView
+            View of the best position and fitness found in the islands
+        """
+        start = time.perf_counter() if self.instrumentation is not None else None
+        iteration = 0
+        iterations_without_improvement = 0
+        while iteration < max_iterations and iterations_without_improvement <= self.parameters.stagnation_iterations:
+            best_fitness = self.best_global.fitness
+            if budget is not None and budget.should_stop(best_fitness):
+                break
+            if self.events is not None and self.events.stopped:
+                break
+            iterations = min(self.migration_interval, max_iterations - iteration)
+            if self.executor is None:
+                for island in self.islands:
+                    run_island(island, lower_limit, upper_limit, iterations, budget, max_iterations)
+            else:
+                futures = [self.executor.submit(run_island, island, lower_limit, upper_limit, iterations, budget,
+                                                max_iterations) for island in self.islands]
+                self.islands = [future.result() for future in futures]
+                if budget is not None:
+                    budget.record(sum(len(island.positions) for island in self.islands) * iterations)
+            self.migrate()
+            if self.best_global.fitness < best_fitness:
+                iterations_without_improvement = 0
+            else:
+                iterations_without_improvement += iterations
+            iteration += iterations
+            if self.events is not None and self.events.wants('iteration'):
+                best = self.best_global
+                self.events.emit('iteration', iteration=iteration, best_fitness=float(best.fitness),
+                                 best_position=best.position.tolist())
+        if start is not None:
+            self.instrumentation.add_time('islands', time.perf_counter() - start)
+            self.instrumentation.count('island_epochs', -(-iteration // self.migration_interval))
+        return self.best_global
+
@@ -0,0 +1,146 @@
+import numpy as np
+from src.util import fermat_points, geometric_median
+
+KINDS = ('euclidean', 'rectilinear', 'weighted')
+
+
+class Metric:
+    """
+    Class that models the distance used to measure the edges of a tree, with a kernel that works over arrays of
+    points of any dimension
+
+    Attributes
+    ----------
+    kind: str
+        'euclidean', 'rectilinear' (L1 norm, as in VLSI routing) or 'weighted' (Euclidean norm with a weight for
+        every coordinate)
+    weights: np.ndarray
+        Weight of every coordinate of the 'weighted' metric, None for the other kinds
+    p: int
+        Order of the Minkowski norm of the metric after `transform`, 2 or 1
+    scale: np.ndarray
+        Factor of every coordinate that turns the weighted metric into the Euclidean one, None for the other kinds
+    """
+
+    def __init__(self, kind='euclidean', weights=None):
+        """
+        Metric class constructor
+        Parameters
+        ----------
+        kind: str
+            'euclidean', 'rectilinear' or 'weighted'
+        weights: list
+            Positive weight of every coordinate, only for the 'weighted' metric
+        """
+        if kind not in KINDS:
+            raise ValueError("metric should be 'euclidean', 'rectilinear' or 'weighted'")
+        if (kind == 'weighted') != (weights is not None):
+            raise ValueError("weights should be given only with the 'weighted' metric")
+        self.kind = kind
+        self.weights = None if weights is None else np.asarray(weights, dtype=float)
+        if self.weights is not None and (self.weights <= 0).any():
+            raise ValueError("weights should be positive")
+        self.p = 1 if kind == 'rectilinear' else 2
+        self.scale = None if self.weights is None else np.sqrt(self.weights)
+
+    def transform(self, points):
+        """
+        Function that changes the coordinates of the points so that the metric is a Minkowski norm of order `p`,
+        which lets KD-trees and triangulations work with it
+        Parameters
+        ----------
+        points: np.ndarray
+            Array with one point per row
+        Returns
+        -------
+        np.ndarray
+            Points with the coordinates multiplied by `scale`, or the same array
+        """
+        if self.scale is None:
+            return points
+        return points * self.scale
+
+    def distances(self, first, second):
+        """
+        Function that calculates the distances between two arrays of points, which are broadcast against each other
+        Parameters
+        ----------
+        first: np.ndarray
+            Array whose last axis holds the coordinates of the points
+        second: np.ndarray
+            Array whose last axis holds the coordinates of the points
+        Returns
+        -------
+        np.ndarray
+            Distance between every pair of points, with the shape of the broadcast arrays without the last axis
+        """
+        difference = np.subtract(first, second)
+        if self.scale is not None:
+            difference *= self.scale
+        if self.p == 1:
+            return np.abs(difference).sum(axis=-1)
+        return np.sqrt(np.einsum('...i,...i->...', difference, difference))
+
+    def median(self, points, start=None):
+        """
+        Function that calculates the point that minimizes the sum of the distances to some points, it is the Fermat
+        point of a triangle in the Euclidean plane
+        Parameters
+        ----------
+        points: np.ndarray
+            Array with one point per row
+        start: np.ndarray
+            Initial point of the iterative methods
+        Returns
+        -------
+        np.ndarray
+            The median
+        """
+        points = np.asarray(points, dtype=float)
+        if self.p == 1:
+            return np.median(points, axis=0)
+        if self.scale is None:
+            return geometric_median(points, start)
+        return geometric_median(self.transform(points), None if start is None else self.transform(start)) / self.scale
+
+    def triangle_medians(self, triangles):
+        """
+        Function that calculates the median of several triangles at once, with the closed form of the Fermat point
+        for the Euclidean norm instead of the iterations of `median`
+        Parameters
+        ----------
+        triangles: np.ndarray
+            Array with shape (triangles, 3, dimension)
+        Returns
+        -------
+        np.ndarray
+            Array with the median of every triangle, one per row
+        """
+        triangles = np.asarray(triangles, dtype=float)
+        if self.p == 1:
+            return np.median(triangles, axis=1)
+        if self.scale is None:
+            return fermat_points(triangles)
+        return fermat_points(self.transform(triangles)) / self.scale
+
+
+EUCLIDEAN = Metric()
+
+
+def get_metric(metric=None):
+    """
+    Function that gives the metric of a name
+    Parameters
+    ----------
+    metric: str or Metric
+        Name of a metric without weights, a metric, or None for the Euclidean one
+    Returns
+    -------
+    Metric
+        The metric
+    """
+    if metric is None:
+        return EUCLIDEAN
+    if isinstance(metric, Metric):
+        return metric
+    return Metric(metric)
@@ -0,0 +1,178 @@
+import math
+import numpy as np
+
+
+class PSOParameters:
+    """
+    Class that models the control parameters of the particle swarm optimization. The default values are the
+    constants of the original algorithm
+
+    Attributes
+    ----------
+    inertia: float
+        Inertia weight, with a schedule it is the weight of the first iteration
+    cognitive: float
+        Cognitive constant, weight of the best position of the particle
+    social: float
+        Social constant, weight of the best position of the swarm or of the neighborhood
+    inertia_schedule: str
+        'constant' keeps `inertia`, 'linear' decreases it to `final_inertia` in the last iteration and 'chaotic'
+        decreases it the same way but multiplies the final part by a logistic map
+    final_inertia: float
+        Inertia weight of the last iteration with a schedule
+    constriction: bool
+        If True, the speed is multiplied by the constriction factor of Clerc and Kennedy and the inertia is 1, it
+        needs `cognitive + social > 4`
+    velocity_clamp: float
+        If it is set, every coordinate of the speed is limited to this fraction of the width of the search space
+    reset_worsening: int
+        Times a particle can worsen its fitness before it is reset
+    stagnation_iterations: int
+        A swarm stops after this number of iterations without improving its best fitness
+    diversity_threshold: float
+        If it is set, the particles of a swarm are restarted at random positions inside the limits when their mean
+        distance to their centroid, divided by the diagonal of the search space, is less than this value
+    """
+
+    def __init__(self, inertia=0.5, cognitive=1.25, social=1.75, inertia_schedule='constant', final_inertia=0.4,
+                 constriction=False, velocity_clamp=None, reset_worsening=20, stagnation_iterations=35,
+                 diversity_threshold=None):
+        """
+        PSOParameters class constructor
+        Parameters
+        ----------
+        inertia: float
+            Inertia weight
+        cognitive: float
+            Cognitive constant
+        social: float
+            Social constant
+        inertia_schedule: str
+            'constant', 'linear' or 'chaotic'
+        final_inertia: float
+            Inertia weight of the last iteration with a schedule
+        constriction: bool
+            If True, the constriction factor is used
+        velocity_clamp: float
+            Maximum speed as a fraction of the width of the search space
+        reset_worsening: int
+            Worsening times before a particle is reset
+        stagnation_iterations: int
+            Iterations without improvement before a swarm stops
+        diversity_threshold: float
+            Normalized diversity under which a swarm is restarted
+        """
+        if inertia_schedule not in ('constant', 'linear', 'chaotic'):
+            raise ValueError("inertia_schedule should be 'constant', 'linear' or 'chaotic'")
+        if constriction and cognitive + social <= 4:
+            raise ValueError("constriction needs cognitive + social > 4")
+        if velocity_clamp is not None and velocity_clamp <= 0:
+            raise ValueError("velocity_clamp should be positive")
+        self.inertia = inertia
+        self.cognitive = cognitive
+        self.social = social
+        self.inertia_schedule = inertia_schedule
+        self.final_inertia = final_inertia
+        self.constriction = constriction
+        self.velocity_clamp = velocity_clamp
+        self.reset_worsening = reset_worsening
+        self.stagnation_iterations = stagnation_iterations
+        self.diversity_threshold = diversity_threshold
+
+    def constriction_factor(self):
+        """
+        Function that calculates the constriction factor of Clerc and Kennedy
+        Returns
+        -------
+        float
+            Factor that multiplies the speed, 1 without constriction
+        """
+        if not self.constriction:
+            return 1.0
+        phi = self.cognitive + self.social
+        return 2 / abs(2 - phi - math.sqrt(phi * phi - 4 * phi))
+
+    def inertia_weight(self, iteration, max_iterations, chaos=1.0):
+        """
+        Function that calculates the inertia weight of an iteration
+        Parameters
+        ----------
+        iteration: int
+            Number of the iteration, from 0
+        max_iterations: int
+            Maximum number of iterations of the swarm
+        chaos: float
+            Actual value of the logistic map, only used by the 'chaotic' schedule
+        Returns
+        -------
+        float
+            Inertia weight
+        """
+        if self.constriction:
+            return 1.0
+        if self.inertia_schedule == 'constant':
+            return self.inertia
+        remaining = 1 - min(iteration / max(max_iterations - 1, 1), 1)
+        if self.inertia_schedule == 'linear':
+            return (self.inertia - self.final_inertia) * remaining + self.final_inertia
+        return (self.inertia - self.final_inertia) * remaining + self.final_inertia * chaos
+
+    def speed_limit(self, lower_limit, upper_limit):
+        """
+        Function that calculates the maximum speed of every coordinate
+        Parameters
+        ----------
+        lower_limit: list
+            Lower limit of the search space
+        upper_limit: list
+            Upper limit of the search space
+        Returns
+        -------
+        np.ndarray
+            Maximum absolute speed of every coordinate, None without velocity clamping
+        """
+        if self.velocity_clamp is None:
+            return None
+        return self.velocity_clamp * (np.asarray(upper_limit, dtype=float) - np.asarray(lower_limit, dtype=float))
+
+    def needs_restart(self, positions, lower_limit, upper_limit):
+        """
+        Function that checks if the particles of a swarm are too close to each other
+        Parameters
+        ----------
+        positions: np.ndarray
+            Position of every particle, one row per particle
+        lower_limit: list
+            Lower limit of the search space
+        upper_limit: list
+            Upper limit of the search space
+        Returns
+        -------
+        bool
+            True if the diversity of the swarm is less than `diversity_threshold`
+        """
+        if self.diversity_threshold is None:
+            return False
+        diagonal = np.linalg.norm(np.asarray(upper_limit, dtype=float) - np.asarray(lower_limit, dtype=float))
+        if diagonal == 0:
+            return False
+        diversity = np.linalg.norm(positions - positions.mean(axis=0), axis=1).mean() / diagonal
+        return diversity < self.diversity_threshold
+
+
+def next_chaos(chaos):
+    """
+    Function that does one step of the logistic map used by the 'chaotic' inertia schedule
+    Parameters
+    ----------
+    chaos: float
+        Actual value, between 0 and 1
+    Returns
+    -------
+    float
+        Next value
+    """
+    return 4 * chaos * (1 - chaos)
+
+
+DEFAULT_PARAMETERS = PSOParameters()
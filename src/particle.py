@@ -1,28 +1,46 @@
 import numpy as np
-import random
+import time
+from src.parameters import DEFAULT_PARAMETERS
+from src.util import make_rng
 
 
 class Particle:
     """
-    Class that models a particle in a swarm
+    Class that models a particle in a swarm. The position, the speed and the best position are arrays allocated
+    once and updated in place, so an iteration does not create new lists
 
     Attributes
     ----------
-    position : list
+    position : np.ndarray
         Position where the particle is located
-    speed: list
-        List with the speed of the particle, one element per dimension
+    speed: np.ndarray
+        Speed of the particle, one element per dimension
     worsening: int
         Times that a particle worsens their fitness
     fitness_function: function
         Function that evaluates the fitness of a particle
     fitness: float
         Fitness value of a particle
-    best_fitness: tuple
-        Tuple with position and fitness evaluation where the best fitness was found
+    best_position: np.ndarray
+        Position where the best fitness was found, it is a copy so moving the particle does not change it
+    best_value: float
+        Best fitness value found by the particle
+    instrumentation: instrumentation.Instrumentation
+        Optional collector of counters and timers
+    rng: np.random.Generator
+        Random number generator of the particle
+    parameters: parameters.PSOParameters
+        Control parameters of the optimization
+    random_factors: np.ndarray
+        Buffer for the random cognitive and social factors of `update_speed`
+    difference: np.ndarray
+        Buffer for the differences between positions of `update_speed`
     """
 
-    def __init__(self, initial_position, fitness_function):
+    __slots__ = ('position', 'speed', 'worsening', 'fitness_function', 'fitness', 'best_position', 'best_value',
+                 'instrumentation', 'rng', 'parameters', 'random_factors', 'difference')
+
+    def __init__(self, initial_position, fitness_function, instrumentation=None, rng=None, parameters=None):
         """
         Particle class constructor
         Parameters
@@ -31,17 +49,53 @@ class Particle:
             Seed of the particle, from this position the particle will start to move
         fitness_function: function
             Function that will calculate the fitness of a particle
+        instrumentation: instrumentation.Instrumentation
+            Optional collector of counters and timers
+        rng: int, np.random.SeedSequence or np.random.Generator
+            Random number generator or its seed, see `util.make_rng`
+        parameters: parameters.PSOParameters
+            Control parameters, if None the default ones
         """
         dimension = len(initial_position)
-        self.position = []
-        self.speed = []
-        self.worsening = 0
         self.fitness_function = fitness_function
-        for i in range(dimension):
-            self.speed.append(random.uniform(0, 1))
-            self.position.append(initial_position[i] + random.uniform(-1, 1))
-        self.fitness = fitness_function(self.position)
-        self.best_fitness = (self.fitness, self.position)
+        self.instrumentation = instrumentation
+        self.rng = make_rng(rng)
+        self.parameters = DEFAULT_PARAMETERS if parameters is None else parameters
+        self.position = np.array(initial_position, dtype=float)
+        self.speed = np.empty(dimension)
+        self.best_position = np.empty(dimension)
+        self.random_factors = np.empty((2, dimension))
+        self.difference = np.empty(dimension)
+        self.reset()
+
+    @property
+    def best_fitness(self):
+        """Tuple with the best fitness value and the position where it was found"""
+        return self.best_value, self.best_position
+
+    def reset(self):
+        """
+        Function that starts the particle again around its actual position, with a random speed
+        """
+        self.speed[:] = self.rng.uniform(0, 1, len(self.speed))
+        self.position += self.rng.uniform(-1, 1, len(self.position))
+        self.worsening = 0
+        self.fitness = self.fitness_function(self.position)
+        self.best_position[:] = self.position
+        self.best_value = self.fitness
+
+    def restart(self, lower_limit, upper_limit):
+        """
+        Function that starts the particle again around a random position inside the limits
+        Parameters
+        ----------
+        lower_limit: np.ndarray
+            Lower limit of the search space
+        upper_limit: np.ndarray
+            Upper limit of the search space
+        """
+        self.position[:] = self.rng.uniform(lower_limit, upper_limit)
+        self.reset()
 
     def update_position(self, upper_limit, lower_limit):
         """
@@ -49,90 +103,183 @@ class Particle:
         limits then the position will be equal to the limit it exceeds.
         Parameters
         ----------
-        upper_limit: list
+        upper_limit: np.ndarray
             Upper limit of the search space
-        lower_limit: list
+        lower_limit: np.ndarray
             Lower limit of the search space
         """
-        new_position = []
-        for i in range(len(self.position)):
-            new_position.append(self.position[i] + self.speed[i])
-            if new_position[i] > upper_limit[i]:
-                new_position[i] = upper_limit[i]
-            if new_position[i] < lower_limit[i]:
-                new_position[i] = lower_limit[i]
-        self.position = new_position
+        self.position += self.speed
+        np.clip(self.position, lower_limit, upper_limit, out=self.position)
 
-    def update_speed(self, best_global_position):
+    def update_speed(self, best_global_position, inertia=None, speed_limit=None):
         """
         Function that updates the speed vector of a particle
         Parameters
         ----------
-        best_global_position: list
+        best_global_position: np.ndarray
             Position vector of the particle with the best fitness in the swarm
+        inertia: float
+            Inertia weight of the iteration, if None the one of `parameters`
+        speed_limit: np.ndarray
+            Maximum absolute speed of every coordinate, if None the speed is not limited
         """
-        w = 0.5  # Inertia constant
-        c_1 = 1.25  # Cognitive constant
-        c_2 = 1.75  # Social constant
+        w = self.parameters.inertia if inertia is None else inertia  # Inertia constant
+        c_1 = self.parameters.cognitive  # Cognitive constant
+        c_2 = self.parameters.social  # Social constant
 
-        r_1 = np.random.normal(0, 1, len(self.position))
-        r_2 = np.random.normal(0, 1, len(self.position))
-
-        cognitive_speed = []
-        social_speed = []
-
-        for i in range(len(self.position)):
-            cognitive_speed.append(self.best_fitness[1][i] - self.position[i])
-            social_speed.append(best_global_position[i] - self.position[i])
-
-        new_speed = []
-        for i in range(len(self.position)):
-            momentum = w * self.speed[i]
-            cognitive_section = c_1 * cognitive_speed[i] * r_1[i]
-            social_section = c_2 * r_2[i] * social_speed[i]
-            new_speed_value = momentum + social_section + cognitive_section
-            new_speed.append(new_speed_value)
-        self.speed = new_speed
+        self.rng.standard_normal(out=self.random_factors)
+        self.speed *= w
+        np.subtract(self.best_position, self.position, out=self.difference)
+        self.difference *= self.random_factors[0]
+        self.difference *= c_1
+        self.speed += self.difference
+        np.subtract(best_global_position, self.position, out=self.difference)
+        self.difference *= self.random_factors[1]
+        self.difference *= c_2
+        self.speed += self.difference
+        if self.parameters.constriction:
+            self.speed *= self.parameters.constriction_factor()
+        if speed_limit is not None:
+            np.clip(self.speed, -speed_limit, speed_limit, out=self.speed)
 
     def update_fitness(self):
         """
-        Function that updates the fitness value of a particle, checks if the new value is better than `best_fitness`
+        Function that updates the fitness value of a particle, checks if the new value is better than `best_value`
         or if the particle worsened the fitness value.
         """
         actual_position_fitness = self.fitness_function(self.position)
         self.fitness = actual_position_fitness
-        if actual_position_fitness > self.best_fitness[0]:
+        if actual_position_fitness > self.best_value:
             self.worsening += 1
         else:
             self.worsening = 0
-            if actual_position_fitness < self.best_fitness[0]:
-                self.best_fitness = (actual_position_fitness, self.position)
+            if actual_position_fitness < self.best_value:
+                self.best_value = actual_position_fitness
+                self.best_position[:] = self.position
 
     def check_reset(self):
         """
         Function that checks if due to the worsening fitness times, the particle should be reset
         """
-        if self.worsening >= 20:
-            new_particle = Particle(self.position, self.fitness_function)
-            self.position = new_particle.position
-            self.speed = new_particle.speed
-            self.worsening = 0
-            self.fitness = new_particle.fitness
-            self.best_fitness = new_particle.best_fitness
+        if self.worsening >= self.parameters.reset_worsening:
+            if self.instrumentation is not None:
+                self.instrumentation.count('particle_resets')
+            self.reset()
 
-    def update_state(self, lower_limit, upper_limit, best_global_position):
+    def update_state(self, lower_limit, upper_limit, best_global_position, inertia=None, speed_limit=None):
         """
         Function that do an iteration of the living cycle of a particle by updating its parameters
         Parameters
         ----------
-        lower_limit: list
+        lower_limit: np.ndarray
             Lower limit of the search space
-        upper_limit: list
+        upper_limit: np.ndarray
             Upper limit of the search space
-        best_global_position: list
+        best_global_position: np.ndarray
             Position vector of the particle with the best fitness in the swarm
+        inertia: float
+            Inertia weight of the iteration, if None the one of `parameters`
+        speed_limit: np.ndarray
+            Maximum absolute speed of every coordinate, if None the speed is not limited
         """
+        start = time.perf_counter() if self.instrumentation is not None else None
         self.check_reset()
-        self.update_speed(best_global_position)
+        self.update_speed(best_global_position, inertia, speed_limit)
         self.update_position(upper_limit, lower_limit)
         self.update_fitness()
+        if start is not None:
+            self.instrumentation.add_time('particle_update', time.perf_counter() - start)
+
+
+class GlobalBest:
+    """
+    Class that keeps the best position and fitness found in a `swarm.Swarm`, copying the position of a particle into
+    its own array instead of copying the whole particle
+
+    Attributes
+    ----------
+    position: np.ndarray
+        Best position found in the swarm
+    fitness: float
+        Fitness value of the best position
+    """
+
+    __slots__ = ('position', 'fitness')
+
+    def __init__(self, dimension):
+        """
+        GlobalBest class constructor
+        Parameters
+        ----------
+        dimension: int
+            Number of coordinates of a position
+        """
+        self.position = np.empty(dimension)
+        self.fitness = np.inf
+
+    def update(self, particle):
+        """
+        Function that keeps the actual position and fitness of a particle
+        Parameters
+        ----------
+        particle: Particle
+            Particle with a better fitness
+        """
+        self.position[:] = particle.position
+        self.fitness = particle.fitness
+
+
+class ParticleView:
+    """
+    Class that exposes one particle of an `swarm.ArraySwarm` with the attributes of `Particle`, without copying
+    the arrays of the swarm
+
+    Attributes
+    ----------
+    swarm: swarm.ArraySwarm
+        Swarm that stores the particle
+    index: int
+        Row of the particle in the arrays of the swarm
+    personal_best: bool
+        If True, `position` and `fitness` are the best ones found by the particle instead of the actual ones
+    """
+
+    def __init__(self, swarm, index, personal_best=False):
+        """
+        ParticleView class constructor
+        Parameters
+        ----------
+        swarm: swarm.ArraySwarm
+            Swarm that stores the particle
+        index: int
+            Row of the particle in the arrays of the swarm
+        personal_best: bool
+            If True, the view shows the best position found by the particle
+        """
+        self.swarm = swarm
+        self.index = index
+        self.personal_best = personal_best
+
+    @property
+    def position(self):
+        if self.personal_best:
+            return self.swarm.best_positions[self.index]
+        return self.swarm.positions[self.index]
+
+    @property
+    def speed(self):
+        return self.swarm.speeds[self.index]
+
+    @property
+    def fitness(self):
+        if self.personal_best:
+            return self.swarm.best_fitness[self.index]
+        return self.swarm.fitness_values[self.index]
+
+    @property
+    def worsening(self):
+        return self.swarm.worsening[self.index]
+
+    @property
+    def best_fitness(self):
+        return self.swarm.best_fitness[self.index], self.swarm.best_positions[self.index]
@@ -0,0 +1,320 @@
+import asyncio
+import copy
+import functools
+import math
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import src.steiner as steiner
+from src.batch import DEFAULT_PARAMETERS, run_execution
+
+
+def original_weight(original_points):
+    """
+    Function that calculates the weight of the minimum spanning tree of the terminals, it is a module function so
+    worker processes can run it
+    Parameters
+    ----------
+    original_points: list
+        Terminals of the instance
+    Returns
+    -------
+    float
+        Weight of the tree
+    """
+    st = steiner.Steiner(copy.copy(original_points))
+    st.calculate_minimum_euclidean_tree()
+    st.calculate_total_tree_weight()
+    return st.weight
+
+
+class SolveRequest:
+    """
+    Class that models an instance sent to a `SolveService`. The client iterates over it with `async for` to receive
+    the events of the solve as they happen, or awaits it to get only the final result
+
+    Every event is a dict with a `type`: 'improvement' when an execution finds a tree lighter than the best one, with
+    `improved_weight`, `found_points` and the `executions` finished, and 'result' at the end, with the keys of the
+    `_results.json` files and a `status` that is 'completed', 'deadline', 'cancelled' or 'error'. After a deadline or
+    a cancellation the result has the best tree found until then
+
+    Attributes
+    ----------
+    data: dict
+        Instance with the keys of the files in `Examples`
+    seed: int
+        Seed that spawns an independent seed for every execution, if None the seeds are random
+    deadline: float
+        Time of the event loop when the solve has to finish, None for no limit
+    events: asyncio.Queue
+        Events not read yet by the client
+    result: asyncio.Future
+        Final 'result' event
+    cancelled: bool
+        True if the client cancelled the request
+    task: asyncio.Task
+        Task that solves the request, None while it is queued
+    """
+
+    def __init__(self, data, seed=None, deadline=None):
+        """
+        SolveRequest class constructor
+        Parameters
+        ----------
+        data: dict
+            Instance with the keys of the files in `Examples`
+        seed: int
+            Seed of the executions
+        deadline: float
+            Time of the event loop when the solve has to finish
+        """
+        self.data = data
+        self.seed = seed
+        self.deadline = deadline
+        self.events = asyncio.Queue()
+        self.result = asyncio.get_running_loop().create_future()
+        self.cancelled = False
+        self.task = None
+
+    def remaining(self):
+        """
+        Function that calculates the time left until the deadline
+        Returns
+        -------
+        float
+            Seconds left, at least 0, or None without deadline
+        """
+        if self.deadline is None:
+            return None
+        return max(self.deadline - asyncio.get_running_loop().time(), 0)
+
+    def cancel(self):
+        """
+        Function that cancels the request, if it is being solved the executions that did not start are dropped, the
+        running ones are stopped and it finishes with the best tree found
+        """
+        self.cancelled = True
+        if self.task is not None:
+            self.task.cancel()
+
+    def publish(self, event):
+        """
+        Function that sends an event to the client
+        Parameters
+        ----------
+        event: dict
+            Event of the solve
+        """
+        self.events.put_nowait(event)
+        if event['type'] == 'result' and not self.result.done():
+            self.result.set_result(event)
+
+    def __await__(self):
+        return asyncio.shield(self.result).__await__()
+
+    async def __aiter__(self):
+        while True:
+            event = await self.events.get()
+            yield event
+            if event['type'] == 'result':
+                return
+
+
+class SolveService:
+    """
+    Class that models an asyncio service that solves instances. The requests wait in a bounded queue and their
+    executions run in a pool of worker processes, so the event loop is never blocked by the optimization
+
+    Attributes
+    ----------
+    queue: asyncio.Queue
+        Requests waiting to be solved, `submit` waits while it is full
+    executor: concurrent.futures.Executor
+        Pool that runs the executions
+    manager: multiprocessing.managers.SyncManager
+        Manager of the events that stop the running executions of a request when it finishes early
+    concurrency: int
+        Number of requests solved at the same time
+    refine: bool
+        If True, the Steiner points of every execution are refined with `Steiner.refine_steiner_points`
+    vectorized: bool
+        If True, the swarms are `swarm.ArraySwarm`
+    """
+
+    def __init__(self, workers=1, queue_size=16, concurrency=1, executor=None, refine=False, vectorized=False):
+        """
+        SolveService class constructor
+        Parameters
+        ----------
+        workers: int
+            Number of processes of the pool, not used if `executor` is given
+        queue_size: int
+            Maximum number of requests waiting in the queue
+        concurrency: int
+            Number of requests solved at the same time
+        executor: concurrent.futures.Executor
+            Optional pool that runs the executions, it is not shut down by the service
+        refine: bool
+            If True, the Steiner points are refined
+        vectorized: bool
+            If True, the swarms are `swarm.ArraySwarm`
+        """
+        self.queue = asyncio.Queue(maxsize=queue_size)
+        self.own_executor = executor is None
+        self.executor = ProcessPoolExecutor(max_workers=workers) if executor is None else executor
+        self.manager = multiprocessing.Manager()
+        self.concurrency = concurrency
+        self.refine = refine
+        self.vectorized = vectorized
+        self.consumers = []
+
+    async def start(self):
+        """
+        Function that starts the tasks that take the requests from the queue
+        """
+        self.consumers = [asyncio.ensure_future(self.consume()) for _ in range(self.concurrency)]
+
+    async def close(self):
+        """
+        Function that stops the service, the requests being solved or waiting in the queue finish as cancelled
+        """
+        for consumer in self.consumers:
+            consumer.cancel()
+        await asyncio.gather(*self.consumers, return_exceptions=True)
+        self.consumers = []
+        while not self.queue.empty():
+            request = self.queue.get_nowait()
+            request.publish(dict(self.empty_result(request), status='cancelled'))
+        if self.own_executor:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+        self.manager.shutdown()
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def submit(self, data, seed=None, timeout=None):
+        """
+        Function that sends an instance to the service, it waits while the queue is full
+        Parameters
+        ----------
+        data: dict
+            Instance with the keys of the files in `Examples`
+        seed: int
+            Seed of the executions, if None they are random
+        timeout: float
+            Seconds from now until the deadline of the request, the time waiting in the queue included. None for no
+            limit
+        Returns
+        -------
+        SolveRequest
+            The request, to iterate over its events or await its result
+        """
+        deadline = None if timeout is None else asyncio.get_running_loop().time() + timeout
+        request = SolveRequest(data, seed, deadline)
+        await self.queue.put(request)
+        return request
+
+    async def consume(self):
+        """
+        Function that solves the requests of the queue one after another
+        """
+        while True:
+            request = await self.queue.get()
+            try:
+                if not request.cancelled:
+                    request.task = asyncio.ensure_future(self.solve(request))
+                    try:
+                        await asyncio.wait([request.task])
+                    except asyncio.CancelledError:
+                        request.task.cancel()
+                        await asyncio.wait([request.task])
+                        raise
+            finally:
+                if not request.result.done():
+                    request.publish(dict(self.empty_result(request), status='cancelled'))
+                self.queue.task_done()
+
+    @staticmethod
+    def empty_result(request):
+        """
+        Function that gives the result of a request that was not solved
+        Parameters
+        ----------
+        request: SolveRequest
+            The request
+        Returns
+        -------
+        dict
+            Result without weights whose `found_points` are the terminals
+        """
+        return {'type': 'result', 'original_weight': None, 'improved_weight': None, 'improvement_percentage': 0,
+                'found_points': request.data.get('original_points')}
+
+    async def solve(self, request):
+        """
+        Function that runs the executions of a request in the pool and publishes an event every time one of them
+        improves the best tree. Every execution gets the deadline as a wall clock time, so it stops by itself even if
+        it waited in the pool. When the request finishes early the executions that did not start are dropped and the
+        running ones are stopped with a shared event
+        Parameters
+        ----------
+        request: SolveRequest
+            The request
+        """
+        loop = asyncio.get_running_loop()
+        parameters = dict(DEFAULT_PARAMETERS, **request.data)
+        original_points = parameters['original_points']
+        max_points = len(parameters['found_points']) if 'found_points' in parameters else math.inf
+        weight = None
+        minimum_weight = None
+        steiner_points = copy.copy(original_points)
+        futures = []
+        status = 'completed'
+        cancel_event = self.manager.Event()
+        try:
+            weight_future = loop.run_in_executor(self.executor, original_weight, original_points)
+            futures.append(weight_future)
+            weight = await asyncio.wait_for(weight_future, request.remaining())
+            minimum_weight = weight
+            remaining = request.remaining()
+            deadline = None if remaining is None else time.time() + remaining
+            for execution_seed in np.random.SeedSequence(request.seed).spawn(parameters['executions']):
+                execution = functools.partial(run_execution, original_points, parameters['max_iteration'],
+                                              parameters['swarm_amount'], parameters['population_size'], max_points,
+                                              self.refine, execution_seed, vectorized=self.vectorized,
+                                              deadline=deadline, cancel_event=cancel_event)
+                futures.append(loop.run_in_executor(self.executor, execution))
+            finished = 0
+            for future in asyncio.as_completed(futures[1:], timeout=request.remaining()):
+                execution_weight, points = await future
+                finished += 1
+                if execution_weight < minimum_weight:
+                    minimum_weight = execution_weight
+                    steiner_points = points
+                    request.publish({'type': 'improvement', 'improved_weight': minimum_weight,
+                                     'found_points': steiner_points, 'executions': finished})
+        except asyncio.TimeoutError:
+            status = 'deadline'
+        except asyncio.CancelledError:
+            status = 'cancelled'
+        except Exception as error:
+            status = 'error'
+            request.publish(dict(self.empty_result(request), status=status, error=repr(error)))
+            return
+        finally:
+            for future in futures:
+                future.cancel()
+            cancel_event.set()
+        if weight is None:
+            request.publish(dict(self.empty_result(request), status=status))
+            return
+        request.publish({'type': 'result', 'status': status,
+                         'original_weight': weight,
+                         'improved_weight': minimum_weight,
+                         'improvement_percentage': 100 - (minimum_weight * 100 / weight),
+                         'found_points': steiner_points})
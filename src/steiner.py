@@ -1,35 +1,137 @@
 import math
-import networkx as nx
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import src.island as island
 import src.swarm as swarm
-from src.util import distance_between_two_points, calculate_total_graph_weight
-import random
+from src.emst import (as_point_array, batch_insertion_weight, closest_pair, edge_lengths, edge_pairs,
+                      insertion_order, insertion_tree, insertion_weight, local_insertion_weight,
+                      minimum_spanning_tree, tree_component, tree_graph, tree_parents)
+from src.metric import get_metric
+from src.util import make_rng
 
 
 class Steiner:
     """
-    Class that models the Euclidean Steiner Tree Problem
+    Class that models the Steiner Tree Problem with terminals of any dimension, in the Euclidean metric by default
 
     Attributes
     ----------
     points: list
-        Points that belong to the initial set of the problem instance
-    tree: nx. Graph
-        List of edges that belong to the original euclidean minimum spanning tree
+        Points of the tree, the terminals followed by the Steiner points. When the terminals are given as an array
+        they are kept in `terminals` and `points` only holds the Steiner points
+    terminals: np.ndarray
+        Terminals given as an array, for example memory-mapped from `instance_cache`, they are used as the first rows
+        of `vertices` without copying them to a list. None if the terminals are in `points`
+    terminals_amount: int
+        Number of terminals, the points after them are Steiner points
+    backend: str or function
+        Backend used to calculate the minimum spanning tree, see `emst.minimum_spanning_tree`
+    metric: metric.Metric
+        Metric that measures the edges of the tree
+    vertices: np.ndarray
+        Array with the points used to calculate the tree, one row per point
+    tree_edges: np.ndarray
+        Array with the pair of indices of `vertices` joined by every edge of the tree
+    tree_weight: float
+        Weight of the tree returned by the backend
+    graph: nx.Graph
+        Cached graph of the tree, see `tree`
     weight: float
         Weight of the tree
+    insertion: tuple
+        Cached data of `tree` used to evaluate the tree with one more point without rebuilding it
+    seed_candidates: tuple
+        Cached pairs of edges of `candidate_seeds` with a positive saving: array with the three vertices of every
+        pair, their savings and their medians. None until they are requested
+    changed_vertices: np.ndarray
+        Boolean array that is True for the vertices whose edges changed since `seed_candidates` was calculated
+    fitness_cache: cache.FitnessCache
+        Optional cache of `stp_fitness` values, it is cleared every time the tree is calculated again
+    neighborhood: int
+        If it is set, a new point can only be joined to this number of its nearest points when the fitness is
+        calculated, which only changes a small part of the tree in large points sets
+    instrumentation: instrumentation.Instrumentation
+        Optional collector of counters and timers, it is shared with the swarms and their particles
+    rng: np.random.Generator
+        Random number generator of the optimization, every swarm gets an independent generator spawned from it
+    budget: budget.Budget
+        Limits of the running `steiner_particle_optimization`, the fitness evaluations are counted in it
+    events: events.EventEmitter
+        Optional emitter of the progress of the optimization, it is shared with the swarms
     """
 
-    def __init__(self, points):
+    def __init__(self, points, backend='auto', fitness_cache=None, neighborhood=None, instrumentation=None,
+                 rng=None, metric=None, events=None):
         """
         Steiner class constructor
         Parameters
         ----------
-        points: list
-            Points that belong to the initial set of the problem instance
+        points: list or np.ndarray
+            Points that belong to the initial set of the problem instance, an array is kept in `terminals`
+        backend: str or function
+            Backend used to calculate the Euclidean minimum spanning tree
+        fitness_cache: cache.FitnessCache
+            Optional cache of fitness values for the actual points set
+        neighborhood: int
+            Number of nearest points a new point can be joined to, if None it can be joined to any point
+        instrumentation: instrumentation.Instrumentation
+            Optional collector of counters and timers
+        rng: int, np.random.SeedSequence or np.random.Generator
+            Random number generator or its seed, see `util.make_rng`
+        metric: str or metric.Metric
+            Metric of the problem, see `metric.get_metric`, Euclidean if None
+        events: events.EventEmitter
+            Optional emitter of the progress of the optimization
         """
-        self.points = points
-        self.tree = None
+        self.terminals = points if isinstance(points, np.ndarray) else None
+        self.points = [] if self.terminals is not None else points
+        self.terminals_amount = len(points)
+        self.backend = backend
+        self.metric = get_metric(metric)
+        self.fitness_cache = fitness_cache
+        self.neighborhood = neighborhood
+        self.instrumentation = instrumentation
+        self.rng = make_rng(rng)
+        self.budget = None
+        self.events = events
+        self.vertices = None
+        self.tree_edges = None
+        self.tree_weight = None
+        self.graph = None
         self.weight = None
+        self.insertion = None
+        self.seed_candidates = None
+        self.changed_vertices = None
+
+    @property
+    def tree(self):
+        """
+        Graph of the original euclidean minimum spanning tree, it is only built from `tree_edges` the first time it
+        is requested
+        Returns
+        -------
+        nx.Graph
+            Graph of the tree, the vertices are the points as tuples and the edges have a `weight` attribute
+        """
+        if self.graph is None and self.tree_edges is not None:
+            self.graph = tree_graph(self.vertices.tolist(), self.tree_edges, self.metric)
+        return self.graph
+
+    def __getstate__(self):
+        """
+        Function that gives the state sent to worker processes, without the instrumentation and the events, whose
+        callback and listeners may not be picklable, and without the graph, that is rebuilt when it is requested
+        Returns
+        -------
+        dict
+            Attributes of the object
+        """
+        state = self.__dict__.copy()
+        state['instrumentation'] = None
+        state['events'] = None
+        state['graph'] = None
+        return state
 
     def set_steiner(self, points):
         """
@@ -39,47 +141,266 @@ class Steiner:
         points: list
             Points that will be set to the tree
         """
-        self.points = points
-        self.tree = None
+        self.terminals = points if isinstance(points, np.ndarray) else None
+        self.points = [] if self.terminals is not None else points
+        self.terminals_amount = len(points)
+        self.vertices = None
+        self.tree_edges = None
+        self.tree_weight = None
+        self.graph = None
         self.weight = None
+        self.insertion = None
+        self.seed_candidates = None
+        self.changed_vertices = None
+        self.clear_fitness_cache()
 
     def delete_steiner(self):
         """
         Function that deletes the object data
         """
         self.points = []
+        self.terminals = None
+        self.terminals_amount = 0
         self.weight = 0
-        self.tree = None
+        self.vertices = None
+        self.tree_edges = None
+        self.tree_weight = None
+        self.graph = None
+        self.insertion = None
+        self.seed_candidates = None
+        self.clear_fitness_cache()
 
     def calculate_minimum_euclidean_tree(self):
         """
-        Function that calculates the Euclidean minimum spanning tree of the points set.
-        """
-        graph = nx.Graph()
-        for point_i in self.points:
-            graph.add_node(tuple(point_i))
-        for point_i in self.points:
-            for point_j in self.points:
-                if (not point_i == point_j) and (not graph.has_edge(tuple(point_i), tuple(point_j))):
-                    weight = distance_between_two_points(point_i, point_j)
-                    graph.add_edge(tuple(point_i), tuple(point_j), weight=weight)
-        tree = nx.minimum_spanning_tree(graph)
-        for edge_i in tree.edges:
-            weight = distance_between_two_points(edge_i[0], edge_i[1])
-            tree.add_edge(edge_i[0], edge_i[1], weight=weight)
-        self.tree = tree
+        Function that calculates the minimum spanning tree of the points set with `metric`, the name is kept from the
+        Euclidean version.
+        """
+        start = time.perf_counter() if self.instrumentation is not None else None
+        self.vertices = self.point_array()
+        self.tree_edges, self.tree_weight = minimum_spanning_tree(self.vertices, self.backend, self.metric)
+        self.graph = None
+        self.insertion = None
+        self.seed_candidates = None
+        self.clear_fitness_cache()
+        if start is not None:
+            self.instrumentation.add_time('emst', time.perf_counter() - start)
+            self.instrumentation.count('emst_builds')
+
+    def use_tree(self, edges, weight):
+        """
+        Function that sets a minimum spanning tree of the points set calculated before, for example the one stored
+        in `instance_cache`, instead of calculating it again. With the terminals in `terminals` and no Steiner
+        points, `vertices` is the same array
+        Parameters
+        ----------
+        edges: np.ndarray
+            Array with the pair of indices of the points joined by every edge of the tree
+        weight: float
+            Weight of the tree
+        """
+        self.vertices = self.point_array()
+        self.tree_edges = np.asarray(edges, dtype=np.intp)
+        self.tree_weight = float(weight)
+        self.graph = None
+        self.insertion = None
+        self.seed_candidates = None
+        self.clear_fitness_cache()
+
+    def insert_points(self, new_points):
+        """
+        Function that adds points to the tree updating it instead of calculating it again: every point is joined with
+        the Chin and Houck insertion of `emst.insertion_tree`, which replaces the displaced edges, and then the
+        Steiner points left with degree 1 or 2 are removed with `prune_steiner_points`
+        Parameters
+        ----------
+        new_points: list
+            Points added to the tree
+        Returns
+        -------
+        list
+            List with the removed Steiner points
+        """
+        start = time.perf_counter() if self.instrumentation is not None else None
+        for new_point in new_points:
+            if self.insertion is None:
+                self.prepare_insertion()
+            children, parents, edge_weights, local = self.insertion
+            distances = self.metric.distances(self.vertices, np.asarray(new_point, dtype=float))
+            self.tree_weight, edges = insertion_tree(distances.tolist(), children, parents, edge_weights)
+            previous_edges = self.tree_edges
+            self.tree_edges = np.array(edges, dtype=np.intp).reshape(-1, 2)
+            self.vertices = np.vstack([self.vertices, as_point_array([new_point])])
+            if self.seed_candidates is not None:
+                n = len(self.vertices)
+                changed_edges = np.setxor1d(np.sort(previous_edges, axis=1) @ [n, 1],
+                                            np.sort(self.tree_edges, axis=1) @ [n, 1])
+                self.update_seed_candidates(np.concatenate([changed_edges // n, changed_edges % n]))
+            self.points.append(new_point)
+            self.insertion = None
+        removed_points = self.prune_steiner_points()
+        self.graph = None
+        self.clear_fitness_cache()
+        if start is not None:
+            self.instrumentation.add_time('tree_updates', time.perf_counter() - start)
+            self.instrumentation.count('tree_updates')
+        return removed_points
+
+    def prune_steiner_points(self):
+        """
+        Function that removes from the tree the Steiner points with degree 1 or 2 without calculating it again. The
+        edges of the tree without a point still belong to the minimum spanning tree of the other points, so a leaf is
+        just cut and the two parts left by a point of degree 2 are joined by the shortest edge between them
+        Returns
+        -------
+        list
+            List with the removed points
+        """
+        if self.tree_edges is None:
+            self.calculate_minimum_euclidean_tree()
+        removed_points = []
+        while True:
+            degrees = np.bincount(self.tree_edges.ravel(), minlength=len(self.vertices))
+            useless = np.flatnonzero(degrees[self.terminals_amount:] <= 2)
+            if len(useless) == 0:
+                break
+            vertex = self.terminals_amount + int(useless[0])
+            incident = (self.tree_edges == vertex).any(axis=1)
+            edges = self.tree_edges[~incident]
+            weight = self.tree_weight - float(edge_lengths(self.vertices, self.tree_edges[incident], self.metric).sum())
+            changed = self.tree_edges[incident].ravel()
+            if degrees[vertex] == 2:
+                neighbor = int(self.tree_edges[incident][0].sum()) - vertex
+                first = tree_component(edges, neighbor, len(self.vertices))
+                first[vertex] = False
+                second = ~first
+                second[vertex] = False
+                u, v, distance = closest_pair(self.vertices, np.flatnonzero(first), np.flatnonzero(second),
+                                              self.metric)
+                edges = np.vstack([edges, [[u, v]]])
+                weight += distance
+                changed = np.append(changed, [u, v])
+            self.update_seed_candidates(changed, vertex)
+            self.tree_edges = edges - (edges > vertex)
+            self.tree_weight = weight
+            self.vertices = np.delete(self.vertices, vertex, axis=0)
+            removed_points.append(self.points.pop(vertex - self.terminals_amount + self.stored_terminals()))
+        self.insertion = None
+        return removed_points
+
+    def update_seed_candidates(self, changed, removed=None):
+        """
+        Function that marks the vertices whose edges changed, so `candidate_seeds` only calculates again the pairs of
+        edges that meet at them, and removes a vertex from the cached candidates
+        Parameters
+        ----------
+        changed: np.ndarray
+            Indices of the vertices whose edges changed
+        removed: int
+            Index of a vertex that is removed from `vertices`, None if no vertex is removed
+        """
+        if self.seed_candidates is None:
+            return
+        changed_vertices = np.zeros(len(self.vertices), dtype=bool)
+        changed_vertices[:len(self.changed_vertices)] = self.changed_vertices
+        changed_vertices[changed] = True
+        if removed is not None:
+            pairs, savings, medians = self.seed_candidates
+            kept = ~(pairs == removed).any(axis=1)
+            pairs = pairs[kept]
+            self.seed_candidates = (pairs - (pairs > removed), savings[kept], medians[kept])
+            changed_vertices = np.delete(changed_vertices, removed)
+        self.changed_vertices = changed_vertices
+
+    def stored_terminals(self):
+        """
+        Function that gives the number of terminals stored in `points`
+        Returns
+        -------
+        int
+            `terminals_amount`, or 0 when the terminals are in `terminals`
+        """
+        return self.terminals_amount if self.terminals is None else 0
+
+    def point_array(self):
+        """
+        Function that gives the array of all the points of the tree, the terminals are not copied when they are in
+        `terminals` and there are no Steiner points
+        Returns
+        -------
+        np.ndarray
+            Array with one row per point
+        """
+        if self.terminals is None:
+            return as_point_array(self.points)
+        terminals = as_point_array(self.terminals)
+        if not self.points:
+            return terminals
+        return np.vstack([terminals, as_point_array(self.points)])
+
+    def all_points(self):
+        """
+        Function that gives the list of all the points of the tree, the terminals followed by the Steiner points
+        Returns
+        -------
+        list
+            The points
+        """
+        if self.terminals is None:
+            return self.points
+        return self.terminals.tolist() + self.points
+
+    def record_fitness(self, start, evaluations):
+        """
+        Function that records the time and the number of points of a fitness evaluation in `instrumentation`
+        Parameters
+        ----------
+        start: float
+            Value of `time.perf_counter` when the evaluation started
+        evaluations: int
+            Number of points evaluated
+        """
+        self.instrumentation.add_time('fitness', time.perf_counter() - start)
+        self.instrumentation.count('fitness_evaluations', evaluations)
+
+    def clear_fitness_cache(self):
+        """
+        Function that removes the cached fitness values, they are only valid for the points set they were
+        calculated with
+        """
+        if self.fitness_cache is not None:
+            self.fitness_cache.clear()
+
+    def prepare_insertion(self):
+        """
+        Function that caches the edges of the tree ordered from the leaves to the root, so that the weight of the
+        tree with one more point can be calculated without rebuilding it. With `neighborhood` it also caches a
+        KD-tree of the vertices and the parent of every vertex.
+        """
+        if self.tree_edges is None:
+            self.calculate_minimum_euclidean_tree()
+        children, parents = insertion_order(self.tree_edges.tolist())
+        edge_weights = edge_lengths(self.vertices, np.array([children, parents], dtype=np.intp).T.reshape(-1, 2),
+                                    self.metric)
+        local = None
+        if self.neighborhood is not None:
+            from scipy.spatial import cKDTree
+            parent, depth = tree_parents(children, parents, len(self.vertices))
+            parent_weights = [0.0] * len(self.vertices)
+            for child, edge_weight in zip(children, edge_weights.tolist()):
+                parent_weights[child] = edge_weight
+            local = (cKDTree(self.metric.transform(self.vertices)), parent, depth, parent_weights)
+        self.insertion = (children, parents, edge_weights.tolist(), local)
 
     def calculate_total_tree_weight(self):
         """
         Function that calculates the total weight of the tree and sets it to `weight` attribute.
         """
-        total_weight = calculate_total_graph_weight(self.tree)
-        self.weight = total_weight
+        self.weight = self.tree_weight
 
     def calculate_tree_with_point(self, point):
         """
-        Function that given a point, calculates the Euclidean minimum spanning tree of the initial point
-        set and the given point
+        Function that given a point, calculates the minimum spanning tree of the initial point set and the given
+        point
         Parameters
         ----------
         point: tuple
@@ -87,10 +408,10 @@ class Steiner:
         Returns
         -------
         nx.Graph
-            Euclidean minimum spanning tree that includes the new point in the vertex set
+            Minimum spanning tree that includes the new point in the vertex set
         """
-        new_points = self.points + [point]
-        new_steiner = Steiner(new_points)
+        new_points = self.all_points() + [point]
+        new_steiner = Steiner(new_points, self.backend, metric=self.metric)
         new_steiner.calculate_minimum_euclidean_tree()
         return new_steiner.tree
 
@@ -102,31 +423,17 @@ class Steiner:
         list
             List with the value of the maximum coordinates
         """
-        x_max = self.points[0][0]
-        y_max = self.points[0][1]
-        for point in self.points:
-            if point[0] > x_max:
-                x_max = point[0]
-            if point[1] > y_max:
-                y_max = point[1]
-        return [x_max, y_max]
+        return np.max(self.point_array(), axis=0).tolist()
 
     def calculate_lower_limit(self):
         """
-        Function that calculates the upper limit (minimum coordinates) of the points set
+        Function that calculates the lower limit (minimum coordinates) of the points set
         Returns
         -------
         list
             List with the value of the minimum coordinates
         """
-        x_min = self.points[0][0]
-        y_min = self.points[0][1]
-        for point in self.points:
-            if point[0] < x_min:
-                x_min = point[0]
-            if point[1] < y_min:
-                y_min = point[1]
-        return [x_min, y_min]
+        return np.min(self.point_array(), axis=0).tolist()
 
     def stp_fitness(self, new_point):
         """
@@ -140,11 +447,228 @@ class Steiner:
         float
             Weight of the new tree
         """
-        new_tree = self.calculate_tree_with_point(new_point)
-        new_tree_weight = calculate_total_graph_weight(new_tree)
+        start = time.perf_counter() if self.instrumentation is not None else None
+        if self.fitness_cache is None:
+            new_tree_weight = self.calculate_weight_with_point(new_point)
+        else:
+            key = self.fitness_cache.keys([new_point])[0]
+            new_tree_weight = self.fitness_cache.get(key)
+            if new_tree_weight is None:
+                new_tree_weight = self.calculate_weight_with_point(new_point)
+                self.fitness_cache.put(key, new_tree_weight)
+        if start is not None:
+            self.record_fitness(start, 1)
+        if self.budget is not None:
+            self.budget.record(1)
         return new_tree_weight
 
-    def steiner_particle_optimization(self, max_iterations, swarms_amount, population_size, max_points=math.inf):
+    def calculate_weight_with_point(self, new_point):
+        """
+        Function that calculates the weight of the tree with a new point, inserting it into the cached tree
+        Parameters
+        ----------
+        new_point: tuple
+            Point that will be added to the preexisting graph
+        Returns
+        -------
+        float
+            Weight of the new tree
+        """
+        if self.insertion is None:
+            self.prepare_insertion()
+        children, parents, edge_weights, local = self.insertion
+        if local is not None:
+            return self.calculate_batch_weight_with_points(as_point_array([new_point]))[0]
+        distances = self.metric.distances(self.vertices, np.asarray(new_point, dtype=float))
+        return insertion_weight(distances.tolist(), children, parents, edge_weights)
+
+    def stp_batch_fitness(self, new_points):
+        """
+        Function that calculates the Steiner Tree Problem (STP) fitness of several new points at once, every point is
+        added on its own to the preexisting graph
+        Parameters
+        ----------
+        new_points: np.ndarray
+            Array with one new point per row
+        Returns
+        -------
+        np.ndarray
+            Weight of the new tree for every point
+        """
+        start = time.perf_counter() if self.instrumentation is not None else None
+        new_points = as_point_array(new_points)
+        if self.fitness_cache is None:
+            weights = self.calculate_batch_weight_with_points(new_points)
+        else:
+            keys = self.fitness_cache.keys(new_points)
+            weights = np.array([self.fitness_cache.get(key) for key in keys], dtype=float)
+            missing = np.isnan(weights)
+            if missing.any():
+                weights[missing] = self.calculate_batch_weight_with_points(new_points[missing])
+                for i in np.flatnonzero(missing):
+                    self.fitness_cache.put(keys[i], float(weights[i]))
+        if start is not None:
+            self.record_fitness(start, len(new_points))
+        if self.budget is not None:
+            self.budget.record(len(new_points))
+        return weights
+
+    def calculate_batch_weight_with_points(self, new_points):
+        """
+        Function that calculates the weight of the tree with every new point, inserting them into the cached tree
+        Parameters
+        ----------
+        new_points: np.ndarray
+            Array with one new point per row
+        Returns
+        -------
+        np.ndarray
+            Weight of the new tree for every point
+        """
+        if self.insertion is None:
+            self.prepare_insertion()
+        children, parents, edge_weights, local = self.insertion
+        if local is not None:
+            index, parent, depth, parent_weights = local
+            neighbors_amount = min(self.neighborhood, len(self.vertices))
+            distances, neighbors = index.query(self.metric.transform(new_points), k=neighbors_amount, p=self.metric.p)
+            distances = distances.reshape(len(new_points), neighbors_amount)
+            neighbors = neighbors.reshape(len(new_points), neighbors_amount)
+            return np.array([local_insertion_weight(self.tree_weight, point_neighbors, point_distances, parent, depth,
+                                                    parent_weights)
+                             for point_neighbors, point_distances in zip(neighbors.tolist(), distances.tolist())])
+        distances = self.metric.distances(self.vertices[:, np.newaxis, :], new_points[np.newaxis, :, :])
+        return batch_insertion_weight(distances, children, parents, edge_weights)
+
+    def stp_points_fitness(self, position):
+        """
+        Function that calculates the Steiner Tree Problem (STP) fitness of several new points added together
+        Parameters
+        ----------
+        position: list
+            Coordinates of the new points one after another, a position with dk values holds k points of dimension d
+        Returns
+        -------
+        float
+            Weight of the tree with all the new points
+        """
+        return float(self.stp_points_batch_fitness(np.asarray(position, dtype=float)[np.newaxis, :])[0])
+
+    def stp_points_batch_fitness(self, positions):
+        """
+        Function that calculates `stp_points_fitness` for several positions at once
+        Parameters
+        ----------
+        positions: np.ndarray
+            Array with one position per row, every position holds the coordinates of k new points
+        Returns
+        -------
+        np.ndarray
+            Weight of the tree with the new points of every position
+        """
+        start = time.perf_counter() if self.instrumentation is not None else None
+        positions = as_point_array(positions)
+        if self.fitness_cache is None:
+            weights = self.calculate_weight_with_points(positions)
+        else:
+            keys = self.fitness_cache.keys(positions)
+            weights = np.array([self.fitness_cache.get(key) for key in keys], dtype=float)
+            missing = np.isnan(weights)
+            if missing.any():
+                weights[missing] = self.calculate_weight_with_points(positions[missing])
+                for i in np.flatnonzero(missing):
+                    self.fitness_cache.put(keys[i], float(weights[i]))
+        if start is not None:
+            self.record_fitness(start, len(positions))
+        if self.budget is not None:
+            self.budget.record(len(positions))
+        return weights
+
+    def calculate_weight_with_points(self, positions):
+        """
+        Function that calculates the weight of the tree with the k new points of every position, inserting them one
+        after another into the cached tree with `emst.insertion_tree`, so every position costs O(kn) instead of
+        calculating the whole tree again
+        Parameters
+        ----------
+        positions: np.ndarray
+            Array with one position per row, every position holds the coordinates of k new points
+        Returns
+        -------
+        np.ndarray
+            Weight of the tree with the new points of every position
+        """
+        if self.insertion is None:
+            self.prepare_insertion()
+        children, parents, edge_weights, local = self.insertion
+        weights = np.empty(len(positions))
+        for row, position in enumerate(positions):
+            new_points = position.reshape(-1, self.vertices.shape[1])
+            vertices = self.vertices
+            point_children, point_parents, point_weights = children, parents, edge_weights
+            for new_point in new_points[:-1]:
+                distances = self.metric.distances(vertices, new_point)
+                edges = insertion_tree(distances.tolist(), point_children, point_parents, point_weights)[1]
+                vertices = np.vstack([vertices, new_point])
+                point_children, point_parents = insertion_order(edges)
+                point_weights = edge_lengths(vertices, np.array([point_children, point_parents], dtype=np.intp).T,
+                                             self.metric).tolist()
+            distances = self.metric.distances(vertices, new_points[-1])
+            weights[row] = insertion_weight(distances.tolist(), point_children, point_parents, point_weights)
+        return weights
+
+    def candidate_seeds(self):
+        """
+        Function that lists promising positions for new Steiner points from the tree: for every pair of edges that
+        meet at a vertex, joining the three vertices through the median of the triangle (the Fermat point in the
+        Euclidean metric) can be shorter than the two edges. With the Euclidean norm it only happens when the angle
+        between the edges is under 120 degrees. All the pairs are evaluated at once and kept in `seed_candidates`,
+        after `insert_points` only the pairs that meet at a vertex whose edges changed are evaluated again
+        Returns
+        -------
+        list
+            Medians of the pairs of edges, from the biggest to the smallest estimated saving
+        """
+        if self.tree_edges is None:
+            self.calculate_minimum_euclidean_tree()
+        pairs = edge_pairs(self.tree_edges, len(self.vertices))
+        if self.seed_candidates is None:
+            kept_pairs = np.empty((0, 3), dtype=np.intp)
+            kept_savings = np.empty(0)
+            kept_medians = np.empty((0, self.vertices.shape[1]))
+        else:
+            kept_pairs, kept_savings, kept_medians = self.seed_candidates
+            kept = ~self.changed_vertices[kept_pairs[:, 0]]
+            kept_pairs, kept_savings, kept_medians = kept_pairs[kept], kept_savings[kept], kept_medians[kept]
+            pairs = pairs[self.changed_vertices[pairs[:, 0]]]
+        center = self.vertices[pairs[:, 0]]
+        first = self.vertices[pairs[:, 1]]
+        second = self.vertices[pairs[:, 2]]
+        first_lengths = self.metric.distances(first, center)
+        second_lengths = self.metric.distances(second, center)
+        valid = (first_lengths > 0) & (second_lengths > 0)
+        if self.metric.p == 2:
+            first_edges = self.metric.transform(first - center)
+            second_edges = self.metric.transform(second - center)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                cosines = np.einsum('ij,ij->i', first_edges, second_edges) / (first_lengths * second_lengths)
+            valid &= cosines > -0.5
+        triangles = np.stack([first, center, second], axis=1)[valid]
+        medians = self.metric.triangle_medians(triangles)
+        savings = (first_lengths[valid] + second_lengths[valid]
+                   - self.metric.distances(triangles, medians[:, np.newaxis, :]).sum(axis=1))
+        positive = savings > 8 * np.finfo(float).eps * (first_lengths[valid] + second_lengths[valid])
+        self.seed_candidates = (np.concatenate([kept_pairs, pairs[valid][positive]]),
+                                np.concatenate([kept_savings, savings[positive]]),
+                                np.concatenate([kept_medians, medians[positive]]))
+        self.changed_vertices = np.zeros(len(self.vertices), dtype=bool)
+        pairs, savings, medians = self.seed_candidates
+        return medians[np.argsort(-savings, kind='stable')].tolist()
+
+    def steiner_particle_optimization(self, max_iterations, swarms_amount, population_size, max_points=math.inf,
+                                      vectorized=False, points_per_particle=1, seeding='uniform', budget=None,
+                                      topology='global', islands=1, migration_interval=10, workers=1,
+                                      parameters=None):
         """
         Function that executes the Particle Swarm Optimization algorithm for the Steiner Tree Problem
         Parameters
@@ -157,29 +681,172 @@ class Steiner:
             Population size for the swarms, every swarm will have the same size
         max_points: int
             Maximum number of points added to the original tree
+        vectorized: bool
+            If True, every swarm is a `swarm.ArraySwarm` that updates the whole population at once
+        points_per_particle: int
+            Number k of Steiner points optimized together by every swarm, a particle holds the dk coordinates of the
+            points. It can go from 1 to n - 2, the maximum number of Steiner points of a tree with n points
+        seeding: str
+            Where the swarms start: 'uniform' picks random positions inside the limits of the points set, 'emst'
+            starts them at the candidates of `candidate_seeds` first, from the most promising one
+        budget: budget.Budget
+            Optional time, evaluations or target weight limits, when they run out the best tree found so far is
+            returned
+        topology: str
+            Topology of the vectorized swarms, see `swarm.topology_neighbors`
+        islands: int
+            If it is more than 1, every swarm is an `island.IslandModel` with this number of vectorized swarms that
+            exchange their best positions every `migration_interval` iterations
+        migration_interval: int
+            Iterations between two migrations of the islands
+        workers: int
+            Number of processes that run the islands at the same time, with 1 they run in this process
+        parameters: parameters.PSOParameters
+            Control parameters of the swarms, if None the constants of the original algorithm
         Returns
         -------
         list
-            List with the original points, the final weight of the graph and the steiner points found
+            List with the points (see `points`), the final weight of the graph and the steiner points found
         """
-        print("Original weight ", str(self.weight))
+        total_points = self.terminals_amount + len(self.points) - self.stored_terminals()
+        if points_per_particle < 1 or points_per_particle > max(total_points - 2, 1):
+            raise ValueError("points_per_particle should be between 1 and the number of points minus 2")
+        if seeding not in ('uniform', 'emst'):
+            raise ValueError("seeding should be 'uniform' or 'emst'")
+        if topology != 'global' and not vectorized and islands <= 1:
+            raise ValueError("topologies other than 'global' need vectorized swarms")
+        start = time.perf_counter() if self.instrumentation is not None else None
+        if self.events is not None:
+            self.events.emit('start', original_weight=self.weight)
         up_lim = self.calculate_upper_limit()
         low_lim = self.calculate_lower_limit()
+        dimension = len(up_lim)
         new_steiner_points = []
-        actual_swarm = 0
-        while actual_swarm < swarms_amount and len(new_steiner_points) < max_points:
-            x_initial = random.uniform(low_lim[0], up_lim[0])
-            y_initial = random.uniform(low_lim[1], up_lim[1])
-            initial_position = [x_initial, y_initial]
-            swarm_i = swarm.Swarm(population_size, initial_position, self.stp_fitness)
-            best_particle = swarm_i.particle_swarm_optimization(low_lim, up_lim, max_iterations)
-            new_steiner_p = best_particle.position
-            new_steiner_fitness = best_particle.fitness
-            if new_steiner_fitness < self.weight:
-                new_steiner_points.append(new_steiner_p)
-                self.points.append(new_steiner_p)
+        seeds = self.candidate_seeds() if seeding == 'emst' else []
+        self.budget = budget
+        if budget is not None:
+            budget.start()
+        executor = ProcessPoolExecutor(max_workers=workers) if islands > 1 and workers > 1 else None
+        try:
+            actual_swarm = 0
+            while actual_swarm < swarms_amount and len(new_steiner_points) < max_points:
+                if budget is not None and budget.should_stop(self.weight):
+                    break
+                if self.events is not None and self.events.stopped:
+                    break
+                points_amount = min(points_per_particle, max_points - len(new_steiner_points))
+                initial_position = []
+                for i in range(points_amount):
+                    if seeds:
+                        initial_position += seeds.pop(0)
+                        continue
+                    initial_position += self.rng.uniform(low_lim, up_lim).tolist()
+                if points_amount == 1:
+                    fitness_function, batch_fitness_function = self.stp_fitness, self.stp_batch_fitness
+                else:
+                    fitness_function, batch_fitness_function = self.stp_points_fitness, self.stp_points_batch_fitness
+                swarm_rng = self.rng.spawn(1)[0]
+                if islands > 1:
+                    swarm_i = island.IslandModel(islands, population_size, initial_position, batch_fitness_function,
+                                                 migration_interval, topology, self.instrumentation, swarm_rng,
+                                                 executor, parameters, self.events)
+                elif vectorized:
+                    swarm_i = swarm.ArraySwarm(population_size, initial_position, batch_fitness_function,
+                                               self.instrumentation, swarm_rng, topology, parameters, self.events)
+                else:
+                    swarm_i = swarm.Swarm(population_size, initial_position, fitness_function, self.instrumentation,
+                                          swarm_rng, parameters, self.events)
+                best_particle = swarm_i.particle_swarm_optimization(low_lim * points_amount, up_lim * points_amount,
+                                                                    max_iterations, budget)
+                best_position = [float(coordinate) for coordinate in best_particle.position]
+                new_steiner_fitness = float(best_particle.fitness)
+                if self.instrumentation is not None:
+                    self.instrumentation.count('swarms')
+                if self.events is not None:
+                    self.events.emit('swarm', swarm=actual_swarm, fitness=new_steiner_fitness, position=best_position,
+                                     accepted=new_steiner_fitness < self.weight)
+                if new_steiner_fitness < self.weight:
+                    if self.instrumentation is not None:
+                        self.instrumentation.count('accepted_swarms')
+                    accepted_points = [best_position[i:i + dimension] for i in range(0, len(best_position), dimension)]
+                    removed_points = self.insert_points(accepted_points)
+                    self.calculate_total_tree_weight()
+                    removed = {id(point) for point in removed_points}
+                    new_steiner_points = [point for point in new_steiner_points + accepted_points
+                                          if id(point) not in removed]
+                    if self.events is not None:
+                        for new_steiner_p in accepted_points:
+                            if id(new_steiner_p) not in removed:
+                                self.events.emit('steiner_point', point=new_steiner_p, weight=self.weight)
+                        for removed_point in removed_points:
+                            self.events.emit('pruned', point=removed_point, weight=self.weight)
+                    if seeding == 'emst':
+                        seeds = self.candidate_seeds()
+                actual_swarm += 1
+        finally:
+            if executor is not None:
+                executor.shutdown()
+        self.budget = None
+        if start is not None:
+            self.instrumentation.add_time('optimization', time.perf_counter() - start)
+        if self.events is not None:
+            self.events.emit('finish', weight=self.weight, points=self.all_points(),
+                             steiner_points=new_steiner_points)
+        return [self.points, self.weight, new_steiner_points]
+
+    def remove_useless_steiner_points(self):
+        """
+        Function that removes the Steiner points with degree 1 or 2 in the tree, a leaf only adds weight and a point
+        between two neighbors is never shorter than the straight edge joining them, so the tree never gets heavier
+        Returns
+        -------
+        list
+            List with the removed points
+        """
+        removed_points = self.prune_steiner_points()
+        self.graph = None
+        self.clear_fitness_cache()
+        self.calculate_total_tree_weight()
+        return removed_points
+
+    def refine_steiner_points(self, max_iterations=20, tolerance=1e-9):
+        """
+        Function that improves the position of the Steiner points keeping the topology of the tree: every Steiner
+        point with degree 3 or more is moved to the median of its neighbors in `metric` (the Fermat point for degree 3),
+        one point after another as in Smith's iteration, then the tree is calculated again. Steiner points with
+        degree 1 or 2 are removed.
+        Parameters
+        ----------
+        max_iterations: int
+            Maximum number of times the Steiner points are moved
+        tolerance: float
+            The refinement stops when the weight improves less than this value
+        Returns
+        -------
+        float
+            Weight of the refined tree
+        """
+        self.remove_useless_steiner_points()
+        for iteration in range(max_iterations):
+            previous_points = self.points
+            previous_weight = self.weight
+            points = self.vertices.copy()
+            neighbors = [[] for point in points]
+            for u, v in self.tree_edges.tolist():
+                neighbors[u].append(v)
+                neighbors[v].append(u)
+            for i in range(self.terminals_amount, len(points)):
+                points[i] = self.metric.median(points[neighbors[i]], points[i])
+            self.points = self.points[:self.stored_terminals()] + points[self.terminals_amount:].tolist()
+            self.calculate_minimum_euclidean_tree()
+            self.remove_useless_steiner_points()
+            if self.weight > previous_weight:
+                self.points = previous_points
                 self.calculate_minimum_euclidean_tree()
                 self.calculate_total_tree_weight()
-            actual_swarm += 1
-        print("Final weight ", self.weight, " with the points ", self.points)
-        return [self.points, self.weight, new_steiner_points]
+                break
+            if previous_weight - self.weight < tolerance:
+                break
+        if self.events is not None:
+            self.events.emit('refined', weight=self.weight, points=self.all_points())
+        return self.weight
@@ -1,5 +1,8 @@
-import copy
+import time
+import numpy as np
 import src.particle as particle
+from src.parameters import DEFAULT_PARAMETERS, next_chaos
+from src.util import make_rng
 
 
 class Swarm:
@@ -10,13 +13,22 @@ class Swarm:
     ----------
     population: list
         List of particles in the swarm
-    best_global: tuple
-        Particle with the best fitness value in the swarm during all iterations
+    best_global: particle.GlobalBest
+        Best position and fitness value found in the swarm during all iterations
     fitness: function
         Function that evaluates the fitness of a particle
+    instrumentation: instrumentation.Instrumentation
+        Optional collector of counters and timers
+    rng: np.random.Generator
+        Random number generator shared by the particles of the swarm
+    parameters: parameters.PSOParameters
+        Control parameters of the optimization
+    events: events.EventEmitter
+        Optional emitter of the best fitness of every iteration
     """
 
-    def __init__(self, population_size, initial_position, fitness_function):
+    def __init__(self, population_size, initial_position, fitness_function, instrumentation=None, rng=None,
+                 parameters=None, events=None):
         """
         Swarm class constructor
         Parameters
@@ -27,19 +39,43 @@ class Swarm:
             Initial position where the particles will be initialized
         fitness_function: function
             Function that evaluates the fitness of a particle
+        instrumentation: instrumentation.Instrumentation
+            Optional collector of counters and timers
+        rng: int, np.random.SeedSequence or np.random.Generator
+            Random number generator or its seed, see `util.make_rng`
+        parameters: parameters.PSOParameters
+            Control parameters, if None the default ones
+        events: events.EventEmitter
+            Optional emitter of the progress
         """
         self.population = []
-        self.best_global = None
+        self.best_global = particle.GlobalBest(len(initial_position))
+        self.instrumentation = instrumentation
+        self.rng = make_rng(rng)
+        self.parameters = DEFAULT_PARAMETERS if parameters is None else parameters
+        self.events = events
         for i in range(population_size):
-            particle_i = particle.Particle(initial_position, fitness_function)
-            if i == 0:
-                self.best_global = copy.copy(particle_i)
-            if self.best_global.fitness > particle_i.fitness:
-                self.best_global = copy.copy(particle_i)
+            particle_i = particle.Particle(initial_position, fitness_function, instrumentation, self.rng,
+                                           self.parameters)
+            if i == 0 or self.best_global.fitness > particle_i.fitness:
+                self.copy_best(particle_i)
             self.population.append(particle_i)
         self.fitness = fitness_function
 
-    def particle_swarm_optimization(self, lower_limit, upper_limit, max_iterations):
+    def copy_best(self, particle_i):
+        """
+        Function that keeps the position and fitness of a particle as the best global ones, copying them into
+        `best_global` instead of copying the particle
+        Parameters
+        ----------
+        particle_i: particle.Particle
+            Particle with the new best fitness
+        """
+        if self.instrumentation is not None:
+            self.instrumentation.count('best_copies')
+        self.best_global.update(particle_i)
+
+    def particle_swarm_optimization(self, lower_limit, upper_limit, max_iterations, budget=None):
         """
         Function that models the particle swarm optimization algorithm
         Parameters
@@ -50,25 +86,415 @@ class Swarm:
             Upper limit of the search space
         max_iterations: int
             Maximum number of iterations the algorithm will do
+        budget: budget.Budget
+            Optional limits, the swarm stops when they run out or its best fitness reaches the target weight
         Returns
         -------
-        particle.Particle
-            Particle with the best fitness value
+        particle.GlobalBest
+            Best position and fitness value found
         """
+        start = time.perf_counter() if self.instrumentation is not None else None
+        lower_limit = np.asarray(lower_limit, dtype=float)
+        upper_limit = np.asarray(upper_limit, dtype=float)
+        speed_limit = self.parameters.speed_limit(lower_limit, upper_limit)
+        chaos = self.rng.uniform(0, 1) if self.parameters.inertia_schedule == 'chaotic' else 1.0
         iteration = 0
         iteration_without_improvement = 0
-        while iteration < max_iterations and iteration_without_improvement <= 35:
-            previous_global_best = copy.copy(self.best_global)
+        while iteration < max_iterations and iteration_without_improvement <= self.parameters.stagnation_iterations:
+            if budget is not None and budget.should_stop(self.best_global.fitness):
+                break
+            if self.events is not None and self.events.stopped:
+                break
+            inertia = self.parameters.inertia_weight(iteration, max_iterations, chaos)
+            chaos = next_chaos(chaos)
+            previous_global_fitness = self.best_global.fitness
             for k in range(len(self.population)):
                 particle_k = self.population[k]
                 if particle_k.fitness < self.best_global.fitness:
-                    self.best_global = copy.copy(particle_k)
+                    self.copy_best(particle_k)
                     iteration_without_improvement = 0
 
             for k in range(len(self.population)):
                 particle_k = self.population[k]
-                particle_k.update_state(lower_limit, upper_limit, self.best_global.position)
-            if previous_global_best.position == self.best_global.position:
+                particle_k.update_state(lower_limit, upper_limit, self.best_global.position, inertia, speed_limit)
+            if self.parameters.diversity_threshold is not None and self.parameters.needs_restart(
+                    np.array([particle_k.position for particle_k in self.population]), lower_limit, upper_limit):
+                if self.instrumentation is not None:
+                    self.instrumentation.count('diversity_restarts')
+                for particle_k in self.population:
+                    particle_k.restart(lower_limit, upper_limit)
+            if previous_global_fitness == self.best_global.fitness:
+                iteration_without_improvement += 1
+            if self.events is not None and self.events.wants('iteration'):
+                self.events.emit('iteration', iteration=iteration, best_fitness=float(self.best_global.fitness),
+                                 best_position=self.best_global.position.tolist())
+            iteration += 1
+        if start is not None:
+            record_swarm_run(self.instrumentation, start, iteration, max_iterations,
+                             iteration_without_improvement > self.parameters.stagnation_iterations)
+        return self.best_global
+
+
+def record_swarm_run(instrumentation, start, iterations, max_iterations, stagnated):
+    """
+    Function that records the time and the iterations of a swarm run and why it stopped early: `swarm_early_stops`
+    counts the runs that stopped for not improving, `budget_stops` the runs stopped by the budget or by a listener
+    of the events
+    Parameters
+    ----------
+    instrumentation: instrumentation.Instrumentation
+        Collector of counters and timers
+    start: float
+        Value of `time.perf_counter` when the run started
+    iterations: int
+        Iterations done by the swarm
+    max_iterations: int
+        Maximum number of iterations of the swarm
+    stagnated: bool
+        True if the swarm stopped after the stagnation iterations of its parameters without improving
+    """
+    instrumentation.add_time('swarm', time.perf_counter() - start)
+    instrumentation.count('swarm_iterations', iterations)
+    if stagnated:
+        instrumentation.count('swarm_early_stops')
+    elif iterations < max_iterations:
+        instrumentation.count('budget_stops')
+
+
+class ArraySwarm:
+    """
+    Class that models a particle swarm whose particles are stored as rows of arrays, so every iteration updates
+    the whole population at once
+
+    Attributes
+    ----------
+    positions: np.ndarray
+        Position of every particle, one row per particle
+    speeds: np.ndarray
+        Speed of every particle, one row per particle
+    fitness_values: np.ndarray
+        Fitness value of every particle
+    best_positions: np.ndarray
+        Position where every particle found its best fitness
+    best_fitness: np.ndarray
+        Best fitness value found by every particle
+    worsening: np.ndarray
+        Times that every particle worsened its fitness
+    best_global_index: int
+        Index of the particle with the best fitness found in the swarm
+    neighbors: np.ndarray
+        Indices of the neighborhood of every particle, one row per particle, None for the global best topology
+    fitness: function
+        Function that receives an array with one position per row and returns an array with their fitness values
+    instrumentation: instrumentation.Instrumentation
+        Optional collector of counters and timers
+    rng: np.random.Generator
+        Random number generator of the swarm
+    parameters: parameters.PSOParameters
+        Control parameters of the optimization
+    iterations: int
+        Iterations done by the swarm in all its runs, the inertia schedule goes on from them
+    chaos: float
+        Actual value of the logistic map of the 'chaotic' inertia schedule
+    events: events.EventEmitter
+        Optional emitter of the best fitness of every iteration
+    """
+
+    def __init__(self, population_size, initial_position, fitness_function, instrumentation=None, rng=None,
+                 topology='global', parameters=None, events=None):
+        """
+        ArraySwarm class constructor
+        Parameters
+        ----------
+        population_size: int
+            Number of particles in the swarm
+        initial_position: list
+            Initial position where the particles will be initialized
+        fitness_function: function
+            Function that evaluates the fitness of an array of positions, one position per row
+        instrumentation: instrumentation.Instrumentation
+            Optional collector of counters and timers
+        rng: int, np.random.SeedSequence or np.random.Generator
+            Random number generator or its seed, see `util.make_rng`
+        topology: str
+            Particles every particle learns from, see `topology_neighbors`
+        parameters: parameters.PSOParameters
+            Control parameters, if None the default ones
+        events: events.EventEmitter
+            Optional emitter of the progress
+        """
+        dimension = len(initial_position)
+        self.neighbors = topology_neighbors(population_size, topology)
+        self.fitness = fitness_function
+        self.instrumentation = instrumentation
+        self.rng = make_rng(rng)
+        self.parameters = DEFAULT_PARAMETERS if parameters is None else parameters
+        self.events = events
+        self.iterations = 0
+        self.chaos = 1.0
+        self.speeds = self.rng.uniform(0, 1, (population_size, dimension))
+        self.positions = np.asarray(initial_position, dtype=float) + self.rng.uniform(-1, 1, (population_size,
+                                                                                             dimension))
+        self.fitness_values = np.asarray(fitness_function(self.positions), dtype=float)
+        self.best_positions = self.positions.copy()
+        self.best_fitness = self.fitness_values.copy()
+        self.worsening = np.zeros(population_size, dtype=int)
+        self.best_global_index = int(np.argmin(self.best_fitness))
+
+    @property
+    def population(self):
+        """List with a `particle.ParticleView` of every particle in the swarm"""
+        return [particle.ParticleView(self, i) for i in range(len(self.positions))]
+
+    @property
+    def best_global(self):
+        """`particle.ParticleView` with the best position and fitness found in the swarm"""
+        return particle.ParticleView(self, self.best_global_index, personal_best=True)
+
+    def check_reset(self):
+        """
+        Function that resets, around their actual position, the particles that worsened their fitness too many
+        times. The particle with the best global fitness is never reset, so the swarm does not lose it.
+        """
+        reset = self.worsening >= self.parameters.reset_worsening
+        reset[self.best_global_index] = False
+        reset_amount = np.count_nonzero(reset)
+        if reset_amount == 0:
+            return
+        if self.instrumentation is not None:
+            self.instrumentation.count('particle_resets', int(reset_amount))
+        self.reset_particles(reset)
+
+    def restart(self, lower_limit, upper_limit):
+        """
+        Function that starts every particle but the global best one again around a random position inside the
+        limits, it is used when the swarm lost its diversity
+        Parameters
+        ----------
+        lower_limit: list
+            Lower limit of the search space
+        upper_limit: list
+            Upper limit of the search space
+        """
+        reset = np.ones(len(self.positions), dtype=bool)
+        reset[self.best_global_index] = False
+        if not reset.any():
+            return
+        if self.instrumentation is not None:
+            self.instrumentation.count('diversity_restarts')
+        self.positions[reset] = self.rng.uniform(lower_limit, upper_limit, (np.count_nonzero(reset),
+                                                                            self.positions.shape[1]))
+        self.reset_particles(reset)
+
+    def reset_particles(self, reset):
+        """
+        Function that gives a random speed to some particles and moves them randomly around their position, they
+        forget their best position
+        Parameters
+        ----------
+        reset: np.ndarray
+            Boolean mask of the particles to reset
+        """
+        reset_amount = np.count_nonzero(reset)
+        dimension = self.positions.shape[1]
+        self.speeds[reset] = self.rng.uniform(0, 1, (reset_amount, dimension))
+        self.positions[reset] += self.rng.uniform(-1, 1, (reset_amount, dimension))
+        self.fitness_values[reset] = self.fitness(self.positions[reset])
+        self.best_positions[reset] = self.positions[reset]
+        self.best_fitness[reset] = self.fitness_values[reset]
+        self.worsening[reset] = 0
+        self.best_global_index = int(np.argmin(self.best_fitness))
+
+    def social_indices(self):
+        """
+        Function that finds the particle every particle learns from: the best one of its neighborhood, or the best
+        one of the swarm with the global best topology
+        Returns
+        -------
+        np.ndarray or int
+            Index of the best particle of the neighborhood of every particle, or the index of the global best
+        """
+        if self.neighbors is None:
+            return self.best_global_index
+        best_neighbor = np.argmin(self.best_fitness[self.neighbors], axis=1)
+        return self.neighbors[np.arange(len(self.neighbors)), best_neighbor]
+
+    def immigrate(self, position, fitness):
+        """
+        Function that replaces the particle with the worst best fitness with a particle that comes from another swarm,
+        if the migrant is better
+        Parameters
+        ----------
+        position: np.ndarray
+            Position of the migrant
+        fitness: float
+            Fitness value of the position
+        """
+        worst = int(np.argmax(self.best_fitness))
+        if fitness >= self.best_fitness[worst]:
+            return
+        self.positions[worst] = position
+        self.best_positions[worst] = position
+        self.fitness_values[worst] = fitness
+        self.best_fitness[worst] = fitness
+        self.worsening[worst] = 0
+        self.best_global_index = int(np.argmin(self.best_fitness))
+
+    def update_speeds(self, inertia=None, speed_limit=None):
+        """
+        Function that updates the speed of every particle, with the same rule as `particle.Particle`
+        Parameters
+        ----------
+        inertia: float
+            Inertia weight of the iteration, if None the one of `parameters`
+        speed_limit: np.ndarray
+            Maximum absolute speed of every coordinate, if None the speed is not limited
+        """
+        w = self.parameters.inertia if inertia is None else inertia  # Inertia constant
+        c_1 = self.parameters.cognitive  # Cognitive constant
+        c_2 = self.parameters.social  # Social constant
+
+        r_1 = self.rng.normal(0, 1, self.positions.shape)
+        r_2 = self.rng.normal(0, 1, self.positions.shape)
+        cognitive_speed = self.best_positions - self.positions
+        social_speed = self.best_positions[self.social_indices()] - self.positions
+        self.speeds *= w
+        self.speeds += c_1 * r_1 * cognitive_speed + c_2 * r_2 * social_speed
+        if self.parameters.constriction:
+            self.speeds *= self.parameters.constriction_factor()
+        if speed_limit is not None:
+            np.clip(self.speeds, -speed_limit, speed_limit, out=self.speeds)
+
+    def update_positions(self, lower_limit, upper_limit):
+        """
+        Function that moves every particle with its speed, positions that exceed the limits are set to the limit
+        Parameters
+        ----------
+        lower_limit: list
+            Lower limit of the search space
+        upper_limit: list
+            Upper limit of the search space
+        """
+        self.positions += self.speeds
+        np.clip(self.positions, lower_limit, upper_limit, out=self.positions)
+
+    def update_fitness(self):
+        """
+        Function that evaluates every particle and updates the worsening counters and the best positions
+        """
+        self.fitness_values = np.asarray(self.fitness(self.positions), dtype=float)
+        worse = self.fitness_values > self.best_fitness
+        self.worsening[worse] += 1
+        self.worsening[~worse] = 0
+        better = self.fitness_values < self.best_fitness
+        self.best_positions[better] = self.positions[better]
+        self.best_fitness[better] = self.fitness_values[better]
+        self.best_global_index = int(np.argmin(self.best_fitness))
+
+    def particle_swarm_optimization(self, lower_limit, upper_limit, max_iterations, budget=None,
+                                    schedule_iterations=None):
+        """
+        Function that models the particle swarm optimization algorithm, updating the whole swarm in every iteration
+        Parameters
+        ----------
+        lower_limit: list
+            Lower limit of the search space
+        upper_limit: list
+            Upper limit of the search space
+        max_iterations: int
+            Maximum number of iterations the algorithm will do
+        budget: budget.Budget
+            Optional limits, the swarm stops when they run out or its best fitness reaches the target weight
+        schedule_iterations: int
+            Length of the inertia schedule, by default `max_iterations`. It is longer when the swarm runs by parts,
+            like the islands of `island.IslandModel`
+        Returns
+        -------
+        particle.ParticleView
+            View of the best position and fitness found in the swarm
+        """
+        start = time.perf_counter() if self.instrumentation is not None else None
+        schedule_iterations = max_iterations if schedule_iterations is None else schedule_iterations
+        speed_limit = self.parameters.speed_limit(lower_limit, upper_limit)
+        if self.parameters.inertia_schedule == 'chaotic' and self.iterations == 0:
+            self.chaos = self.rng.uniform(0, 1)
+        iteration = 0
+        iteration_without_improvement = 0
+        while iteration < max_iterations and iteration_without_improvement <= self.parameters.stagnation_iterations:
+            if budget is not None and budget.should_stop(self.best_fitness[self.best_global_index]):
+                break
+            if self.events is not None and self.events.stopped:
+                break
+            previous_global_fitness = self.best_fitness[self.best_global_index]
+            inertia = self.parameters.inertia_weight(self.iterations, schedule_iterations, self.chaos)
+            self.chaos = next_chaos(self.chaos)
+            self.check_reset()
+            self.update_speeds(inertia, speed_limit)
+            self.update_positions(lower_limit, upper_limit)
+            self.update_fitness()
+            if self.parameters.needs_restart(self.positions, lower_limit, upper_limit):
+                self.restart(lower_limit, upper_limit)
+            if self.best_fitness[self.best_global_index] < previous_global_fitness:
+                iteration_without_improvement = 0
+            else:
                 iteration_without_improvement += 1
+            if self.events is not None and self.events.wants('iteration'):
+                self.events.emit('iteration', iteration=self.iterations,
+                                 best_fitness=float(self.best_fitness[self.best_global_index]),
+                                 best_position=self.best_positions[self.best_global_index].tolist())
             iteration += 1
+            self.iterations += 1
+        if start is not None:
+            record_swarm_run(self.instrumentation, start, iteration, max_iterations,
+                             iteration_without_improvement > self.parameters.stagnation_iterations)
         return self.best_global
+
+
+def topology_neighbors(population_size, topology):
+    """
+    Function that builds the neighborhoods of a swarm topology
+    Parameters
+    ----------
+    population_size: int
+        Number of particles in the swarm
+    topology: str
+        'global' makes every particle learn from the best one of the swarm, 'ring' from the best one among itself
+        and the particles before and after it, and 'von_neumann' from the best one among itself and its four
+        neighbors in a toroidal grid
+    Returns
+    -------
+    np.ndarray
+        Indices of the neighborhood of every particle, one row per particle, None for 'global'
+    """
+    indices = np.arange(population_size)
+    if topology == 'global':
+        return None
+    if topology == 'ring':
+        return np.stack([(indices - 1) % population_size, indices, (indices + 1) % population_size], axis=1)
+    if topology == 'von_neumann':
+        rows = max(int(np.sqrt(population_size)), 1)
+        columns = -(-population_size // rows)
+        row, column = np.divmod(indices, columns)
+        left = (row * columns + (column - 1) % columns) % population_size
+        right = (row * columns + (column + 1) % columns) % population_size
+        up = (indices - columns) % population_size
+        down = (indices + columns) % population_size
+        return np.stack([indices, left, right, up, down], axis=1)
+    raise ValueError("topology should be 'global', 'ring' or 'von_neumann'")
+
+
+def batched(fitness_function):
+    """
+    Function that adapts a fitness function of one position to the array interface of `ArraySwarm`
+    Parameters
+    ----------
+    fitness_function: function
+        Function that evaluates the fitness of one position
+    Returns
+    -------
+    function
+        Function that evaluates an array of positions, one position per row
+    """
+    def batched_fitness(positions):
+        return np.array([fitness_function(position) for position in positions], dtype=float)
+    return batched_fitness
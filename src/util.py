@@ -1,13 +1,9 @@
-import math
-import networkx as nx
+import numpy as np
 
 
 def distance_between_two_points(point_1, point_2):
     """Function that calculates the distance between two points with n-dimension."""
-    distance = 0
-    for i in range(0, len(point_1)):
-        distance += pow((point_2[i] - point_1[i]), 2)
-    return math.sqrt(distance)
+    return float(np.linalg.norm(np.subtract(point_2, point_1, dtype=float)))
 
 
 def calculate_total_graph_weight(graph):
@@ -26,3 +22,98 @@ def calculate_total_graph_weight(graph):
     for edge in graph.edges.data('weight', default=1000):
         total_weight += edge[2]
     return total_weight
+
+
+def make_rng(seed=None):
+    """
+    Function that creates a random number generator
+    Parameters
+    ----------
+    seed: int, np.random.SeedSequence or np.random.Generator
+        Seed of the generator, a generator is returned as it is and None takes a seed from the operating system
+    Returns
+    -------
+    np.random.Generator
+        Random number generator
+    """
+    if isinstance(seed, np.random.Generator):
+        return seed
+    return np.random.default_rng(seed)
+
+
+def geometric_median(points, start=None, max_iterations=200, tolerance=1e-12):
+    """
+    Function that calculates the point that minimizes the sum of distances to a points set (for three points, the
+    Fermat point of the triangle) with the Weiszfeld iteration, modified as proposed by Vardi and Zhang so that it
+    can stop at one of the points of the set
+    Parameters
+    ----------
+    points: list
+        Points set
+    start: list
+        Initial estimate, the centroid of the set if it is not given
+    max_iterations: int
+        Maximum number of iterations
+    tolerance: float
+        The iteration stops when the estimate moves less than this fraction of the extent of the set, or less than a
+        few times the float spacing of its coordinates, so the stop does not depend on the units of the points
+    Returns
+    -------
+    np.ndarray
+        Geometric median of the points set
+    """
+    points = np.asarray(points, dtype=float)
+    median = points.mean(axis=0) if start is None else np.array(start, dtype=float)
+    tolerance = max(tolerance * np.ptp(points, axis=0).max(), 4 * np.spacing(np.abs(points).max()))
+    for i in range(max_iterations):
+        distances = np.sqrt(((points - median) ** 2).sum(axis=1))
+        away = distances > tolerance
+        if not away.any():
+            break
+        inverse = 1 / distances[away]
+        weighted_mean = (points[away] * inverse[:, np.newaxis]).sum(axis=0) / inverse.sum()
+        if away.all():
+            new_median = weighted_mean
+        else:
+            pull = np.sqrt((((points[away] - median) * inverse[:, np.newaxis]).sum(axis=0) ** 2).sum())
+            coincident = (~away).sum()
+            if pull <= coincident:
+                break
+            new_median = (1 - coincident / pull) * weighted_mean + (coincident / pull) * median
+        step = np.sqrt(((new_median - median) ** 2).sum())
+        median = new_median
+        if step < tolerance:
+            break
+    return median
+
+
+def fermat_points(triangles):
+    """
+    Function that calculates the Fermat point of several triangles at once with its closed form: with all the
+    angles under 120 degrees it is the point whose barycentric coordinates are proportional to a / sin(A + 60°),
+    for every side a and its opposite angle A, and otherwise it is the vertex of the bigger angle
+    Parameters
+    ----------
+    triangles: np.ndarray
+        Array with shape (triangles, 3, dimension)
+    Returns
+    -------
+    np.ndarray
+        Array with the Fermat point of every triangle, one per row
+    """
+    triangles = np.asarray(triangles, dtype=float)
+    sides = np.sqrt(((np.roll(triangles, -1, axis=1) - np.roll(triangles, 1, axis=1)) ** 2).sum(axis=2))
+    next_sides = np.roll(sides, -1, axis=1)
+    previous_sides = np.roll(sides, 1, axis=1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        cosines = (next_sides ** 2 + previous_sides ** 2 - sides ** 2) / (2 * next_sides * previous_sides)
+        angles = np.arccos(np.clip(cosines, -1, 1))
+        weights = sides / np.sin(angles + np.pi / 3)
+        points = (weights[:, :, np.newaxis] * triangles).sum(axis=1) / weights.sum(axis=1)[:, np.newaxis]
+    obtuse = angles >= 2 * np.pi / 3
+    rows = np.flatnonzero(obtuse.any(axis=1))
+    points[rows] = triangles[rows, obtuse[rows].argmax(axis=1)]
+    degenerate = np.flatnonzero(~np.isfinite(points).all(axis=1))
+    for row in degenerate.tolist():
+        points[row] = geometric_median(triangles[row])
+    return points
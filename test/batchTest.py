@@ -0,0 +1,55 @@
+import json
+import os
+import src.batch as batch
+import tempfile
+import unittest
+
+INSTANCE = {'original_points': [[-4, 0], [0, 6], [4, 0]], 'max_iteration': 10, 'swarm_amount': 2,
+            'population_size': 5, 'found_points': [[0, 1]]}
+
+
+class BatchTest(unittest.TestCase):
+    def test_iter_directory(self):
+        with tempfile.TemporaryDirectory() as directory:
+            for name in ('b.json', 'a.json', 'a_results.json'):
+                with open(os.path.join(directory, name), 'w') as file:
+                    file.write(json.dumps(INSTANCE))
+            with open(os.path.join(directory, 'c.json'), 'w') as file:
+                file.write('{oops')
+            instances = [(os.path.basename(name), data) for name, data in batch.iter_instances(directory)]
+            self.assertEqual([name for name, _ in instances], ['a.json', 'b.json', 'c.json'],
+                             'Result files should be skipped')
+            self.assertIsInstance(instances[2][1], ValueError)
+
+    def test_iter_json_lines(self):
+        with tempfile.TemporaryDirectory() as directory:
+            file_name = os.path.join(directory, 'instances.jsonl')
+            with open(file_name, 'w') as file:
+                file.write(json.dumps(dict(INSTANCE, name='first')) + '\n\n' + json.dumps(INSTANCE) + '\n')
+            instances = list(batch.iter_instances(file_name))
+            self.assertEqual([name for name, _ in instances], ['first', file_name + ':3'])
+
+    def test_run_batch(self):
+        with tempfile.TemporaryDirectory() as directory:
+            source = os.path.join(directory, 'instances.jsonl')
+            with open(source, 'w') as file:
+                for i in range(2):
+                    file.write(json.dumps(dict(INSTANCE, name=str(i))) + '\n')
+                file.write('{oops\n')
+                file.write(json.dumps(dict(INSTANCE, name='2')) + '\n')
+                file.write(json.dumps({'name': 'broken'}) + '\n')
+            for workers in (1, 2):
+                output = os.path.join(directory, 'results.jsonl')
+                self.assertEqual(batch.run_batch(source, output, workers, seed=1), 3)
+                with open(output) as file:
+                    results = {result['name']: result for result in map(json.loads, file)}
+                self.assertEqual(set(results), {'0', '1', '2', 'broken', source + ':3'})
+                self.assertIn('error', results['broken'])
+                self.assertIn('JSONDecodeError', results[source + ':3']['error'], 'A line that is not JSON should '
+                                                                                   'not stop the batch')
+                self.assertLessEqual(results['0']['improved_weight'], results['0']['original_weight'])
+                self.assertLessEqual(len(results['0']['found_points']), 4)
+
+
+if __name__ == '__main__':
+    unittest.main()
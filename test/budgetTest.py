@@ -0,0 +1,41 @@
+import src.budget as budget
+import threading
+import time
+import unittest
+
+
+class BudgetTest(unittest.TestCase):
+    def test_evaluations_limit(self):
+        b = budget.Budget(max_evaluations=10)
+        b.start()
+        b.record(9)
+        self.assertFalse(b.exhausted())
+        b.record(1)
+        self.assertTrue(b.exhausted())
+
+    def test_time_limit(self):
+        b = budget.Budget(time_limit=0.01)
+        self.assertFalse(b.exhausted(), 'The time should not run before start')
+        b.start()
+        time.sleep(0.02)
+        self.assertTrue(b.exhausted())
+
+    def test_target_weight(self):
+        b = budget.Budget(target_weight=5)
+        self.assertTrue(b.reached(5))
+        self.assertFalse(b.reached(5.1))
+        self.assertFalse(budget.Budget().should_stop(0), 'A budget without limits should never stop')
+
+    def test_deadline_and_cancel(self):
+        self.assertTrue(budget.Budget(deadline=time.time() - 1).exhausted(), 'The deadline should not need a start')
+        self.assertFalse(budget.Budget(deadline=time.time() + 60).exhausted())
+        event = threading.Event()
+        b = budget.Budget(cancel_event=event)
+        self.assertFalse(b.exhausted())
+        event.set()
+        time.sleep(budget.CANCEL_CHECK_INTERVAL)
+        self.assertTrue(b.exhausted(), 'A set event should cancel the optimization')
+
+
+if __name__ == '__main__':
+    unittest.main()
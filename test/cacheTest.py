@@ -0,0 +1,33 @@
+import src.cache as cache
+import unittest
+
+
+class CacheTest(unittest.TestCase):
+    def test_quantized_keys(self):
+        c = cache.FitnessCache(tolerance=0.1)
+        keys = c.keys([[1.0, 2.0], [1.01, 2.02], [1.2, 2.0]])
+        self.assertEqual(keys[0], keys[1], 'Points closer than the tolerance should share the key')
+        self.assertNotEqual(keys[0], keys[2])
+
+    def test_hits_and_misses(self):
+        c = cache.FitnessCache()
+        key = c.keys([[0, 0]])[0]
+        self.assertIsNone(c.get(key))
+        c.put(key, 3.0)
+        self.assertEqual(c.get(key), 3.0)
+        self.assertEqual((c.hits, c.misses), (1, 1))
+
+    def test_lru_eviction(self):
+        c = cache.FitnessCache(max_size=2)
+        first, second, third = c.keys([[0, 0], [1, 1], [2, 2]])
+        c.put(first, 1.0)
+        c.put(second, 2.0)
+        c.get(first)
+        c.put(third, 3.0)
+        self.assertEqual(len(c.entries), 2)
+        self.assertIsNone(c.get(second), 'The least recently used value should be evicted')
+        self.assertEqual(c.get(first), 1.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
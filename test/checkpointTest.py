@@ -0,0 +1,32 @@
+import os
+import src.checkpoint as checkpoint
+import tempfile
+import unittest
+
+
+class CheckpointTest(unittest.TestCase):
+    def test_save_and_load(self):
+        with tempfile.TemporaryDirectory() as directory:
+            file_name = os.path.join(directory, 'run_checkpoint.json')
+            self.assertIsNone(checkpoint.load_checkpoint(file_name))
+            state = {'completed': 3, 'minimum_weight': 6.5, 'found_points': [[0, 0], [1.5, 2]]}
+            checkpoint.save_checkpoint(file_name, state)
+            self.assertEqual(checkpoint.load_checkpoint(file_name), state)
+            checkpoint.save_checkpoint(file_name, dict(state, completed=4))
+            self.assertEqual(checkpoint.load_checkpoint(file_name)['completed'], 4)
+            self.assertEqual(os.listdir(directory), ['run_checkpoint.json'], 'No temporary file should be left')
+            checkpoint.remove_checkpoint(file_name)
+            self.assertIsNone(checkpoint.load_checkpoint(file_name))
+
+    def test_failed_save_keeps_previous_checkpoint(self):
+        with tempfile.TemporaryDirectory() as directory:
+            file_name = os.path.join(directory, 'run_checkpoint.json')
+            checkpoint.save_checkpoint(file_name, {'completed': 1})
+            with self.assertRaises(TypeError):
+                checkpoint.save_checkpoint(file_name, {'completed': object()})
+            self.assertEqual(checkpoint.load_checkpoint(file_name), {'completed': 1})
+            self.assertEqual(len(os.listdir(directory)), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,145 @@
+import numpy as np
+import src.emst as emst
+import src.metric as metric
+import unittest
+
+
+class EmstTest(unittest.TestCase):
+    def test_insertion_order(self):
+        children, parents = emst.insertion_order([(0, 1), (1, 2), (1, 3)])
+        self.assertEqual(len(children), 3)
+        for position, child in enumerate(children):
+            self.assertNotIn(child, parents[position + 1:], 'Every edge should appear after the edges below it')
+        self.assertEqual(children[-1], 1, 'The last edge should reach the root')
+
+    def test_insertion_weight(self):
+        # Square with side 2, the new point in the middle replaces every edge of the tree
+        children, parents = emst.insertion_order([(0, 1), (1, 2), (2, 3)])
+        distances = [2 ** 0.5] * 4
+        weight = emst.insertion_weight(distances, children, parents, [2, 2, 2])
+        self.assertAlmostEqual(weight, 4 * 2 ** 0.5)
+
+    def test_insertion_weight_far_point(self):
+        children, parents = emst.insertion_order([(0, 1)])
+        weight = emst.insertion_weight([10, 11], children, parents, [1])
+        self.assertEqual(weight, 11, 'A far point should only add its cheapest edge')
+
+    def test_prim_tree(self):
+        edges, weight = emst.prim_tree(emst.as_point_array([(0, 0), (0, 1), (2, 0)]))
+        self.assertEqual(len(edges), 2)
+        self.assertEqual(weight, 3)
+
+    def test_backends_agree(self):
+        points = np.random.default_rng(3).uniform(-50, 50, (300, 2))
+        prim_edges, prim_weight = emst.prim_tree(points)
+        delaunay_edges, delaunay_weight = emst.delaunay_tree(points)
+        self.assertEqual(len(delaunay_edges), len(prim_edges))
+        self.assertAlmostEqual(prim_weight, delaunay_weight)
+        self.assertAlmostEqual(emst.edge_lengths(points, delaunay_edges).sum(), delaunay_weight)
+
+    def test_backends_agree_in_other_metrics(self):
+        points = np.random.default_rng(4).uniform(-50, 50, (200, 3))
+        for points_metric in (metric.EUCLIDEAN, metric.Metric('rectilinear'), metric.Metric('weighted', [1, 4, 9])):
+            prim_edges, prim_weight = emst.prim_tree(points, points_metric)
+            for backend in ('delaunay', 'kdtree'):
+                edges, weight = emst.minimum_spanning_tree(points, backend, points_metric)
+                self.assertEqual(len(edges), len(prim_edges))
+                self.assertAlmostEqual(weight, prim_weight, msg=points_metric.kind + ' ' + backend)
+            batch_weight = emst.batch_prim_weight(points[np.newaxis, :, :], points_metric)[0]
+            self.assertAlmostEqual(batch_weight, prim_weight)
+
+    def test_auto_rectilinear(self):
+        rng = np.random.default_rng(8)
+        centers = rng.uniform(0, 1000, (20, 2))
+        points = centers[rng.integers(0, 20, emst.DELAUNAY_THRESHOLD + 100)] + rng.normal(0, 5, (600, 2))
+        rectilinear = metric.Metric('rectilinear')
+        edges, weight = emst.minimum_spanning_tree(points, 'auto', rectilinear)
+        self.assertEqual(len(edges), len(points) - 1)
+        self.assertAlmostEqual(weight, emst.prim_tree(points, rectilinear)[1],
+                               msg='The large rectilinear trees should be exact')
+
+    def test_delaunay_degenerate_points(self):
+        edges, weight = emst.delaunay_tree(emst.as_point_array([(0, 0), (1, 0), (2, 0), (3, 0), (1, 0)]))
+        self.assertEqual(len(edges), 4, 'Collinear and repeated points should still be connected')
+        self.assertEqual(weight, 3)
+
+    def test_neighbor_tree(self):
+        points = np.random.default_rng(5).uniform(-50, 50, (300, 2))
+        prim_edges, prim_weight = emst.prim_tree(points)
+        neighbor_edges, neighbor_weight = emst.neighbor_tree(points)
+        self.assertEqual(len(neighbor_edges), len(prim_edges))
+        self.assertAlmostEqual(prim_weight, neighbor_weight)
+
+    def test_neighbor_tree_clustered(self):
+        # The nearest neighbors of clustered points do not join the clusters, so the tree needs Borůvka's rounds
+        rng = np.random.default_rng(27)
+        centers = rng.uniform(0, 100, (5, 2))
+        points = centers[rng.integers(0, 5, 150)] + rng.normal(0, 1, (150, 2))
+        for points_metric in (metric.EUCLIDEAN, metric.Metric('rectilinear')):
+            neighbor_edges, neighbor_weight = emst.neighbor_tree(points, metric=points_metric)
+            self.assertEqual(len(neighbor_edges), len(points) - 1)
+            self.assertAlmostEqual(neighbor_weight, emst.prim_tree(points, points_metric)[1], msg=points_metric.kind)
+            self.assertAlmostEqual(emst.edge_lengths(points, neighbor_edges, points_metric).sum(), neighbor_weight)
+
+    def test_local_insertion_weight(self):
+        points = np.random.default_rng(9).uniform(-50, 50, (60, 2))
+        edges, weight = emst.prim_tree(points)
+        children, parents = emst.insertion_order(edges.tolist())
+        edge_weights = emst.edge_lengths(points, np.column_stack([children, parents])).tolist()
+        parent, depth = emst.tree_parents(children, parents, len(points))
+        parent_weights = [0.0] * len(points)
+        for child, edge_weight in zip(children, edge_weights):
+            parent_weights[child] = edge_weight
+        new_point = np.array([3.0, -7.0])
+        distances = np.sqrt(((points - new_point) ** 2).sum(axis=1))
+        expected = emst.insertion_weight(distances.tolist(), children, parents, edge_weights)
+        every_vertex = list(range(len(points)))
+        self.assertAlmostEqual(emst.local_insertion_weight(weight, every_vertex, distances.tolist(), parent, depth,
+                                                           parent_weights), expected)
+        nearest = np.argsort(distances)[:10].tolist()
+        local_weight = emst.local_insertion_weight(weight, nearest, distances[nearest].tolist(), parent, depth,
+                                                   parent_weights)
+        self.assertGreaterEqual(local_weight, expected - 1e-9, 'Less edges can never give a lighter tree')
+        self.assertLessEqual(local_weight, weight + distances.min() + 1e-9)
+
+    def test_insertion_tree(self):
+        rng = np.random.default_rng(4)
+        for dimension in (2, 3):
+            points = rng.uniform(-50, 50, (40, dimension))
+            edges, weight = emst.prim_tree(points)
+            children, parents = emst.insertion_order(edges.tolist())
+            edge_weights = emst.edge_lengths(points, np.column_stack([children, parents])).tolist()
+            new_point = rng.uniform(-50, 50, dimension)
+            distances = np.sqrt(((points - new_point) ** 2).sum(axis=1)).tolist()
+            new_weight, new_edges = emst.insertion_tree(distances, children, parents, edge_weights)
+            all_points = np.vstack([points, new_point])
+            self.assertAlmostEqual(new_weight, emst.prim_tree(all_points)[1])
+            self.assertAlmostEqual(new_weight, emst.insertion_weight(distances, children, parents, edge_weights))
+            new_edges = np.array(new_edges)
+            self.assertEqual(len(new_edges), len(points))
+            self.assertAlmostEqual(emst.edge_lengths(all_points, new_edges).sum(), new_weight)
+            self.assertTrue(emst.tree_component(new_edges, 0, len(all_points)).all(), 'The tree should be connected')
+
+    def test_closest_pair(self):
+        rng = np.random.default_rng(5)
+        for amount in (30, 1200):
+            points = rng.uniform(-50, 50, (amount, 2))
+            first = np.arange(0, amount, 3)
+            second = np.setdiff1d(np.arange(amount), first)
+            u, v, distance = emst.closest_pair(points, first, second)
+            distances = np.sqrt(((points[first][:, np.newaxis] - points[second][np.newaxis]) ** 2).sum(axis=2))
+            self.assertIn(u, first)
+            self.assertIn(v, second)
+            self.assertAlmostEqual(distance, distances.min())
+            self.assertAlmostEqual(distance, np.linalg.norm(points[u] - points[v]))
+
+    def test_tree_graph(self):
+        points = [(0, 0), (0, 1), (2, 0)]
+        edges, weight = emst.minimum_spanning_tree(points)
+        graph = emst.tree_graph(points, edges)
+        self.assertEqual(len(graph.edges), 2)
+        self.assertEqual(graph.edges[(0, 0), (2, 0)]['weight'], 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
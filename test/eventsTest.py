@@ -0,0 +1,72 @@
+import contextlib
+import io
+import src.events as events
+import src.steiner as steiner
+import unittest
+
+POINTS = [[0, 0], [0, 1], [2, 0], [2, 1], [4, 0], [4, 1]]
+
+
+class EventsTest(unittest.TestCase):
+    def test_throttle(self):
+        received = []
+        emitter = events.EventEmitter(received.append, max_rate=1e-3)
+        for i in range(100):
+            emitter.emit('iteration', iteration=i)
+            emitter.emit('swarm', swarm=i)
+        self.assertEqual([event['iteration'] for event in received if event['type'] == 'iteration'], [0],
+                         'Only one iteration event should be sent at this rate')
+        self.assertEqual(len([event for event in received if event['type'] == 'swarm']), 100,
+                         'The swarm events should not be throttled')
+        self.assertFalse(events.EventEmitter().wants('start'), 'Without listeners no event should be built')
+
+    def test_optimization_events(self):
+        for vectorized in (False, True):
+            received = []
+            s = steiner.Steiner([point.copy() for point in POINTS], rng=1, events=events.EventEmitter(received.append))
+            s.calculate_minimum_euclidean_tree()
+            s.calculate_total_tree_weight()
+            output = io.StringIO()
+            with contextlib.redirect_stdout(output):
+                points, weight, steiner_points = s.steiner_particle_optimization(10, 3, 10, vectorized=vectorized)
+            self.assertEqual(output.getvalue(), '', 'The optimization should not print')
+            kinds = [event['type'] for event in received]
+            self.assertEqual(kinds[0], 'start')
+            self.assertEqual(received[0]['original_weight'], 7)
+            self.assertEqual(kinds[-1], 'finish')
+            self.assertEqual(received[-1]['weight'], weight)
+            self.assertEqual(kinds.count('swarm'), 3)
+            for event in received:
+                if event['type'] in ('swarm', 'iteration'):
+                    key = 'fitness' if event['type'] == 'swarm' else 'best_fitness'
+                    self.assertIs(type(event[key]), float, 'The events should carry Python floats')
+            self.assertIn('iteration', kinds)
+            accepted = [event['point'] for event in received if event['type'] == 'steiner_point']
+            for point in steiner_points:
+                self.assertIn(point, accepted)
+
+    def test_kinds(self):
+        received = []
+        emitter = events.EventEmitter(received.append, kinds=events.PRINTED_KINDS)
+        self.assertFalse(emitter.wants('iteration'), 'The filtered events should not be built')
+        s = steiner.Steiner([point.copy() for point in POINTS], rng=1, events=emitter)
+        s.calculate_minimum_euclidean_tree()
+        s.calculate_total_tree_weight()
+        s.steiner_particle_optimization(10, 3, 10)
+        self.assertEqual([event['type'] for event in received], ['start', 'finish'])
+
+    def test_stop(self):
+        emitter = events.EventEmitter()
+        emitter.subscribe(lambda event: event['type'] == 'swarm' and emitter.stop())
+        received = []
+        emitter.subscribe(received.append)
+        s = steiner.Steiner([point.copy() for point in POINTS], rng=1, events=emitter)
+        s.calculate_minimum_euclidean_tree()
+        s.calculate_total_tree_weight()
+        s.steiner_particle_optimization(10, 5, 10)
+        self.assertEqual([event['type'] for event in received].count('swarm'), 1,
+                         'The optimization should stop after the listener asks it')
+
+
+if __name__ == '__main__':
+    unittest.main()
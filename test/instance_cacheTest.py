@@ -0,0 +1,63 @@
+import json
+import os
+import shutil
+import tempfile
+import numpy as np
+import src.instance_cache as instance_cache
+import src.steiner as steiner
+import unittest
+
+
+class InstanceCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.cache_directory = os.path.join(self.directory, 'cache')
+        self.file_name = os.path.join(self.directory, 'instance.json')
+        self.points = [[0, 0], [4, 0], [2, 3], [6, 5], [1, 7]]
+        with open(self.file_name, 'w') as file:
+            json.dump({'original_points': self.points, 'max_iteration': 3}, file)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_build_once(self):
+        first = instance_cache.load_instance(self.file_name, self.cache_directory)
+        modified = os.path.getmtime(os.path.join(first.path, 'meta.json'))
+        second = instance_cache.load_instance(self.file_name, self.cache_directory)
+        self.assertEqual(first.path, second.path)
+        self.assertEqual(os.path.getmtime(os.path.join(second.path, 'meta.json')), modified,
+                         'The entry should not be built again')
+        self.assertEqual(second.data, {'max_iteration': 3})
+        self.assertIsInstance(second.points, np.memmap)
+        self.assertEqual(second.point_list(), self.points)
+        self.assertIs(type(second.point_list()[0][0]), int, 'Integer coordinates should stay integers')
+
+    def test_key_changes(self):
+        key = instance_cache.instance_key(self.file_name)
+        self.assertNotEqual(key, instance_cache.instance_key(self.file_name, 'rectilinear'))
+        with open(self.file_name, 'w') as file:
+            json.dump({'original_points': self.points[:4]}, file)
+        self.assertNotEqual(key, instance_cache.instance_key(self.file_name), 'Editing the file should change the key')
+
+    def test_same_tree(self):
+        instance = instance_cache.load_instance(self.file_name, self.cache_directory)
+        s = steiner.Steiner(self.points)
+        s.calculate_minimum_euclidean_tree()
+        s.calculate_total_tree_weight()
+        cached = steiner.Steiner(instance.points)
+        cached.use_tree(instance.edges, instance.weight)
+        cached.calculate_total_tree_weight()
+        self.assertTrue(np.shares_memory(cached.vertices, instance.points), 'The terminals should not be copied')
+        self.assertEqual(cached.points, [])
+        self.assertAlmostEqual(cached.weight, s.weight)
+        candidate = [3, 2]
+        self.assertAlmostEqual(cached.stp_fitness(candidate), s.stp_fitness(candidate))
+        removed_points = cached.insert_points([[3, 2], [100, 100]])
+        self.assertEqual(removed_points, [[100, 100]])
+        self.assertEqual(cached.points, [[3, 2]])
+        self.assertEqual(cached.all_points(), self.points + [[3, 2]])
+        self.assertAlmostEqual(cached.tree_weight, s.stp_fitness(candidate))
+
+
+if __name__ == '__main__':
+    unittest.main()
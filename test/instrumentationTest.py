@@ -0,0 +1,43 @@
+import json
+import numpy as np
+import src.instrumentation as instrumentation
+import src.parameters as parameters
+import src.swarm as swarm
+import unittest
+
+
+class InstrumentationTest(unittest.TestCase):
+    def test_counters_and_timers(self):
+        i = instrumentation.Instrumentation()
+        i.count('fitness_evaluations')
+        i.count('fitness_evaluations', 4)
+        with i.timer('fitness'):
+            pass
+        with i.timer('fitness'):
+            pass
+        self.assertEqual(i.counters['fitness_evaluations'], 5)
+        self.assertEqual(i.calls['fitness'], 2)
+        self.assertGreaterEqual(i.timers['fitness'], 0)
+
+    def test_vectorized_resets_to_json(self):
+        i = instrumentation.Instrumentation()
+        s = swarm.ArraySwarm(10, [0, 0], lambda positions: np.abs(positions).sum(axis=1), i, rng=1,
+                             parameters=parameters.PSOParameters(reset_worsening=1))
+        s.particle_swarm_optimization([-5, -5], [5, 5], 20)
+        self.assertGreater(i.counters['particle_resets'], 0)
+        self.assertIs(type(i.counters['particle_resets']), int)
+        self.assertEqual(json.loads(i.to_json())['counters']['particle_resets'], i.counters['particle_resets'])
+
+    def test_export(self):
+        exported = []
+        i = instrumentation.Instrumentation(callback=exported.append)
+        i.count('emst_builds')
+        data = json.loads(i.to_json())
+        self.assertEqual(data['counters'], {'emst_builds': 1})
+        self.assertEqual(exported, [data], 'The callback should receive the exported data')
+        i.reset()
+        self.assertEqual(i.counters, {})
+
+
+if __name__ == '__main__':
+    unittest.main()
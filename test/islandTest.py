@@ -0,0 +1,42 @@
+import numpy as np
+import src.island as island
+import unittest
+from concurrent.futures import ProcessPoolExecutor
+
+
+def squared_norm(positions):
+    return (positions ** 2).sum(axis=1)
+
+
+class IslandTest(unittest.TestCase):
+    def test_island_optimization(self):
+        model = island.IslandModel(3, 10, [3, 3], squared_norm, migration_interval=5, rng=1)
+        self.assertEqual(len(model.islands), 3)
+        initial_best = model.best_global.fitness
+        best = model.particle_swarm_optimization([-5, -5], [5, 5], 40)
+        self.assertLessEqual(best.fitness, initial_best, 'The best fitness should never get worse')
+        self.assertLess(best.fitness, 0.5)
+
+    def test_migration(self):
+        model = island.IslandModel(2, 5, [3, 3], squared_norm, rng=2)
+        model.islands[0].best_fitness[0] = -1.0
+        model.islands[0].best_global_index = 0
+        model.migrate()
+        receiver = model.islands[1]
+        self.assertEqual(receiver.best_fitness[receiver.best_global_index], -1.0,
+                         'The best position of an island should reach the next one')
+        self.assertEqual(np.count_nonzero(receiver.best_fitness == -1.0), 1)
+
+    def test_workers_give_the_same_result(self):
+        results = []
+        for executor in (None, ProcessPoolExecutor(max_workers=2)):
+            model = island.IslandModel(2, 10, [3, 3], squared_norm, migration_interval=5, rng=3, executor=executor)
+            best = model.particle_swarm_optimization([-5, -5], [5, 5], 20)
+            results.append((best.fitness, best.position.tolist()))
+            if executor is not None:
+                executor.shutdown()
+        self.assertEqual(results[0], results[1], 'Running the islands in workers should not change the search')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,51 @@
+import numpy as np
+import src.metric as metric
+import unittest
+
+
+class MetricTest(unittest.TestCase):
+    def test_distances(self):
+        points = np.array([[0.0, 0.0, 0.0], [1.0, 2.0, 2.0]])
+        self.assertEqual(metric.EUCLIDEAN.distances(points, [0, 0, 0]).tolist(), [0.0, 3.0])
+        self.assertEqual(metric.Metric('rectilinear').distances(points, [0, 0, 0]).tolist(), [0.0, 5.0])
+        weighted = metric.Metric('weighted', [4, 1, 1])
+        self.assertAlmostEqual(weighted.distances(points[1], points[0]), np.sqrt(12))
+
+    def test_pairwise_broadcast(self):
+        points = np.random.default_rng(1).uniform(0, 1, (5, 3))
+        distances = metric.EUCLIDEAN.distances(points[:, np.newaxis, :], points[np.newaxis, :, :])
+        self.assertEqual(distances.shape, (5, 5))
+        self.assertTrue(np.allclose(distances, distances.T))
+        self.assertTrue(np.allclose(np.diag(distances), 0))
+
+    def test_median(self):
+        triangle = np.array([[0.0, 0.0], [4.0, 0.0], [1.0, 3.0]])
+        self.assertEqual(metric.Metric('rectilinear').median(triangle).tolist(), [1.0, 0.0])
+        fermat_point = metric.EUCLIDEAN.median(triangle)
+        weighted = metric.Metric('weighted', [1, 1]).median(triangle)
+        self.assertTrue(np.allclose(fermat_point, weighted), 'Unit weights should give the Euclidean median')
+
+    def test_triangle_medians(self):
+        triangles = np.random.default_rng(2).uniform(0, 10, (20, 3, 2))
+        triangles[0] = [[0, 0], [10, 0], [5, 0.1]]
+        for points_metric in (metric.EUCLIDEAN, metric.Metric('rectilinear'), metric.Metric('weighted', [1, 4])):
+            medians = points_metric.triangle_medians(triangles)
+            expected = np.array([points_metric.median(triangle) for triangle in triangles])
+            lengths = points_metric.distances(triangles, medians[:, np.newaxis, :]).sum(axis=1)
+            expected_lengths = points_metric.distances(triangles, expected[:, np.newaxis, :]).sum(axis=1)
+            self.assertTrue((lengths <= expected_lengths + 1e-9).all(),
+                            points_metric.kind + ' closed form should be at least as good as the iterations')
+        self.assertEqual(metric.EUCLIDEAN.triangle_medians(triangles[:1]).tolist(), [[5, 0.1]],
+                         'With an angle over 120 degrees the median is the vertex')
+
+    def test_get_metric(self):
+        self.assertIs(metric.get_metric(), metric.EUCLIDEAN)
+        self.assertEqual(metric.get_metric('rectilinear').p, 1)
+        with self.assertRaises(ValueError):
+            metric.get_metric('weighted')
+        with self.assertRaises(ValueError):
+            metric.Metric('manhattan')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,40 @@
+import numpy as np
+import src.parameters as parameters
+import unittest
+
+
+class ParametersTest(unittest.TestCase):
+    def test_default_parameters(self):
+        p = parameters.PSOParameters()
+        self.assertEqual((p.inertia, p.cognitive, p.social), (0.5, 1.25, 1.75))
+        self.assertEqual(p.inertia_weight(10, 30), 0.5)
+        self.assertEqual(p.constriction_factor(), 1.0)
+        self.assertIsNone(p.speed_limit([0, 0], [1, 1]))
+
+    def test_inertia_schedules(self):
+        linear = parameters.PSOParameters(inertia=0.9, final_inertia=0.4, inertia_schedule='linear')
+        self.assertAlmostEqual(linear.inertia_weight(0, 11), 0.9)
+        self.assertAlmostEqual(linear.inertia_weight(5, 11), 0.65)
+        self.assertAlmostEqual(linear.inertia_weight(10, 11), 0.4)
+        chaotic = parameters.PSOParameters(inertia=0.9, final_inertia=0.4, inertia_schedule='chaotic')
+        self.assertAlmostEqual(chaotic.inertia_weight(10, 11, chaos=0.5), 0.2)
+        self.assertAlmostEqual(parameters.next_chaos(0.25), 0.75)
+        with self.assertRaises(ValueError):
+            parameters.PSOParameters(inertia_schedule='random')
+
+    def test_constriction(self):
+        p = parameters.PSOParameters(cognitive=2.05, social=2.05, constriction=True)
+        self.assertAlmostEqual(p.constriction_factor(), 0.7298, places=4)
+        self.assertEqual(p.inertia_weight(0, 10), 1.0)
+        with self.assertRaises(ValueError):
+            parameters.PSOParameters(constriction=True)
+
+    def test_speed_limit_and_diversity(self):
+        p = parameters.PSOParameters(velocity_clamp=0.1, diversity_threshold=0.01)
+        self.assertEqual(p.speed_limit([0, -5], [10, 5]).tolist(), [1.0, 1.0])
+        self.assertTrue(p.needs_restart(np.full((5, 2), 3.0), [0, -5], [10, 5]))
+        self.assertFalse(p.needs_restart(np.array([[0.0, -5], [10, 5]]), [0, -5], [10, 5]))
+
+
+if __name__ == '__main__':
+    unittest.main()
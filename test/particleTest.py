@@ -8,11 +8,24 @@ class ParticleTest(unittest.TestCase):
         for v in p.speed:
             self.assertLessEqual(v, 1, 'The speed in each position should be between 0 and 1')
             self.assertGreaterEqual(v, 0, 'The speed in each position should be between 0 and 1')
-        self.assertEqual(p.position, p.best_fitness[1], 'In the first iteration, the position is the same as in '
-                                                        'best_fitness')
+        self.assertEqual(p.position.tolist(), p.best_fitness[1].tolist(), 'In the first iteration, the position is '
+                                                                          'the same as in best_fitness')
         self.assertEqual(p.worsening, 0, 'In the first iteration the particle haven´t worsened its position')
         self.assertLessEqual(p.best_fitness[0], 4, 'The first fitness is at best equal to 4')
 
+    def test_update_in_place(self):
+        p = particle.Particle([1, 1], lambda position: float(abs(position).sum()), rng=3)
+        position, speed, best_position = p.position, p.speed, p.best_position
+        for _ in range(30):
+            p.update_state([-10, -10], [10, 10], [0, 0])
+            self.assertLessEqual(p.best_value, p.fitness)
+        self.assertIs(p.position, position, 'The position should be updated in place')
+        self.assertIs(p.speed, speed, 'The speed should be updated in place')
+        self.assertIs(p.best_position, best_position)
+        self.assertEqual(p.best_value, abs(p.best_position).sum(), 'The best position should not move with the '
+                                                                    'particle')
+        self.assertFalse(hasattr(p, '__dict__'))
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,88 @@
+import asyncio
+import time
+import src.service as service
+import unittest
+
+INSTANCE = {'original_points': [[0, 0], [0, 1], [2, 0], [2, 1], [4, 0], [4, 1]],
+            'max_iteration': 5, 'swarm_amount': 2, 'population_size': 10, 'executions': 3}
+
+
+class ServiceTest(unittest.TestCase):
+    def test_stream_improvements(self):
+        async def client():
+            async with service.SolveService() as solver:
+                request = await solver.submit(INSTANCE, seed=1)
+                return [event async for event in request], await request
+
+        events, result = asyncio.run(client())
+        self.assertEqual(events[-1], result)
+        self.assertEqual(result['status'], 'completed')
+        self.assertEqual(result['original_weight'], 7)
+        weights = [event['improved_weight'] for event in events[:-1]]
+        self.assertTrue(all(event['type'] == 'improvement' for event in events[:-1]))
+        self.assertEqual(weights, sorted(weights, reverse=True), 'Every improvement should be lighter')
+        self.assertLessEqual(result['improved_weight'], 7)
+
+    def test_deadline_and_cancel(self):
+        long_instance = dict(INSTANCE, max_iteration=10000, executions=50)
+
+        async def client():
+            async with service.SolveService() as solver:
+                late = await solver.submit(long_instance, seed=1, timeout=0.5)
+                cancelled = await solver.submit(long_instance, seed=1)
+                queued = await solver.submit(long_instance, seed=1)
+                queued.cancel()
+                late_result = await late
+                await asyncio.sleep(0.2)
+                cancelled.cancel()
+                return late_result, await cancelled, await queued
+
+        late, cancelled, queued = asyncio.run(client())
+        self.assertEqual(late['status'], 'deadline')
+        self.assertLessEqual(late['improved_weight'], late['original_weight'])
+        self.assertEqual(cancelled['status'], 'cancelled')
+        self.assertEqual(queued['status'], 'cancelled')
+        self.assertIsNone(queued['improved_weight'])
+
+    def test_pool_released(self):
+        points = [[x * 37 % 101, x * 59 % 103] for x in range(40)]
+        long_instance = {'original_points': points, 'max_iteration': 1000, 'swarm_amount': 100000,
+                         'population_size': 30, 'executions': 3}
+
+        async def client():
+            async with service.SolveService() as solver:
+                start = time.perf_counter()
+                late = await solver.submit(long_instance, seed=1, timeout=1)
+                short = await solver.submit(INSTANCE, seed=1)
+                await asyncio.wait_for(short, 10)
+                after_deadline = time.perf_counter() - start
+                cancelled = await solver.submit(long_instance, seed=1)
+                short = await solver.submit(INSTANCE, seed=1)
+                await asyncio.sleep(1)
+                cancelled.cancel()
+                start = time.perf_counter()
+                await asyncio.wait_for(short, 10)
+                return await late, after_deadline, time.perf_counter() - start
+
+        late, after_deadline, after_cancel = asyncio.run(client())
+        self.assertEqual(late['status'], 'deadline')
+        self.assertLess(after_deadline, 2, 'The queued executions should not run after the deadline')
+        self.assertLess(after_cancel, 1, 'The running executions should stop when their request is cancelled')
+
+    def test_bounded_queue(self):
+        async def client():
+            solver = service.SolveService(queue_size=1)
+            await solver.submit(INSTANCE)
+            try:
+                await asyncio.wait_for(solver.submit(INSTANCE), 0.1)
+                return False
+            except asyncio.TimeoutError:
+                return True
+            finally:
+                await solver.close()
+
+        self.assertTrue(asyncio.run(client()), 'The submit should wait while the queue is full')
+
+
+if __name__ == '__main__':
+    unittest.main()
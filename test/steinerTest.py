@@ -1,4 +1,12 @@
+import numpy as np
+import random
+import src.budget as budget
+import src.cache as cache
+import src.instrumentation as instrumentation
+import src.metric as metric
 import src.steiner as steiner
+import subprocess
+import sys
 import unittest
 from src.util import calculate_total_graph_weight
 
@@ -29,6 +37,50 @@ class SteinerTest(unittest.TestCase):
         new_tree_weight = calculate_total_graph_weight(new_tree)
         self.assertLessEqual(new_tree_weight, 3.5, 'The total weight of the new tree should be less than 3.5')
 
+    def test_stp_fitness_matches_rebuilt_tree(self):
+        rng = random.Random(7)
+        points = [(rng.uniform(-10, 10), rng.uniform(-10, 10)) for _ in range(15)]
+        s = steiner.Steiner(points)
+        s.calculate_minimum_euclidean_tree()
+        for _ in range(20):
+            new_point = (rng.uniform(-10, 10), rng.uniform(-10, 10))
+            expected = calculate_total_graph_weight(s.calculate_tree_with_point(new_point))
+            self.assertAlmostEqual(s.stp_fitness(new_point), expected)
+
+    def test_stp_batch_fitness(self):
+        rng = random.Random(11)
+        s = steiner.Steiner([(rng.uniform(-10, 10), rng.uniform(-10, 10)) for _ in range(15)])
+        s.calculate_minimum_euclidean_tree()
+        new_points = [(rng.uniform(-10, 10), rng.uniform(-10, 10)) for _ in range(30)]
+        weights = s.stp_batch_fitness(new_points)
+        self.assertEqual(len(weights), 30, 'There should be one weight per point')
+        for new_point, weight in zip(new_points, weights):
+            self.assertAlmostEqual(weight, s.stp_fitness(new_point))
+
+    def test_fitness_cache(self):
+        s = steiner.Steiner([(0, 0), (0, 1), (2, 0)], fitness_cache=cache.FitnessCache(tolerance=1e-3))
+        s.calculate_minimum_euclidean_tree()
+        weight = s.stp_fitness((1, 0.5))
+        self.assertEqual(s.stp_fitness((1.0001, 0.5)), weight, 'Close points should be read from the cache')
+        batch_weights = s.stp_batch_fitness([(1, 0.5), (5, 5)])
+        self.assertEqual(batch_weights[0], weight)
+        self.assertEqual((s.fitness_cache.hits, s.fitness_cache.misses), (2, 2))
+        s.points.append([1, 0.5])
+        s.calculate_minimum_euclidean_tree()
+        self.assertEqual(len(s.fitness_cache.entries), 0, 'A new points set should invalidate the cache')
+
+    def test_neighborhood_fitness(self):
+        rng = random.Random(13)
+        points = [(rng.uniform(-10, 10), rng.uniform(-10, 10)) for _ in range(40)]
+        s = steiner.Steiner(points, neighborhood=10)
+        s.calculate_minimum_euclidean_tree()
+        full = steiner.Steiner(points)
+        full.calculate_minimum_euclidean_tree()
+        new_points = [(rng.uniform(-10, 10), rng.uniform(-10, 10)) for _ in range(20)]
+        for new_point, weight in zip(new_points, s.stp_batch_fitness(new_points)):
+            self.assertAlmostEqual(weight, full.stp_fitness(new_point))
+            self.assertAlmostEqual(s.stp_fitness(new_point), weight)
+
     def test_upper_limit(self):
         s = steiner.Steiner([(-9, 8), (-7, 3), (-2, 7), (9, 9),
                              (10, -8), (-10, 9), (4, 0)])
@@ -50,6 +102,223 @@ class SteinerTest(unittest.TestCase):
         self.assertGreaterEqual(len(steiner_points[0]), len(s.points))
         self.assertLessEqual(steiner_points[1], original_w)
 
+    def test_vectorized_steiner_optimization(self):
+        s = steiner.Steiner([(-4, 0), (0, 6), (4, 0)])
+        s.calculate_minimum_euclidean_tree()
+        s.calculate_total_tree_weight()
+        original_w = s.weight
+        steiner_points = s.steiner_particle_optimization(30, 10, 15, vectorized=True)
+        self.assertLessEqual(steiner_points[1], original_w)
+        for point in steiner_points[2]:
+            self.assertEqual(len(point), 2)
+
+    def test_stp_points_fitness(self):
+        s = steiner.Steiner([(0, 0), (0, 1), (2, 0), (2, 1)])
+        s.calculate_minimum_euclidean_tree()
+        expected = steiner.Steiner([(0, 0), (0, 1), (2, 0), (2, 1), (0.5, 0.5), (1.5, 0.5)])
+        expected.calculate_minimum_euclidean_tree()
+        self.assertAlmostEqual(s.stp_points_fitness([0.5, 0.5, 1.5, 0.5]), expected.tree_weight)
+        self.assertAlmostEqual(s.stp_points_fitness([1, 1]), s.stp_fitness((1, 1)))
+
+    def test_stp_points_batch_fitness(self):
+        rng = np.random.default_rng(8)
+        points = rng.uniform(0, 100, (60, 2))
+        positions = rng.uniform(0, 100, (10, 6))
+        for metric_name in ('euclidean', 'rectilinear'):
+            s = steiner.Steiner(points.tolist(), metric=metric_name, fitness_cache=cache.FitnessCache())
+            s.calculate_minimum_euclidean_tree()
+            weights = s.stp_points_batch_fitness(positions)
+            for position, weight in zip(positions, weights):
+                expected = steiner.Steiner(points.tolist() + position.reshape(3, 2).tolist(), metric=metric_name)
+                expected.calculate_minimum_euclidean_tree()
+                self.assertAlmostEqual(weight, expected.tree_weight, msg='The insertions should give the minimum tree')
+            self.assertEqual(s.stp_points_batch_fitness(positions).tolist(), weights.tolist())
+            self.assertEqual(s.fitness_cache.hits, len(positions), 'The positions should be read from the cache')
+
+    def test_multi_point_steiner_optimization(self):
+        s = steiner.Steiner([(0, 0), (0, 1), (2, 0), (2, 1)])
+        s.calculate_minimum_euclidean_tree()
+        s.calculate_total_tree_weight()
+        original_w = s.weight
+        steiner_points = s.steiner_particle_optimization(30, 3, 20, vectorized=True, points_per_particle=2)
+        self.assertLessEqual(steiner_points[1], original_w)
+        self.assertEqual(len(steiner_points[2]) % 2, 0, 'The points should be added two at a time')
+        self.assertEqual(len(s.points), 4 + len(steiner_points[2]))
+        with self.assertRaises(ValueError):
+            s.steiner_particle_optimization(30, 3, 20, points_per_particle=len(s.points) - 1)
+
+    def test_refine_steiner_points(self):
+        s = steiner.Steiner([(0, 0), (1, 0), (0.5, 3 ** 0.5 / 2)])
+        s.points.append([0.5, 0.1])
+        s.calculate_minimum_euclidean_tree()
+        s.calculate_total_tree_weight()
+        refined_weight = s.refine_steiner_points()
+        self.assertAlmostEqual(refined_weight, 3 ** 0.5, 6, 'The Steiner point should reach the Fermat point')
+        self.assertAlmostEqual(s.points[3][0], 0.5, 6)
+        self.assertAlmostEqual(s.points[3][1], 3 ** 0.5 / 6, 6)
+
+    def test_remove_useless_steiner_points(self):
+        s = steiner.Steiner([(0, 0), (4, 0), (2, 3)])
+        s.points += [[2, -1.5], [10, 10]]
+        s.calculate_minimum_euclidean_tree()
+        s.calculate_total_tree_weight()
+        original_w = s.weight
+        removed_points = s.remove_useless_steiner_points()
+        self.assertEqual(removed_points, [[2, -1.5], [10, 10]])
+        self.assertEqual(len(s.points), 3)
+        self.assertLess(s.weight, original_w)
+
+    def test_insert_points(self):
+        rng = np.random.default_rng(6)
+        for metric_name in ('euclidean', 'rectilinear'):
+            s = steiner.Steiner(rng.uniform(0, 100, (50, 2)).tolist(), metric=metric_name)
+            s.calculate_minimum_euclidean_tree()
+            new_points = rng.uniform(0, 100, (10, 2)).tolist()
+            removed_points = s.insert_points(new_points)
+            s.calculate_total_tree_weight()
+            self.assertEqual(len(s.points), 60 - len(removed_points))
+            self.assertEqual(len(s.tree_edges), len(s.points) - 1)
+            degrees = np.bincount(s.tree_edges.ravel(), minlength=len(s.points))
+            self.assertTrue((degrees[s.terminals_amount:] >= 3).all(), 'Steiner points of degree 1 or 2 should be '
+                                                                        'removed')
+            rebuilt = steiner.Steiner(list(s.points), metric=metric_name)
+            rebuilt.calculate_minimum_euclidean_tree()
+            self.assertAlmostEqual(s.weight, rebuilt.tree_weight, 6, 'The updated tree should be the minimum one')
+            self.assertAlmostEqual(s.stp_fitness([50, 50]), rebuilt.stp_fitness([50, 50]), 6)
+
+    def test_candidate_seeds(self):
+        s = steiner.Steiner([(0, 0), (1, 0), (0.5, 3 ** 0.5 / 2), (10, 0)])
+        s.calculate_minimum_euclidean_tree()
+        seeds = s.candidate_seeds()
+        self.assertGreater(len(seeds), 0)
+        self.assertAlmostEqual(seeds[0][0], 0.5, 6, 'The best seed should be the Fermat point of the triangle')
+        self.assertAlmostEqual(seeds[0][1], 3 ** 0.5 / 6, 6)
+        straight = steiner.Steiner([(0, 0), (1, 0), (2, 0)])
+        straight.calculate_minimum_euclidean_tree()
+        self.assertEqual(straight.candidate_seeds(), [], 'Edges at 180 degrees should not give seeds')
+
+    def test_candidate_seeds_after_insertion(self):
+        rng = np.random.default_rng(7)
+        for metric_name in ('euclidean', 'rectilinear'):
+            s = steiner.Steiner(rng.uniform(0, 100, (80, 2)).tolist(), metric=metric_name)
+            s.calculate_minimum_euclidean_tree()
+            seeds = s.candidate_seeds()
+            for i in range(5):
+                s.insert_points(seeds[:2])
+                seeds = s.candidate_seeds()
+                rebuilt = steiner.Steiner(list(s.points), metric=metric_name)
+                rebuilt.use_tree(s.tree_edges, s.tree_weight)
+                self.assertTrue(np.allclose(sorted(seeds), sorted(rebuilt.candidate_seeds())),
+                                'Only the pairs around the changed edges should be calculated again')
+
+    def test_emst_seeding_optimization(self):
+        s = steiner.Steiner([(-4, 0), (0, 6), (4, 0)])
+        s.calculate_minimum_euclidean_tree()
+        s.calculate_total_tree_weight()
+        original_w = s.weight
+        steiner_points = s.steiner_particle_optimization(30, 2, 15, vectorized=True, seeding='emst')
+        self.assertLess(steiner_points[1], original_w)
+
+    def test_instrumentation(self):
+        s = steiner.Steiner([(-4, 0), (0, 6), (4, 0)], instrumentation=instrumentation.Instrumentation())
+        s.calculate_minimum_euclidean_tree()
+        s.calculate_total_tree_weight()
+        s.steiner_particle_optimization(10, 2, 5, vectorized=True)
+        counters = s.instrumentation.counters
+        self.assertEqual(counters['swarms'], 2)
+        self.assertGreaterEqual(counters['emst_builds'], 1)
+        self.assertGreaterEqual(counters['fitness_evaluations'], 2 * 5)
+        self.assertIn('swarm', s.instrumentation.timers)
+        self.assertIn('optimization', s.instrumentation.timers)
+
+    def test_seeded_optimization_is_repeatable(self):
+        results = []
+        for vectorized in (False, False, True, True):
+            s = steiner.Steiner([(-4, 0), (0, 6), (4, 0), (3, 3)], rng=42)
+            s.calculate_minimum_euclidean_tree()
+            s.calculate_total_tree_weight()
+            results.append(s.steiner_particle_optimization(20, 3, 10, vectorized=vectorized)[1:])
+        self.assertEqual(results[0], results[1], 'The same seed should give the same result')
+        self.assertEqual(results[2], results[3], 'The same seed should give the same result')
+
+    def test_evaluation_budget(self):
+        for vectorized in (False, True):
+            s = steiner.Steiner([(-4, 0), (0, 6), (4, 0), (3, 3)])
+            s.calculate_minimum_euclidean_tree()
+            s.calculate_total_tree_weight()
+            original_w = s.weight
+            b = budget.Budget(max_evaluations=50)
+            steiner_points = s.steiner_particle_optimization(30, 10, 10, vectorized=vectorized, budget=b)
+            self.assertLessEqual(steiner_points[1], original_w)
+            self.assertLess(b.evaluations, 50 + 2 * 10, 'The swarms should stop when the evaluations run out')
+            self.assertIsNone(s.budget)
+
+    def test_target_weight_budget(self):
+        s = steiner.Steiner([(-4, 0), (0, 6), (4, 0)], instrumentation=instrumentation.Instrumentation())
+        s.calculate_minimum_euclidean_tree()
+        s.calculate_total_tree_weight()
+        target = s.weight * 0.99
+        steiner_points = s.steiner_particle_optimization(30, 10, 15, vectorized=True,
+                                                         budget=budget.Budget(target_weight=target))
+        self.assertLessEqual(steiner_points[1], target)
+        self.assertLess(s.instrumentation.counters['swarms'], 10, 'The optimization should stop at the target')
+
+    def test_island_optimization(self):
+        results = []
+        for workers in (1, 2):
+            s = steiner.Steiner([(-4, 0), (0, 6), (4, 0), (3, 3)], instrumentation=instrumentation.Instrumentation(),
+                                rng=5)
+            s.calculate_minimum_euclidean_tree()
+            s.calculate_total_tree_weight()
+            original_w = s.weight
+            results.append(s.steiner_particle_optimization(20, 2, 10, topology='ring', islands=2,
+                                                           migration_interval=5, workers=workers)[1:])
+            self.assertLess(results[-1][0], original_w)
+            self.assertGreaterEqual(s.instrumentation.counters['migrations'], 1)
+        self.assertEqual(results[0], results[1], 'The islands should give the same result in worker processes')
+        with self.assertRaises(ValueError):
+            s.steiner_particle_optimization(20, 2, 10, topology='ring')
+
+    def test_three_dimensional_optimization(self):
+        # Regular tetrahedron, its Steiner tree has two Steiner points
+        tetrahedron = [(1, 1, 1), (1, -1, -1), (-1, 1, -1), (-1, -1, 1)]
+        s = steiner.Steiner(list(tetrahedron), rng=7)
+        s.calculate_minimum_euclidean_tree()
+        s.calculate_total_tree_weight()
+        self.assertEqual(s.calculate_upper_limit(), [1, 1, 1])
+        self.assertEqual(s.calculate_lower_limit(), [-1, -1, -1])
+        original_w = s.weight
+        result = s.steiner_particle_optimization(30, 3, 15, vectorized=True, points_per_particle=2)
+        self.assertLess(result[1], original_w)
+        self.assertTrue(all(len(point) == 3 for point in result[2]), 'The Steiner points should have 3 coordinates')
+        self.assertAlmostEqual(s.stp_fitness(np.zeros(3)), calculate_total_graph_weight(
+            s.calculate_tree_with_point([0.0, 0.0, 0.0])))
+
+    def test_rectilinear_optimization(self):
+        # Four points around (1, 1): the rectilinear tree joined at the center has weight 4 instead of 6
+        cross = [(0, 1), (2, 1), (1, 0), (1, 2)]
+        for metric_name in ('rectilinear', metric.Metric('rectilinear')):
+            s = steiner.Steiner(list(cross), rng=8, metric=metric_name)
+            s.calculate_minimum_euclidean_tree()
+            s.calculate_total_tree_weight()
+            self.assertEqual(s.weight, 6)
+            self.assertEqual(s.stp_fitness([1, 1]), 4)
+            self.assertEqual(s.stp_batch_fitness(np.array([[1.0, 1.0], [1.0, 0.5]])).tolist(), [4, 5])
+            self.assertEqual(calculate_total_graph_weight(s.calculate_tree_with_point([1, 1])), 4)
+            result = s.steiner_particle_optimization(40, 3, 15, vectorized=True, seeding='emst')
+            self.assertLess(result[1], 4.5)
+            self.assertLess(s.refine_steiner_points(), 4 + 1e-9)
+
+    def test_core_does_not_import_graph_libraries(self):
+        code = ('import sys, main, src.steiner as steiner\n'
+                's = steiner.Steiner([(-4, 0), (0, 6), (4, 0)], rng=1)\n'
+                's.calculate_minimum_euclidean_tree()\n'
+                's.calculate_total_tree_weight()\n'
+                's.steiner_particle_optimization(5, 1, 5, vectorized=True)\n'
+                'print(sorted(m for m in ("networkx", "matplotlib") if m in sys.modules))\n')
+        output = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True).stdout
+        self.assertEqual(output.splitlines()[-1], '[]', 'Only the plots and `tree` should load NetworkX and matplotlib')
+
 
 if __name__ == '__main__':
     unittest.main()
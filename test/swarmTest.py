@@ -1,3 +1,7 @@
+import numpy as np
+import src.budget as budget
+import src.instrumentation as instrumentation
+import src.parameters as parameters
 import src.swarm as swarm
 import src.particle as particle
 import unittest
@@ -11,6 +15,90 @@ class SwarmTest(unittest.TestCase):
             self.assertIsInstance(p, particle.Particle, 'Every item in the swarm should be a particle')
         self.assertEqual(s.fitness, sum, 'The fitness function should be equal to the parameter')
 
+    def test_array_swarm_constructor(self):
+        s = swarm.ArraySwarm(5, [0, 0], swarm.batched(sum))
+        self.assertEqual(s.positions.shape, (5, 2), 'There should be one row per particle')
+        self.assertEqual(len(s.population), 5, 'The total amount of particles should be equal to the parameter')
+        for p in s.population:
+            self.assertIsInstance(p, particle.ParticleView, 'Every item in the swarm should be a particle view')
+        self.assertEqual(s.best_global.fitness, min(p.fitness for p in s.population))
+
+    def test_array_swarm_optimization(self):
+        def squared_norm(positions):
+            return (positions ** 2).sum(axis=1)
+        s = swarm.ArraySwarm(20, [3, 3], squared_norm)
+        initial_best = s.best_global.fitness
+        best = s.particle_swarm_optimization([-5, -5], [5, 5], 50)
+        self.assertLessEqual(best.fitness, initial_best, 'The best fitness should never get worse')
+        self.assertLess(best.fitness, 0.5)
+        self.assertTrue(((s.positions >= -5) & (s.positions <= 5)).all(), 'Particles should stay in the limits')
+
+    def test_stop_reasons(self):
+        i = instrumentation.Instrumentation()
+        constant = swarm.ArraySwarm(5, [0, 0], lambda positions: np.ones(len(positions)), i,
+                                    parameters=parameters.PSOParameters(stagnation_iterations=3))
+        constant.particle_swarm_optimization([-5, -5], [5, 5], 50)
+        self.assertEqual(i.counters.get('swarm_early_stops'), 1)
+        self.assertNotIn('budget_stops', i.counters)
+        limited = swarm.Swarm(5, [0, 0], sum, i)
+        limited.particle_swarm_optimization([-5, -5], [5, 5], 50, budget.Budget(target_weight=1000))
+        self.assertEqual(i.counters.get('swarm_early_stops'), 1, 'A budget stop is not a stagnation stop')
+        self.assertEqual(i.counters.get('budget_stops'), 1)
+
+    def test_topology_neighbors(self):
+        self.assertIsNone(swarm.topology_neighbors(6, 'global'))
+        ring = swarm.topology_neighbors(6, 'ring')
+        self.assertEqual(ring[0].tolist(), [5, 0, 1], 'The ring should wrap around')
+        von_neumann = swarm.topology_neighbors(9, 'von_neumann')
+        self.assertEqual(sorted(von_neumann[4].tolist()), [1, 3, 4, 5, 7], 'The center of a 3x3 grid')
+        self.assertTrue(((von_neumann >= 0) & (von_neumann < 9)).all())
+        self.assertEqual(swarm.topology_neighbors(7, 'von_neumann').shape, (7, 5))
+        with self.assertRaises(ValueError):
+            swarm.topology_neighbors(6, 'star')
+
+    def test_local_topology_optimization(self):
+        def squared_norm(positions):
+            return (positions ** 2).sum(axis=1)
+        for topology in ('ring', 'von_neumann'):
+            s = swarm.ArraySwarm(20, [3, 3], squared_norm, rng=4, topology=topology)
+            best = s.particle_swarm_optimization([-5, -5], [5, 5], 100)
+            self.assertLess(best.fitness, 0.5)
+
+    def test_velocity_clamp(self):
+        def squared_norm(positions):
+            return (positions ** 2).sum(axis=1)
+        clamped = parameters.PSOParameters(velocity_clamp=0.05, inertia_schedule='linear', inertia=0.9)
+        s = swarm.ArraySwarm(10, [3, 3], squared_norm, rng=5, parameters=clamped)
+        s.particle_swarm_optimization([-5, -5], [5, 5], 20)
+        self.assertTrue((abs(s.speeds) <= 0.5 + 1e-12).all(), 'The speeds should be clamped to 5% of the width')
+        self.assertEqual(s.iterations, 20)
+        scalar = swarm.Swarm(10, [3, 3], lambda position: float((position ** 2).sum()), rng=5, parameters=clamped)
+        scalar.particle_swarm_optimization([-5, -5], [5, 5], 20)
+        for p in scalar.population:
+            self.assertTrue((abs(p.speed) <= 0.5 + 1e-12).all())
+
+    def test_diversity_restart(self):
+        restarting = parameters.PSOParameters(diversity_threshold=0.1)
+        for vectorized in (False, True):
+            i = instrumentation.Instrumentation()
+            if vectorized:
+                s = swarm.ArraySwarm(10, [3, 3], lambda positions: (positions ** 2).sum(axis=1), i, rng=6,
+                                     parameters=restarting)
+            else:
+                s = swarm.Swarm(10, [3, 3], lambda position: float((position ** 2).sum()), i, rng=6,
+                                parameters=restarting)
+            initial_best = s.best_global.fitness
+            best = s.particle_swarm_optimization([-5, -5], [5, 5], 100)
+            self.assertGreaterEqual(i.counters.get('diversity_restarts', 0), 1, 'A converged swarm should restart')
+            self.assertLessEqual(best.fitness, initial_best, 'Restarts should not lose the best position')
+
+    def test_swarm_rng(self):
+        positions = []
+        for i in range(2):
+            s = swarm.Swarm(5, [0, 0], sum, rng=7)
+            positions.append([p.position.tolist() for p in s.population])
+        self.assertEqual(positions[0], positions[1], 'The same seed should give the same particles')
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -24,6 +24,24 @@ class UtilTest(unittest.TestCase):
         weight = util.calculate_total_graph_weight(graph)
         self.assertEqual(weight, 1, 'The weight should be equal to 1')
 
+    def test_geometric_median_fermat_point(self):
+        median = util.geometric_median([(0, 0), (1, 0), (0.5, 3 ** 0.5 / 2)])
+        self.assertAlmostEqual(median[0], 0.5)
+        self.assertAlmostEqual(median[1], 3 ** 0.5 / 6)
+
+    def test_geometric_median_obtuse_vertex(self):
+        median = util.geometric_median([(0, 0), (10, 0), (5, 0.1)])
+        self.assertAlmostEqual(median[0], 5, msg='With an angle over 120 degrees the median is the vertex')
+        self.assertAlmostEqual(median[1], 0.1, msg='With an angle over 120 degrees the median is the vertex')
+
+
+    def test_geometric_median_scale(self):
+        # A power of two scales every step exactly, so the same stop gives the same iterations at any scale
+        points = [(0, 0), (3, 0), (1, 2)]
+        scaled = [(x * 2 ** 17, y * 2 ** 17) for x, y in points]
+        self.assertEqual((util.geometric_median(points) * 2 ** 17).tolist(), util.geometric_median(scaled).tolist(),
+                         'The tolerance should be relative to the size of the points set')
+
 
 if __name__ == '__main__':
     unittest.main()